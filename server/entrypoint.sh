@@ -42,6 +42,11 @@ END
 echo "Collecting static files..."
 uv run python manage.py collectstatic --noinput --noinput
 
+# Per-process metrics files of the previous run would be summed with the new ones
+if [ -n "$METRICS_DIR" ]; then
+  rm -rf "$METRICS_DIR" && mkdir -p "$METRICS_DIR"
+fi
+
 # Start server
 echo "Starting Django server..."
 cd /app
@@ -0,0 +1,19 @@
+"""
+Database helpers that work with psycopg 3 and psycopg2
+
+Django runs on either driver, and pooling (``DB_POOL``) needs psycopg 3, but
+the two spell ``COPY ... FROM STDIN`` differently.
+"""
+COPY_CHUNK = 1 << 16
+
+
+def copy_from(cursor, sql, file):
+    """Run ``sql``, a ``COPY ... FROM STDIN``, with the data read from ``file``"""
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        # psycopg2
+        raw.copy_expert(sql, file)
+        return
+    with raw.copy(sql) as copy:
+        while data := file.read(COPY_CHUNK):
+            copy.write(data)
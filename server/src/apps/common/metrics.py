@@ -0,0 +1,212 @@
+"""
+Prometheus metrics without a client library or a push gateway
+
+Every process keeps its counters, histograms and gauges in memory behind one
+lock, held only for the few dict updates of a sample. When
+``settings.METRICS_DIR`` is set, the process writes its state to
+``<METRICS_DIR>/<pid>.json`` at most every ``METRICS_FLUSH_SECONDS`` (and on
+every scrape), and ``render`` sums the files of all workers. The directory
+must be emptied when the server starts, like prometheus_client's
+multiprocess mode; counters of workers that exited keep counting, gauges only
+come from workers that are still alive.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DEFINITIONS = {
+    'http_requests_total': ('counter', "HTTP requests by route, method and status"),
+    'http_request_duration_seconds': ('histogram', "HTTP request latency by route and method"),
+    'bookings_created_total': ('counter', "Bookings created, by source"),
+    'booking_conflicts_total': ('counter', "Bookings rejected because the lot was full, by source"),
+    'bookings_cancelled_total': ('counter', "Bookings cancelled"),
+    'booking_extensions_total': ('counter', "Active sessions extended"),
+    'bookings_transitioned_total': ('counter', "Bookings moved by the expiry worker, by transition"),
+    'booking_expiry_pass_seconds': ('gauge', "Duration of the expiry worker's last pass"),
+    'auth_throttled_total': ('counter', "Login and registration attempts throttled, by scope"),
+    'db_connections_open': ('gauge', "Open database connections, by alias"),
+    'db_connections_opened_total': ('counter', "Database connections opened, or taken from the pool, by alias"),
+    'db_replica_lag_seconds': ('gauge', "Replay lag of a read replica when last checked, by database"),
+    'db_read_routing_total': ('counter', "Requests of replica-readable views, by database read and reason"),
+    'db_pool_size': ('gauge', "Connections held by the pool, by alias"),
+    'db_pool_available': ('gauge', "Idle connections in the pool, by alias"),
+    'db_pool_requests_waiting': ('gauge', "Requests waiting for a pooled connection, by alias"),
+    'db_pool_requests_total': ('counter', "Connections requested from the pool, by alias"),
+    'db_pool_requests_queued_total': ('counter', "Pool requests that had to wait for a connection, by alias"),
+    'db_pool_wait_seconds_total': ('counter', "Time spent waiting for a pooled connection, by alias"),
+    'db_pool_request_errors_total': ('counter', "Pool requests that timed out or failed, by alias"),
+    'db_pool_connections_opened_total': ('counter', "Connections the pool opened to the server, by alias"),
+    'db_pool_connections_lost_total': ('counter', "Pooled connections found broken, by alias"),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+_last_flush = 0.0
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add ``value`` to a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    _maybe_flush()
+
+
+def observe(name, value, **labels):
+    """Record one sample of a histogram"""
+    key = _key(name, labels)
+    index = bisect_left(LATENCY_BUCKETS, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            # One slot per bucket plus +Inf, then the sum of the samples
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[index] += 1
+        histogram[-1] += value
+    _maybe_flush()
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+@receiver(connection_created)
+def _connection_opened(sender, connection, **kwargs):
+    inc('db_connections_opened_total', alias=connection.alias)
+
+
+def record_pool(alias, pool):
+    """Gauges of a psycopg connection pool, and its counters since the previous call"""
+    stats = pool.pop_stats()
+    set_gauge('db_pool_size', stats.get('pool_size', 0), alias=alias)
+    set_gauge('db_pool_available', stats.get('pool_available', 0), alias=alias)
+    set_gauge('db_pool_requests_waiting', stats.get('requests_waiting', 0), alias=alias)
+    for name, key, scale in (
+        ('db_pool_requests_total', 'requests_num', 1),
+        ('db_pool_requests_queued_total', 'requests_queued', 1),
+        ('db_pool_wait_seconds_total', 'requests_wait_ms', 0.001),
+        ('db_pool_request_errors_total', 'requests_errors', 1),
+        ('db_pool_connections_opened_total', 'connections_num', 1),
+        ('db_pool_connections_lost_total', 'connections_lost', 1),
+    ):
+        if stats.get(key):
+            inc(name, stats[key] * scale, alias=alias)
+
+
+def _snapshot():
+    with _lock:
+        return {
+            'pid': os.getpid(),
+            'counters': [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, dict(labels), list(values)] for (name, labels), values in _histograms.items()],
+            'gauges': [[name, dict(labels), value] for (name, labels), value in _gauges.items()],
+        }
+
+
+def flush():
+    """Write this process' state to the shared directory"""
+    global _last_flush
+    _last_flush = time.monotonic()
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+    temporary = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(_snapshot(), file)
+    # Readers never see a half-written file
+    os.replace(temporary, path)
+
+
+def _maybe_flush():
+    if settings.METRICS_DIR and time.monotonic() - _last_flush >= settings.METRICS_FLUSH_SECONDS:
+        flush()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _snapshots():
+    if not settings.METRICS_DIR:
+        yield _snapshot()
+        return
+    flush()
+    for filename in os.listdir(settings.METRICS_DIR):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, filename)) as file:
+                yield json.load(file)
+        except (OSError, ValueError):
+            continue
+
+
+def collect():
+    """Counters, histograms and gauges summed over every process"""
+    counters, histograms, gauges = {}, {}, {}
+    for snapshot in _snapshots():
+        for name, labels, value in snapshot['counters']:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = _key(name, labels)
+            total = histograms.setdefault(key, [0] * len(values))
+            histograms[key] = [a + b for a, b in zip(total, values)]
+        if snapshot['pid'] == os.getpid() or _alive(snapshot['pid']):
+            for name, labels, value in snapshot['gauges']:
+                key = _key(name, labels)
+                gauges[key] = gauges.get(key, 0) + value
+    return counters, histograms, gauges
+
+
+def _labels(labels, **extra):
+    items = [*labels, *extra.items()]
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    counters, histograms, gauges = collect()
+    samples = {name: [] for name in DEFINITIONS}
+
+    for (name, labels), value in sorted({**counters, **gauges}.items()):
+        samples.setdefault(name, []).append(f'{name}{_labels(labels)} {value}')
+    for (name, labels), values in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), values[:-1]):
+            cumulative += count
+            samples.setdefault(name, []).append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+        samples[name].append(f'{name}_sum{_labels(labels)} {values[-1]}')
+        samples[name].append(f'{name}_count{_labels(labels)} {cumulative}')
+
+    lines = []
+    for name in sorted(samples):
+        kind, description = DEFINITIONS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples[name])
+    return '\n'.join(lines) + '\n'
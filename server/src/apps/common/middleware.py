@@ -0,0 +1,226 @@
+"""
+Per-request instrumentation
+
+``QueryInstrumentationMiddleware`` wraps every database connection for the
+duration of a request and records the number of queries, the total time
+spent in SQL, the slowest statement and queries run repeatedly with the same
+shape (the usual N+1 symptom). The figures are returned in a
+``Server-Timing`` header and logged as one structured record per request.
+
+Views can be given a query budget in ``settings.QUERY_BUDGETS``, keyed by URL
+name. Going over it logs a warning, or raises ``QueryBudgetExceeded`` when
+``settings.QUERY_BUDGET_STRICT`` is set, which is how tests catch regressions.
+
+``MetricsMiddleware`` feeds the request metrics served on ``/metrics``,
+including the connection pool's figures when there is one.
+
+``ReplicaRoutingMiddleware`` gives ``apps.common.routing.ReplicaRouter`` the
+request it routes the reads of.
+
+Both run natively under ASGI as well, so async views are not pushed into a
+thread by the middleware around them.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+from apps.common import metrics, routing
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE = re.compile(r'\s+')
+SQL_PREVIEW = 300
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """Shape of a statement: placeholders stay, IN lists of any length look alike"""
+    return IN_LIST.sub('IN (...)', WHITESPACE.sub(' ', sql)).strip()
+
+
+class QueryStats:
+    """``execute_wrapper`` hook collecting the statements of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, '')
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+            self.shapes[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return {shape: count for shape, count in self.shapes.items() if count > 1}
+
+    def server_timing(self, total):
+        return (
+            f'db;desc="{self.count} queries";dur={self.duration * 1000:.3f}, '
+            f'db-slowest;dur={self.slowest[0] * 1000:.3f}, '
+            f'app;dur={max(total - self.duration, 0) * 1000:.3f}'
+        )
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.instrument(stack, stats)
+            response = self.get_response(request)
+        return self.report(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        stack = ExitStack()
+        # The ORM runs on the request's sync thread, and connections belong to
+        # a thread, so the wrappers go on that thread's connections
+        await sync_to_async(self.instrument)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, stats, time.perf_counter() - started)
+
+    def instrument(self, stack, stats):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+
+    def report(self, request, response, stats, total):
+        response['Server-Timing'] = stats.server_timing(total)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else None
+        duplicates = stats.duplicates
+        logger.info('request queries', extra={
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+            'slowest_ms': round(stats.slowest[0] * 1000, 3),
+            'slowest_sql': stats.slowest[1][:SQL_PREVIEW],
+            'duplicates': {shape[:SQL_PREVIEW]: count for shape, count in duplicates.items()},
+        })
+
+        budget = settings.QUERY_BUDGETS.get(view, settings.QUERY_BUDGET_DEFAULT)
+        if budget is not None and stats.count > budget:
+            message = (
+                f"{view} ran {stats.count} queries, over its budget of {budget}; "
+                f"repeated: {sorted(duplicates.values(), reverse=True)}"
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra={'view': view, 'queries': stats.count, 'budget': budget})
+
+        return response
+
+
+class MetricsMiddleware:
+    """Latency histogram and request counter per route, and connection gauges"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        self.connection_gauges()
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        # Connections belong to the request's sync thread
+        await sync_to_async(self.connection_gauges)()
+        return response
+
+    def record(self, request, response, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unmatched'
+        metrics.observe('http_request_duration_seconds', elapsed, route=route, method=request.method)
+        metrics.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+
+    def connection_gauges(self):
+        for connection in connections.all(initialized_only=True):
+            metrics.set_gauge('db_connections_open', int(connection.connection is not None), alias=connection.alias)
+            # Only psycopg 3 connections have a pool, when DB_POOL is set
+            pool = getattr(connection, 'pool', None)
+            if pool is not None:
+                metrics.record_pool(connection.alias, pool)
+
+
+class ReplicaRoutingMiddleware:
+    """Makes the request visible to the replica router, and keeps clients
+    that just wrote on the primary"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routing.routing(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.finish(token)
+        if self.wrote(request, response):
+            routing.mark_written(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = routing.routing(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing.finish(token)
+        if self.wrote(request, response):
+            await sync_to_async(routing.mark_written)(request, response)
+        return response
+
+    def wrote(self, request, response):
+        return bool(settings.DATABASE_REPLICAS) and request.method not in SAFE_METHODS and response.status_code < 400
@@ -0,0 +1,192 @@
+"""
+Read replicas for the read-heavy views
+
+``ReplicaRouter`` sends the reads of the views named in
+``REPLICA_READ_VIEWS`` (nearby, search, the lot list and detail) to one of
+the ``DATABASE_REPLICAS``, picked once per request; everything else, and
+every write, goes to ``default``. The router only knows the request through
+``ReplicaRoutingMiddleware``, which keeps it in a context variable for the
+duration of the request (threads started by ``sync_to_async`` see it too).
+
+A user who has just written reads from the primary for
+``REPLICA_STICKY_SECONDS``, so a booking shows up in the next listing however
+far behind the replica is: the middleware marks the user in the cache and in
+a cookie after any successful unsafe request. A replica whose replay lag is
+over ``REPLICA_MAX_LAG_SECONDS`` gets no reads, nor does one that cannot be
+reached or that stopped streaming while the primary kept writing; each
+process checks the lag every ``REPLICA_LAG_CHECK_SECONDS``.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+STICKY_KEY = 'db:primary:{}'
+PRIMARY_LSN_SQL = "SELECT pg_current_wal_lsn()"
+# Zero once the replica has replayed what the primary has written, or while it
+# streams and has replayed all it received: an idle primary leaves
+# pg_last_xact_replay_timestamp() old without any lag. A replica cut off from
+# the primary (no streaming receiver, seen with pg_read_all_stats) is as far
+# behind as its last replayed transaction, NULL when it never replayed one.
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_replay_lsn() >= %s::pg_lsn THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+        AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+_request = ContextVar('replica_routing_request', default=None)
+_health_lock = threading.Lock()
+_health = {}
+UNDECIDED = object()
+UNKNOWN = object()
+
+
+def replica_lag(alias):
+    """Seconds the replica ``alias`` is behind the primary, infinite when
+    it cannot tell"""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(PRIMARY_LSN_SQL)
+        primary_lsn = cursor.fetchone()[0]
+    with connections[alias].cursor() as cursor:
+        cursor.execute(LAG_SQL, [primary_lsn])
+        lag = cursor.fetchone()[0]
+    return float('inf') if lag is None else float(lag)
+
+
+def healthy(alias):
+    """Whether ``alias`` is reachable and within the lag limit, checked at most
+    every ``REPLICA_LAG_CHECK_SECONDS``"""
+    now = time.monotonic()
+    with _health_lock:
+        checked = _health.get(alias)
+    if checked is not None and now - checked[0] < settings.REPLICA_LAG_CHECK_SECONDS:
+        return checked[1]
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError:
+        logger.warning("replica %s unreachable, reading from the primary", alias, exc_info=True)
+        ok = False
+    else:
+        metrics.set_gauge('db_replica_lag_seconds', lag, database=alias)
+        ok = lag <= settings.REPLICA_MAX_LAG_SECONDS
+    with _health_lock:
+        _health[alias] = (now, ok)
+    return ok
+
+
+def reset():
+    """Check every replica again on the next read"""
+    with _health_lock:
+        _health.clear()
+
+
+def user_id(request):
+    """Id of the user authenticated so far, None when anonymous, UNKNOWN
+    before authentication (DRF authenticates in the view)"""
+    user = request.__dict__.get('user')
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return UNKNOWN
+    return user.pk if user.is_authenticated else None
+
+
+def sticky(request, uid):
+    """Whether the client wrote recently enough to read its writes from the primary"""
+    try:
+        if float(request.COOKIES.get(settings.REPLICA_STICKY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    if uid is None or uid is UNKNOWN:
+        return False
+    return cache.get(STICKY_KEY.format(uid)) is not None
+
+
+def mark_written(request, response):
+    """Send the client's reads to the primary for ``REPLICA_STICKY_SECONDS``"""
+    uid = user_id(request)
+    if uid is UNKNOWN or uid is None:
+        return
+    cache.set(STICKY_KEY.format(uid), 1, settings.REPLICA_STICKY_SECONDS)
+    response.set_cookie(
+        settings.REPLICA_STICKY_COOKIE, str(time.time() + settings.REPLICA_STICKY_SECONDS),
+        max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax'
+    )
+
+
+class RequestRouting:
+    """Where the reads of one request go, decided at its first routed read"""
+
+    def __init__(self, request):
+        self.request = request
+        self.alias = UNDECIDED
+
+    def read_alias(self):
+        if self.alias is UNDECIDED:
+            return self.decide()
+        return self.alias
+
+    def decide(self):
+        request = self.request
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # Middleware reading before the URL was resolved
+            return None
+        if match.view_name not in settings.REPLICA_READ_VIEWS or request.method not in SAFE_METHODS:
+            self.alias = None
+            return None
+        uid = user_id(request)
+        if sticky(request, uid):
+            alias, reason = None, 'sticky'
+        else:
+            replicas = [alias for alias in settings.DATABASE_REPLICAS if healthy(alias)]
+            alias, reason = (random.choice(replicas), 'replica') if replicas else (None, 'lagging')
+        if uid is UNKNOWN and reason != 'sticky':
+            # Reads made while authenticating; the user may still turn out to be sticky
+            return alias
+        metrics.inc('db_read_routing_total', database=alias or DEFAULT_DB_ALIAS, reason=reason)
+        self.alias = alias
+        return alias
+
+
+def routing(request):
+    """Route the reads of ``request`` until the returned token is reset"""
+    return _request.set(RequestRouting(request))
+
+
+def finish(token):
+    _request.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _request.get()
+        if state is None or not settings.DATABASE_REPLICAS or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
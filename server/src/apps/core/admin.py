@@ -1,5 +1,11 @@
 from django.contrib import admin
-from apps.core.models import ParkingLot, Booking
+from apps.core.models import ParkingLot, Booking, RateRule
+
+class RateRuleInline(admin.TabularInline):
+    model = RateRule
+    extra = 0
+    fields = ('weekday', 'start_hour', 'end_hour', 'multiplier', 'priority', 'is_active')
+
 
 @admin.register(ParkingLot)
 class ParkingLotAdmin(admin.ModelAdmin):
@@ -7,6 +13,7 @@ class ParkingLotAdmin(admin.ModelAdmin):
     list_filter = ('spot_type', 'availability', 'is_active', 'created_at')
     search_fields = ('title', 'address', 'owner__email')
     readonly_fields = ('id', 'created_at', 'updated_at')
+    inlines = [RateRuleInline]
 
 # @admin.register(ParkingLotImage)
 # class ParkingLotImageAdmin(admin.ModelAdmin):
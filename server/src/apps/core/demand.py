@@ -0,0 +1,102 @@
+"""
+Demand rollup of bookings per hour and geohash cell
+
+Kept up to date incrementally by ``apps.core.rollups``: the (hour, cell) keys
+touched by changed bookings are recomputed from all the bookings of the cell.
+Heatmaps are then sums over ``DemandCell`` rows.
+"""
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Left
+from apps.core import rollups
+from apps.core.models import DemandCell
+from apps.core.rollups import DEMAND_STATUSES
+from apps.core.utils import geohash_center
+
+CELL_PRECISION = 6
+WATERMARK = 'demand_cells'
+
+REFRESH_SQL = f"""
+WITH changed AS (
+    SELECT DISTINCT
+        ST_GeoHash(parking_lot.location, {CELL_PRECISION}) AS cell,
+        generate_series(
+            date_trunc('hour', booking.start_time),
+            booking.end_time - interval '1 microsecond',
+            interval '1 hour'
+        ) AS hour
+    FROM booking
+    JOIN parking_lot ON parking_lot.id = booking.spot_id
+    WHERE booking.updated_at > %(since)s AND booking.updated_at <= %(until)s
+),
+facts AS (
+    SELECT
+        changed.hour,
+        changed.cell,
+        COUNT(booking.id) FILTER (WHERE booking.start_time >= changed.hour) AS bookings,
+        COALESCE(SUM(booking.total_price) FILTER (WHERE booking.start_time >= changed.hour), 0) AS revenue,
+        COALESCE(SUM(EXTRACT(EPOCH FROM
+            LEAST(booking.end_time, changed.hour + interval '1 hour') - GREATEST(booking.start_time, changed.hour)
+        )) / 3600, 0) AS occupied_hours
+    FROM changed
+    LEFT JOIN parking_lot ON ST_GeoHash(parking_lot.location, {CELL_PRECISION}) = changed.cell
+    LEFT JOIN booking ON booking.spot_id = parking_lot.id
+        AND booking.status = ANY(%(statuses)s)
+        AND booking.start_time < changed.hour + interval '1 hour'
+        AND booking.end_time > changed.hour
+    GROUP BY changed.hour, changed.cell
+)
+INSERT INTO demand_cell (hour, cell, bookings, revenue, occupied_hours)
+SELECT hour, cell, bookings, revenue, occupied_hours FROM facts
+ON CONFLICT (hour, cell) DO UPDATE SET
+    bookings = EXCLUDED.bookings,
+    revenue = EXCLUDED.revenue,
+    occupied_hours = EXCLUDED.occupied_hours
+"""
+
+
+def refresh_window(since, until):
+    """Recompute the cells touched by bookings changed in ``(since, until]``"""
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_SQL, {
+            'since': since,
+            'until': until,
+            'statuses': [str(status) for status in DEMAND_STATUSES],
+        })
+        return cursor.rowcount
+
+
+def refresh(until=None):
+    """Roll bookings changed since the last run into the demand cells"""
+    return rollups.refresh(WATERMARK, refresh_window, until)
+
+
+def rebuild():
+    """Drop the rollup and recompute it from every booking"""
+    rollups.reset(WATERMARK, DemandCell)
+    return refresh()
+
+
+def heatmap(start_time, end_time, precision=CELL_PRECISION):
+    """Demand per cell over ``[start_time, end_time)``, cells cut to ``precision``"""
+    rows = DemandCell.objects.filter(
+        hour__gte=start_time.replace(minute=0, second=0, microsecond=0),
+        hour__lt=end_time
+    ).values(area=Left('cell', precision)).annotate(
+        total_bookings=Sum('bookings'),
+        total_revenue=Sum('revenue'),
+        total_occupied_hours=Sum('occupied_hours')
+    ).order_by('area')
+
+    cells = []
+    for row in rows:
+        latitude, longitude = geohash_center(row['area'])
+        cells.append({
+            'cell': row['area'],
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'bookings': row['total_bookings'],
+            'revenue': row['total_revenue'],
+            'occupied_hours': row['total_occupied_hours'],
+        })
+    return cells
@@ -0,0 +1,267 @@
+"""
+Streaming import of parking lots from CSV, GeoJSON or NDJSON files
+
+Rows are read lazily, validated and written in batches, so memory stays
+bounded by the batch size whatever the size of the file. Every error is
+reported with the line of the input it came from.
+"""
+import csv
+import io
+import json
+import re
+import time
+import uuid
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from apps.common.db import copy_from
+from apps.core.models import ParkingLot
+from apps.core.serializers import CreateParkingLotSerializer
+
+FORMATS = ['csv', 'geojson', 'ndjson']
+READ_SIZE = 64 * 1024
+
+
+class ParkingLotImportSerializer(CreateParkingLotSerializer):
+    class Meta(CreateParkingLotSerializer.Meta):
+        extra_kwargs = {
+            'latitude': {'required': True, 'allow_null': False},
+            'longitude': {'required': True, 'allow_null': False},
+        }
+
+
+class ImportResult:
+    def __init__(self, max_errors):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension in ('json', 'geojson'):
+        return 'geojson'
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        if 'features' in row:
+            row['features'] = [item.strip() for item in (row['features'] or '').split(',') if item.strip()]
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError as error:
+            yield line, error
+
+
+def _feature_row(feature):
+    if not isinstance(feature, dict):
+        return ValueError("Feature must be an object")
+    row = dict(feature.get('properties') or {})
+    geometry = feature.get('geometry') or {}
+    if geometry.get('type') != 'Point' or len(geometry.get('coordinates') or []) < 2:
+        return ValueError("Feature geometry must be a Point")
+    row['longitude'], row['latitude'] = geometry['coordinates'][:2]
+    return row
+
+
+FEATURES_ARRAY = re.compile(r'"features"\s*:\s*\[')
+SEPARATORS = re.compile(r'[\s,]*')
+# Strings (whole, or a quote opening one the buffer cuts), brackets and commas
+STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|"|[][{},]')
+# A feature that does not close within this many characters ends the import
+MAX_FEATURE_SIZE = 16 * READ_SIZE
+
+
+def _value_end(buffer, position):
+    """End of the array element starting at ``position``, found from its
+    brackets and strings alone, or None when the buffer ends first"""
+    depth = 0
+    for match in STRUCTURE.finditer(buffer, position):
+        token = match.group()
+        if token == '"':
+            return None
+        if token in ('{', '['):
+            depth += 1
+        elif token in ('}', ']'):
+            if depth == 0:
+                return match.start()
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        elif token == ',' and depth == 0:
+            return match.start()
+    return None
+
+
+def read_geojson(stream):
+    """Yield the features of a FeatureCollection one at a time.
+
+    The ``features`` array is decoded object by object from a sliding
+    buffer, so the collection never has to fit in memory. A feature that is
+    not valid JSON is reported and skipped up to the end of its brackets.
+    """
+    decoder = json.JSONDecoder()
+    buffer, line, eof = '', 1, False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(READ_SIZE)
+        eof = not chunk
+        buffer += chunk
+
+    while not (match := FEATURES_ARRAY.search(buffer)):
+        if eof:
+            return
+        fill()
+    line += buffer.count('\n', 0, match.end())
+    buffer = buffer[match.end():]
+
+    while True:
+        position = SEPARATORS.match(buffer).end()
+        if position == len(buffer) and not eof:
+            fill()
+            continue
+        if buffer[position:position + 1] in (']', ''):
+            return
+
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except ValueError as error:
+            end = _value_end(buffer, position)
+            if end is None:
+                # Cut off by the buffer: read on, unless it never closes
+                if eof:
+                    yield line + buffer.count('\n', 0, position), error
+                    return
+                if len(buffer) - position > MAX_FEATURE_SIZE:
+                    yield line + buffer.count('\n', 0, position), ValueError(
+                        f"Feature not closed within {MAX_FEATURE_SIZE} characters"
+                    )
+                    return
+                fill()
+                continue
+            yield line + buffer.count('\n', 0, position), error
+            line += buffer.count('\n', 0, end)
+            buffer = buffer[end:]
+            continue
+
+        yield line + buffer.count('\n', 0, position), _feature_row(feature)
+        line += buffer.count('\n', 0, end)
+        buffer = buffer[end:]
+
+
+READERS = {
+    'csv': read_csv,
+    'geojson': read_geojson,
+    'ndjson': read_ndjson,
+}
+
+
+COPY_COLUMNS = [
+    'id', 'owner_id', 'title', 'description', 'address', 'latitude', 'longitude',
+    'spot_type', 'price_per_hour', 'available_spots', 'availability', 'features', 'instructions',
+    'is_active', 'created_at', 'updated_at',
+]
+
+
+def _copy_rows(owner, rows):
+    """COPY a batch of validated rows; the location trigger builds the geometries"""
+    now = timezone.now().isoformat()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in rows:
+        writer.writerow([
+            uuid.uuid4(), owner.pk, row['title'], row.get('description', ''), row['address'],
+            row['latitude'], row['longitude'],
+            row.get('spot_type', 'other'), row['price_per_hour'], row.get('available_spots', 0),
+            row['availability'], json.dumps(row.get('features', [])), row.get('instructions', ''),
+            True, now, now,
+        ])
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        copy_from(
+            cursor, f"COPY parking_lot ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+
+def _bulk_create_rows(owner, rows):
+    ParkingLot.objects.bulk_create([
+        ParkingLot(owner=owner, **row) for row in rows
+    ])
+
+
+WRITERS = {
+    'copy': _copy_rows,
+    'bulk_create': _bulk_create_rows,
+}
+
+
+def import_parking_lots(stream, file_format, owner, method='copy', batch_size=5000, max_errors=1000):
+    """Import the lots of ``stream`` for ``owner``.
+
+    Each batch is validated and written in its own transaction, so valid
+    rows of a file are kept even when other rows fail.
+    """
+    result = ImportResult(max_errors)
+    validator = ParkingLotImportSerializer()
+    write = WRITERS[method]
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            write(owner, batch)
+        result.imported += len(batch)
+        batch.clear()
+
+    for line, row in READERS[file_format](stream):
+        result.rows += 1
+        if isinstance(row, Exception):
+            result.add_error(line, {'non_field_errors': [str(row)]})
+            continue
+        try:
+            batch.append(validator.run_validation(row))
+        except serializers.ValidationError as error:
+            result.add_error(line, error.detail)
+            continue
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    result.elapsed = time.perf_counter() - result.started
+    return result
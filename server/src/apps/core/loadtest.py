@@ -0,0 +1,208 @@
+"""
+Scripted request scenarios for benchmarks
+
+Each scenario builds one request at a time from a sample of the lots and
+bookings in the database (usually a dataset loaded by
+``seed_benchmark_data``). Requests go through the full Django stack, URL
+routing, middleware, JWT authentication and serialization, with the test
+client, so latencies exclude the network and the WSGI server but include
+everything the application does. A run is one transaction that is rolled
+back at the end, so the writing scenarios leave the data as it was.
+
+``run`` returns a JSON-serialisable report with latency percentiles and
+queries per request, and ``compare`` checks a report against an earlier one.
+"""
+import math
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.common.middleware import QueryStats
+from apps.core.models import Booking, BookingStatus, ParkingLot
+
+User = get_user_model()
+
+
+class Context:
+    """Lots and bookings the scenarios draw their requests from"""
+
+    def __init__(self, rng, sample_size=1000):
+        self.rng = rng
+        self.now = timezone.now()
+        # ORDER BY random() reads the whole table once, which is fine for a sample
+        self.lots = list(
+            ParkingLot.objects.filter(is_active=True).order_by('?').values_list('pk', 'latitude', 'longitude')[:sample_size]
+        )
+        self.active_bookings = list(
+            Booking.objects.filter(status=BookingStatus.ACTIVE).order_by('?').values_list('pk', 'user_id')[:sample_size]
+        )
+        self.user_ids = [user_id for _, user_id in self.active_bookings] or list(
+            User.objects.filter(is_active=True).order_by('?').values_list('pk', flat=True)[:sample_size]
+        )
+        self.lot_count = ParkingLot.objects.filter(is_active=True).count()
+        self.lot_pages = max(1, math.ceil(self.lot_count / settings.REST_FRAMEWORK['PAGE_SIZE']))
+        self._tokens = {}
+
+    def token(self, user_id):
+        if user_id not in self._tokens:
+            self._tokens[user_id] = str(AccessToken.for_user(User(pk=user_id)))
+        return self._tokens[user_id]
+
+    def lot(self):
+        return self.rng.choice(self.lots)
+
+    def user(self):
+        return self.rng.choice(self.user_ids)
+
+    def window(self, hours=2):
+        start = self.now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=self.rng.randrange(1, 24 * 14))
+        return start, start + timedelta(hours=hours)
+
+
+# A scenario returns (method, path, data, user_id); user_id None is anonymous
+
+def nearby(context):
+    _, latitude, longitude = context.lot()
+    return 'get', '/api/nearby/', {'latitude': latitude, 'longitude': longitude, 'radius': 2, 'limit': 20}, None
+
+
+def search(context):
+    _, latitude, longitude = context.lot()
+    start_time, end_time = context.window()
+    return 'get', '/api/search/', {
+        'lat': latitude, 'lng': longitude, 'radius': 1,
+        'start_time': start_time.isoformat(), 'end_time': end_time.isoformat(),
+    }, context.user()
+
+
+def booking_create(context):
+    spot_id, _, _ = context.lot()
+    start_time, end_time = context.window()
+    return 'post', '/api/bookings/', {
+        'spot': str(spot_id), 'start_time': start_time.isoformat(), 'end_time': end_time.isoformat(),
+        'duration_hours': '2.00', 'notes': '',
+    }, context.user()
+
+
+def booking_extend(context):
+    booking_id, user_id = context.rng.choice(context.active_bookings)
+    return 'post', f'/api/bookings/{booking_id}/extend_session/', {'hours': 1}, user_id
+
+
+def bookings_list(context):
+    return 'get', '/api/bookings/', {}, context.user()
+
+
+def lots_list(context, max_page=50):
+    page = context.rng.randrange(1, min(context.lot_pages, max_page) + 1)
+    return 'get', '/api/parking-spots/', {'page': page}, context.user()
+
+
+SCENARIOS = {
+    'nearby': nearby,
+    'search': search,
+    'booking_create': booking_create,
+    'booking_extend': booking_extend,
+    'bookings_list': bookings_list,
+    'lots_list': lots_list,
+}
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _request(client, context, scenario):
+    method, path, data, user_id = scenario(context)
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {context.token(user_id)}'} if user_id is not None else {}
+    if method == 'post':
+        headers['content_type'] = 'application/json'
+    stats = QueryStats()
+    started = time.perf_counter()
+    with connection.execute_wrapper(stats):
+        response = getattr(client, method)(path, data, **headers)
+    return time.perf_counter() - started, stats.count, response.status_code
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _, _ in samples)
+    queries = [count for _, count, _ in samples]
+    statuses = Counter(status for _, _, status in samples)
+    milliseconds = lambda value: round(value * 1000, 3)
+    return {
+        'requests': len(samples),
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else None,
+        'mean_ms': milliseconds(sum(latencies) / len(latencies)),
+        'p50_ms': milliseconds(percentile(latencies, 50)),
+        'p95_ms': milliseconds(percentile(latencies, 95)),
+        'p99_ms': milliseconds(percentile(latencies, 99)),
+        'max_ms': milliseconds(latencies[-1]),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+def run(names, requests=200, warmup=20, seed=None, label=''):
+    """Run ``requests`` measured requests of every scenario in ``names``"""
+    rng = random.Random(seed)
+    report = {
+        'label': label,
+        'started_at': timezone.now().isoformat(),
+        'requests': requests,
+        'warmup': warmup,
+        'seed': seed,
+        'scenarios': {},
+        'skipped': [],
+    }
+    # Server errors are counted, not raised
+    client = Client(raise_request_exception=False)
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+        context = Context(rng)
+        report['dataset'] = {
+            'lots': context.lot_count,
+            'sampled_lots': len(context.lots),
+            'sampled_active_bookings': len(context.active_bookings),
+        }
+        for name in names:
+            scenario = SCENARIOS[name]
+            if not context.lots or (scenario is booking_extend and not context.active_bookings):
+                report['skipped'].append(name)
+                continue
+            for _ in range(warmup):
+                _request(client, context, scenario)
+            started = time.perf_counter()
+            samples = [_request(client, context, scenario) for _ in range(requests)]
+            report['scenarios'][name] = summarize(samples, time.perf_counter() - started)
+        transaction.set_rollback(True)
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Regressions of ``report`` against ``baseline``.
+
+    A scenario regresses when its p95 latency grew by more than
+    ``tolerance``, or when it runs more queries per request than before;
+    query counts are deterministic, so any increase counts.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['queries_max'] > previous['queries_max']:
+            regressions.append(f"{name}: queries per request {previous['queries_max']} -> {current['queries_max']}")
+    return regressions
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.core import demand
+
+
+class Command(BaseCommand):
+    help = "Roll bookings changed since the last run into the hourly demand cells"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Drop the rollup and recompute it from every booking")
+        parser.add_argument('--loop', action='store_true', help="Keep running a pass every --interval seconds")
+        parser.add_argument('--interval', type=float, default=300, help="Seconds between passes in --loop mode")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            started = time.monotonic()
+            slices, cells = demand.rebuild()
+            self.stdout.write(f"rebuilt slices={slices} cells={cells} elapsed={time.monotonic() - started:.3f}s")
+
+        while True:
+            started = time.monotonic()
+            slices, cells = demand.refresh()
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"slices={slices} cells={cells} elapsed={elapsed:.3f}s")
+
+            if not options['loop']:
+                return
+            try:
+                time.sleep(max(0, options['interval'] - elapsed))
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.core import rollups
+
+
+class Command(BaseCommand):
+    help = "Roll bookings changed since the last run into the daily per-lot statistics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Drop the rollup and recompute it from every booking")
+        parser.add_argument('--loop', action='store_true', help="Keep running a pass every --interval seconds")
+        parser.add_argument('--interval', type=float, default=300, help="Seconds between passes in --loop mode")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            started = time.monotonic()
+            slices, rows = rollups.rebuild_lot_stats()
+            self.stdout.write(f"rebuilt slices={slices} rows={rows} elapsed={time.monotonic() - started:.3f}s")
+
+        while True:
+            started = time.monotonic()
+            slices, rows = rollups.refresh_lot_stats()
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"slices={slices} rows={rows} elapsed={elapsed:.3f}s")
+
+            if not options['loop']:
+                return
+            try:
+                time.sleep(max(0, options['interval'] - elapsed))
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,61 @@
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.core.models import ParkingLot
+from apps.core.serializers import CreateBookingSerializer
+from apps.core.services import create_bookings
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare bulk booking creation with one POST-equivalent per booking (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help="Bookings created by each path")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f'bench-{uuid.uuid4().hex}@example.com', username=f'bench-{uuid.uuid4().hex}',
+                first_name='Bench', last_name='Mark', password=None
+            )
+            spot = ParkingLot.objects.create(
+                owner=user, title='Benchmark garage', address='Benchmark',
+                latitude=Decimal('40.7128'), longitude=Decimal('-74.0060'),
+                price_per_hour=Decimal('10.00'), available_spots=count * 2, availability='24_7'
+            )
+            start = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+            items = [
+                {'spot': spot.pk, 'start_time': start + timedelta(minutes=i), 'end_time': start + timedelta(hours=2, minutes=i),
+                 'duration_hours': Decimal('2.00'), 'notes': ''}
+                for i in range(count)
+            ]
+
+            request = SimpleNamespace(user=user)
+            with CaptureQueriesContext(connection) as single_queries:
+                started = time.perf_counter()
+                for data in items:
+                    serializer = CreateBookingSerializer(data={**data, 'spot': str(spot.pk)}, context={'request': request})
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save()
+                single = time.perf_counter() - started
+
+            with CaptureQueriesContext(connection) as bulk_queries:
+                started = time.perf_counter()
+                created, rejected = create_bookings(user, list(enumerate(items)))
+                bulk = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"one-by-one: {count / single:,.0f} bookings/s, {len(single_queries)} queries")
+        self.stdout.write(f"bulk:       {len(created) / bulk:,.0f} bookings/s, {len(bulk_queries)} queries")
+        self.stdout.write(self.style.SUCCESS(f"speedup x{single / bulk:.1f}"))
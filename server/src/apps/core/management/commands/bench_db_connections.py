@@ -0,0 +1,85 @@
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from apps.core.loadtest import percentile
+
+MODES = ('connect', 'persistent', 'pool')
+
+
+def settings_for(mode, settings_dict, threads=1):
+    """Copy of ``settings_dict`` reusing connections the way ``mode`` does"""
+    options = {key: value for key, value in settings_dict['OPTIONS'].items() if key != 'pool'}
+    settings_dict = {**settings_dict, 'OPTIONS': options, 'CONN_HEALTH_CHECKS': True}
+    if mode == 'connect':
+        settings_dict['CONN_MAX_AGE'] = 0
+    elif mode == 'persistent':
+        settings_dict['CONN_MAX_AGE'] = None
+    else:
+        settings_dict['CONN_MAX_AGE'] = 0
+        options['pool'] = {'min_size': threads, 'max_size': threads}
+    return settings_dict
+
+
+class Command(BaseCommand):
+    help = "Measure per-request database latency with a new connection per request, persistent connections and a pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode and thread")
+        parser.add_argument('--threads', type=int, default=1, help="Threads making requests at once")
+        parser.add_argument('--query', default='SELECT 1', help="Statement every request runs")
+
+    def request(self, connection, query):
+        """What a request does with the database: open or reuse, query, release"""
+        started = time.perf_counter()
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+        connection.close_if_unusable_or_obsolete()
+        return time.perf_counter() - started
+
+    def measure(self, mode, options):
+        default = connections['default']
+        settings_dict = settings_for(mode, default.settings_dict, options['threads'])
+        alias = f'bench_{mode}'
+        latencies = []
+        lock = threading.Lock()
+
+        def client():
+            connection = default.__class__(settings_dict, alias=alias)
+            # Warm up: the pool opens, the persistent connection is made
+            self.request(connection, options['query'])
+            measured = [self.request(connection, options['query']) for _ in range(options['requests'])]
+            connection.close()
+            with lock:
+                latencies.extend(measured)
+
+        threads = [threading.Thread(target=client) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if mode == 'pool':
+            default.__class__(settings_dict, alias=alias).close_pool()
+        return sorted(latencies)
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode in MODES:
+            if mode == 'pool' and not is_psycopg3:
+                self.stdout.write(self.style.WARNING("pool: skipped, needs psycopg 3"))
+                continue
+            results[mode] = latencies = self.measure(mode, options)
+            self.stdout.write(
+                f"{mode:<11} p50 {percentile(latencies, 50) * 1000:8.3f} ms   "
+                f"p99 {percentile(latencies, 99) * 1000:8.3f} ms   "
+                f"mean {sum(latencies) / len(latencies) * 1000:8.3f} ms"
+            )
+
+        reused = min((mode for mode in results if mode != 'connect'), key=lambda mode: percentile(results[mode], 50))
+        overhead = percentile(results['connect'], 50) - percentile(results[reused], 50)
+        self.stdout.write(self.style.SUCCESS(
+            f"connecting costs {overhead * 1000:.3f} ms per request at p50 ({reused} saves it)"
+        ))
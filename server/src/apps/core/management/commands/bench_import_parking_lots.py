@@ -0,0 +1,55 @@
+import json
+import random
+import tempfile
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.core.importers import WRITERS, import_parking_lots
+from apps.core.models import ParkingLotAvailability, ParkingLotTypes
+
+User = get_user_model()
+
+
+def synthetic_rows(count):
+    for index in range(count):
+        yield {
+            'title': f"Garage {index}",
+            'address': f"{index} Benchmark Ave",
+            'latitude': round(random.uniform(25, 49), 6),
+            'longitude': round(random.uniform(-125, -66), 6),
+            'spot_type': random.choice(ParkingLotTypes.values),
+            'price_per_hour': f"{random.uniform(1, 25):.2f}",
+            'available_spots': random.randint(1, 500),
+            'availability': random.choice(ParkingLotAvailability.values),
+            'features': ['covered'],
+        }
+
+
+class Command(BaseCommand):
+    help = "Measure parking lot import throughput on a synthetic NDJSON file (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help="Rows in the synthetic file")
+        parser.add_argument('--method', choices=list(WRITERS), action='append', help="Writers to compare")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows validated and written together")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as stream:
+            for row in synthetic_rows(options['rows']):
+                stream.write(json.dumps(row) + '\n')
+
+            for method in options['method'] or list(WRITERS):
+                stream.seek(0)
+                with transaction.atomic():
+                    owner = User.objects.create_user(
+                        email=f'bench-{uuid.uuid4().hex}@example.com', username=f'bench-{uuid.uuid4().hex}',
+                        first_name='Bench', last_name='Mark', password=None
+                    )
+                    result = import_parking_lots(stream, 'ndjson', owner, method=method, batch_size=options['batch_size'])
+                    transaction.set_rollback(True)
+
+                self.stdout.write(
+                    f"{method:<12} {result.imported} rows in {result.elapsed:.2f}s "
+                    f"({result.rows_per_second:,.0f} rows/s, {result.failed} failed)"
+                )
@@ -0,0 +1,104 @@
+import io
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from apps.core.models import ParkingLot, ParkingLotAvailability, ParkingLotTypes
+from apps.core.serializers import ParkingLotListSerializer
+
+FEATURES = ['covered', 'security', 'ev_charging', 'disabled_access', 'lighting']
+
+
+def lots(count, seed=None):
+    """``count`` unsaved lots with varied prices, places and text"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    return [
+        ParkingLot(
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            title=f"Garage {index} – Straße {rng.randrange(1, 500)}",
+            description="Covered parking close to the station\nOpen all day",
+            address=f"{rng.randrange(1, 999)} Main Street, Springfield",
+            latitude=Decimal(rng.uniform(-60, 60)).quantize(Decimal('0.00000001')),
+            longitude=Decimal(rng.uniform(-180, 180)).quantize(Decimal('0.00000001')),
+            spot_type=rng.choice(ParkingLotTypes.values),
+            price_per_hour=Decimal(rng.randrange(50, 5000)) / 100,
+            available_spots=rng.randrange(0, 200),
+            availability=rng.choice(ParkingLotAvailability.values),
+            features=rng.sample(FEATURES, rng.randrange(0, len(FEATURES))),
+            created_at=now - timedelta(seconds=rng.randrange(10 ** 8), microseconds=rng.randrange(10 ** 6)),
+        )
+        for index in range(count)
+    ]
+
+
+def payloads(count, seed=None):
+    """Response data of ``count`` lots: a search page as the view builds it,
+    and the model values (UUID, Decimal, datetime) as they come from the database"""
+    rng = random.Random(seed)
+    spots = lots(count, seed)
+    results = []
+    for spot in spots:
+        data = ParkingLotListSerializer(spot).data
+        data['distance'] = round(rng.uniform(0, 10), 2)
+        results.append(data)
+    fields = ['id', 'title', 'address', 'latitude', 'longitude', 'spot_type', 'price_per_hour',
+              'available_spots', 'features', 'created_at']
+    return {
+        'search': {'count': len(results), 'results': results},
+        'values': [{field: getattr(spot, field) for field in fields} for spot in spots],
+    }
+
+
+def best(function, repeat):
+    """Fastest of ``repeat`` calls, and the last result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSON renderer and parser with the orjson ones on payloads of parking lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lots', type=int, default=10000, help="Parking lots per payload")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per payload, the fastest counts")
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            from apps.common.renderers import ORJSONParser, ORJSONRenderer
+        except ImportError:
+            raise CommandError("bench_json_rendering needs orjson (the fast-json extra)")
+
+        repeat = options['repeat']
+        different = False
+        for name, data in payloads(options['lots'], options['seed']).items():
+            stdlib_render, expected = best(lambda: JSONRenderer().render(data), repeat)
+            orjson_render, rendered = best(lambda: ORJSONRenderer().render(data), repeat)
+            stdlib_parse, parsed = best(lambda: JSONParser().parse(io.BytesIO(expected)), repeat)
+            orjson_parse, reparsed = best(lambda: ORJSONParser().parse(io.BytesIO(expected)), repeat)
+
+            self.stdout.write(f"{name} ({len(expected) / 1e6:.1f} MB)")
+            self.stdout.write(
+                f"  render  stdlib {stdlib_render * 1000:8.1f} ms   orjson {orjson_render * 1000:8.1f} ms   "
+                f"x{stdlib_render / orjson_render:.1f}"
+            )
+            self.stdout.write(
+                f"  parse   stdlib {stdlib_parse * 1000:8.1f} ms   orjson {orjson_parse * 1000:8.1f} ms   "
+                f"x{stdlib_parse / orjson_parse:.1f}"
+            )
+            if rendered != expected or reparsed != parsed:
+                different = True
+                self.stdout.write(self.style.WARNING(f"  orjson output differs from DRF's on {name}"))
+
+        if not different:
+            self.stdout.write(self.style.SUCCESS("orjson output identical to DRF's"))
@@ -0,0 +1,80 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from apps.core import pricing
+from apps.core.models import ParkingLot, RateRule
+
+User = get_user_model()
+
+
+def evaluate_rules(spot, rules, start_time, end_time):
+    """Per-quote rule evaluation, hour by hour, as the baseline"""
+    total = Decimal(0)
+    moment = start_time
+    while moment < end_time:
+        local = timezone.localtime(moment)
+        step = min(end_time, moment + timedelta(minutes=60 - local.minute, seconds=-local.second)) - moment
+        multiplier = Decimal(1)
+        for rule in sorted(rules, key=lambda rule: rule.priority):
+            if rule.weekday in (None, local.weekday()) and rule.start_hour <= local.hour < rule.end_hour:
+                multiplier = rule.multiplier
+        total += spot.price_per_hour * multiplier * Decimal(step.total_seconds()) / 3600
+        moment += step
+    return total.quantize(pricing.CENT, ROUND_HALF_UP)
+
+
+class Command(BaseCommand):
+    help = "Measure quotes per second from the compiled price grid (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Quotes priced by each path")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f'bench-{uuid.uuid4().hex}@example.com', username=f'bench-{uuid.uuid4().hex}',
+                first_name='Bench', last_name='Mark', password=None
+            )
+            spot = ParkingLot.objects.create(
+                owner=user, title='Benchmark garage', address='Benchmark',
+                latitude=Decimal('40.7128'), longitude=Decimal('-74.0060'),
+                price_per_hour=Decimal('10.00'), available_spots=100, availability='24_7'
+            )
+            rules = RateRule.objects.bulk_create([
+                RateRule(spot=spot, start_hour=7, end_hour=10, multiplier=Decimal('1.50')),
+                RateRule(spot=spot, start_hour=16, end_hour=19, multiplier=Decimal('1.75')),
+                RateRule(spot=spot, start_hour=0, end_hour=6, multiplier=Decimal('0.50')),
+                *[RateRule(spot=spot, weekday=day, start_hour=0, end_hour=24, multiplier=Decimal('0.80'), priority=1)
+                  for day in (5, 6)],
+            ])
+
+            origin = timezone.now().replace(minute=0, second=0, microsecond=0)
+            windows = []
+            for _ in range(count):
+                start = origin + timedelta(minutes=random.randrange(0, 14 * 24 * 60, 15))
+                windows.append((start, start + timedelta(minutes=random.randrange(15, 12 * 60, 15))))
+
+            started = time.perf_counter()
+            baseline = [evaluate_rules(spot, rules, start, end) for start, end in windows]
+            evaluated = time.perf_counter() - started
+
+            pricing.invalidate([spot.pk])
+            started = time.perf_counter()
+            quotes = [pricing.quote(spot, start, end) for start, end in windows]
+            compiled = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        mismatches = sum(1 for expected, quoted in zip(baseline, quotes) if expected != quoted)
+        self.stdout.write(f"rule evaluation: {count / evaluated:,.0f} quotes/s")
+        self.stdout.write(f"price grid:      {count / compiled:,.0f} quotes/s (including one compile)")
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"{mismatches} quotes differ from rule evaluation"))
+        self.stdout.write(self.style.SUCCESS(f"speedup x{evaluated / compiled:.1f}"))
@@ -0,0 +1,49 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.core import loadtest
+
+
+class Command(BaseCommand):
+    help = "Run request scenarios against the database and report latency percentiles and queries per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios', choices=list(loadtest.SCENARIOS),
+            help="Scenario to run (repeatable, all by default)"
+        )
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per scenario")
+        parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests run first")
+        parser.add_argument('--seed', type=int, help="Random seed, for the same requests on every run")
+        parser.add_argument('--label', default='', help="Recorded in the report, e.g. the version under test")
+        parser.add_argument('--output', help="Write the JSON report to this file")
+        parser.add_argument('--baseline', help="JSON report of an earlier run to compare with")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative p95 increase over the baseline")
+
+    def handle(self, *args, **options):
+        report = loadtest.run(
+            options['scenarios'] or list(loadtest.SCENARIOS),
+            requests=options['requests'],
+            warmup=options['warmup'],
+            seed=options['seed'],
+            label=options['label'],
+        )
+
+        self.stdout.write(f"{'scenario':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>9}{'errors':>8}")
+        for name, summary in report['scenarios'].items():
+            self.stdout.write(
+                f"{name:<16}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+                f"{summary['requests_per_second']:>10.1f}{summary['queries_mean']:>9.1f}{summary['errors']:>8}"
+            )
+        for name in report['skipped']:
+            self.stdout.write(self.style.WARNING(f"{name}: skipped, nothing to draw requests from"))
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                regressions = loadtest.compare(report, json.load(file), options['tolerance'])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
@@ -0,0 +1,47 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.core import serving
+
+
+class Command(BaseCommand):
+    help = "Serve with gunicorn in WSGI and ASGI mode in turn and compare throughput and latency under a mixed load"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=serving.MODES,
+                            help="Serving mode to measure (repeatable, both by default)")
+        parser.add_argument('--mix', help="Weighted scenarios, e.g. nearby=4,search=2,booking_create=1")
+        parser.add_argument('--concurrency', type=int, default=32, help="Client threads, each with one connection")
+        parser.add_argument('--duration', type=float, default=30, help="Measured seconds per mode")
+        parser.add_argument('--warmup', type=float, default=5, help="Unmeasured seconds first")
+        parser.add_argument('--workers', type=int, default=4, help="Gunicorn worker processes")
+        parser.add_argument('--seed', type=int, help="Random seed for the sample of lots and bookings")
+        parser.add_argument('--label', default='', help="Recorded in the report, e.g. the version under test")
+        parser.add_argument('--output', help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        try:
+            mix = serving.parse_mix(options['mix']) if options['mix'] else None
+            report = serving.run(
+                options['modes'] or serving.MODES,
+                mix=mix,
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                warmup=options['warmup'],
+                workers=options['workers'],
+                seed=options['seed'],
+                label=options['label'],
+            )
+        except (ValueError, RuntimeError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f"{'mode':<6}{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>9}{'errors':>8}")
+        for mode, result in report['modes'].items():
+            for name, summary in [('all', result['overall']), *result['scenarios'].items()]:
+                self.stdout.write(
+                    f"{mode:<6}{name:<16}{summary['requests_per_second']:>10.1f}{summary['p50_ms']:>10.2f}"
+                    f"{summary['p99_ms']:>10.2f}{summary['queries_mean']:>9.1f}{summary['errors']:>8}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
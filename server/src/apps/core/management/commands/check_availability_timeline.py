@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.core import timeline
+
+
+class Command(BaseCommand):
+    help = "Check the availability timeline of parking lots against their bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spot', action='append', dest='spots', help="Only check this lot (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Lots checked per transaction")
+        parser.add_argument('--repair', action='store_true', help="Rebuild the lots that are inconsistent")
+
+    def handle(self, *args, **options):
+        inconsistent = set()
+        for spot_id, start, stored, expected in timeline.check(options['spots'], chunk_size=options['chunk_size']):
+            inconsistent.add(spot_id)
+            self.stdout.write(f"{spot_id} {start.isoformat()}: stored={stored} expected={expected}")
+
+        if not inconsistent:
+            self.stdout.write(self.style.SUCCESS("Availability timeline is consistent"))
+            return
+
+        if options['repair']:
+            timeline.rebuild(inconsistent, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(inconsistent)} inconsistent lots"))
+            return
+
+        raise CommandError(f"{len(inconsistent)} lots have an inconsistent availability timeline")
@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.common import metrics
+from apps.core.services import expire_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire unpaid pending bookings and complete active bookings past their end time. "
+        "Set METRICS_DIR to the web workers' directory for /metrics to show each pass."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows moved per statement")
+        parser.add_argument('--loop', action='store_true', help="Keep running a pass every --interval seconds")
+        parser.add_argument('--interval', type=float, default=60, help="Seconds between passes in --loop mode")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            moved = expire_bookings(batch_size=options['batch_size'])
+            elapsed = time.monotonic() - started
+            # Sleeps between passes, so the time-based flush would lag a pass
+            metrics.flush()
+            summary = ' '.join(f"{name}={count}" for name, count in moved.items())
+            self.stdout.write(f"{summary} elapsed={elapsed:.3f}s")
+
+            if not options['loop']:
+                return
+            try:
+                time.sleep(max(0, options['interval'] - elapsed))
+            except KeyboardInterrupt:
+                return
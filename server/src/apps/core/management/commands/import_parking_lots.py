@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.importers import FORMATS, WRITERS, detect_format, import_parking_lots
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import parking lots from a CSV, GeoJSON or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import")
+        parser.add_argument('--owner', required=True, help="Email of the user owning the imported lots")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--method', choices=list(WRITERS), default='copy', help="How batches are written")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows validated and written together")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}")
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = import_parking_lots(
+                stream,
+                options['format'] or detect_format(options['path']),
+                owner,
+                method=options['method'],
+                batch_size=options['batch_size'],
+            )
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... {result.failed - len(result.errors)} more errors")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} of {result.rows} rows in {result.elapsed:.2f}s "
+            f"({result.rows_per_second:,.0f} rows/s)"
+        ))
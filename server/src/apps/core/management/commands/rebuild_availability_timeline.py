@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.core import timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild the availability timeline of parking lots from their bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spot', action='append', dest='spots', help="Only rebuild this lot (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=200, help="Lots rebuilt per transaction")
+
+    def handle(self, *args, **options):
+        rebuilt = timeline.rebuild(options['spots'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the availability timeline of {rebuilt} lots"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from apps.core.seeding import PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = "Load a synthetic dataset of users, parking lots and bookings with COPY"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help="Users, owning the lots and making the bookings")
+        parser.add_argument('--lots', type=int, default=1000000, help="Parking lots")
+        parser.add_argument('--bookings', type=int, default=10000000, help="Bookings, spread evenly over the lots")
+        parser.add_argument('--days-back', type=int, default=180, help="Days of booking history before now")
+        parser.add_argument('--days-ahead', type=int, default=14, help="Days of future bookings after now")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Lots (with their bookings) per COPY")
+        parser.add_argument('--seed', type=int, help="Random seed, for a reproducible dataset")
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(
+                f"lots={result.lots} bookings={result.bookings} elapsed={result.elapsed:.1f}s "
+                f"({(result.lots + result.bookings) / result.elapsed:,.0f} rows/s)"
+            )
+
+        result = seed(
+            options['users'], options['lots'], options['bookings'],
+            batch_size=options['batch_size'],
+            days_back=options['days_back'],
+            days_ahead=options['days_ahead'],
+            seed=options['seed'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {result.users} users, {result.lots} lots and {result.bookings} bookings "
+            f"in {result.elapsed:.1f}s; users are bench-{result.tag}-<n>@example.com, password '{PASSWORD}'"
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("remaining", models.IntegerField()),
+                (
+                    "spot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability_buckets",
+                        to="core.parkinglot",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "availability_bucket",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("spot", "start"),
+                        name="availability_bucket_spot_start_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Keeps parking_lot.location and latitude/longitude in step for every write,
+# including bulk_create, bulk_update, QuerySet.update and COPY, none of which
+# go through ParkingLot.save(). The point is only rebuilt when a coordinate
+# actually changes; changed coordinates win over a changed location.
+SYNC_LOCATION_SQL = """
+CREATE OR REPLACE FUNCTION parking_lot_sync_location() RETURNS trigger AS $$
+BEGIN
+    IF NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL AND (
+        TG_OP = 'INSERT'
+        OR NEW.location IS NULL
+        OR NEW.latitude IS DISTINCT FROM OLD.latitude
+        OR NEW.longitude IS DISTINCT FROM OLD.longitude
+    ) THEN
+        NEW.location := ST_SetSRID(ST_MakePoint(NEW.longitude, NEW.latitude), 4326);
+    ELSIF NEW.location IS NOT NULL AND (
+        NEW.latitude IS NULL
+        OR NEW.longitude IS NULL
+        OR NEW.location IS DISTINCT FROM OLD.location
+    ) THEN
+        NEW.latitude := ROUND(ST_Y(NEW.location)::numeric, 8);
+        NEW.longitude := ROUND(ST_X(NEW.location)::numeric, 8);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER parking_lot_sync_location
+    BEFORE INSERT OR UPDATE OF latitude, longitude, location ON parking_lot
+    FOR EACH ROW EXECUTE FUNCTION parking_lot_sync_location();
+"""
+
+DROP_SYNC_LOCATION_SQL = """
+DROP TRIGGER IF EXISTS parking_lot_sync_location ON parking_lot;
+DROP FUNCTION IF EXISTS parking_lot_sync_location();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_booking_expiry_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(SYNC_LOCATION_SQL, DROP_SYNC_LOCATION_SQL),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:29
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_parking_lot_location_trigger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        choices=[
+                            (0, "Monday"),
+                            (1, "Tuesday"),
+                            (2, "Wednesday"),
+                            (3, "Thursday"),
+                            (4, "Friday"),
+                            (5, "Saturday"),
+                            (6, "Sunday"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                (
+                    "start_hour",
+                    models.PositiveSmallIntegerField(
+                        validators=[django.core.validators.MaxValueValidator(23)]
+                    ),
+                ),
+                (
+                    "end_hour",
+                    models.PositiveSmallIntegerField(
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(24),
+                        ]
+                    ),
+                ),
+                (
+                    "multiplier",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=5,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                ("priority", models.IntegerField(default=0)),
+                (
+                    "spot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rate_rules",
+                        to="core.parkinglot",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "rate_rule",
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            ("end_hour__lte", 24),
+                            ("start_hour__lt", models.F("end_hour")),
+                        ),
+                        name="rate_rule_hours_valid",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:31
+
+import django.contrib.gis.db.models.functions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_raterule"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DemandCell",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("cell", models.CharField(max_length=12)),
+                ("bookings", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "occupied_hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+            options={
+                "db_table": "demand_cell",
+            },
+        ),
+        migrations.CreateModel(
+            name="Watermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("value", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "watermark",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["updated_at"], name="booking_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="parkinglot",
+            index=models.Index(
+                django.contrib.gis.db.models.functions.GeoHash("location", precision=6),
+                name="parking_lot_geohash_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="demandcell",
+            constraint=models.UniqueConstraint(
+                fields=("hour", "cell"), name="demand_cell_hour_cell_uniq"
+            ),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.contrib.gis.db import models as gis_models
+from django.contrib.gis.db.models.functions import GeoHash
 from django.contrib.gis.geos import Point
 from django.db import models
 from apps.common.models import BaseModel
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
 import uuid
 from django.contrib.auth import get_user_model
 
@@ -19,6 +20,10 @@ class BookingStatus(models.TextChoices):
     EXPIRED = 'expired', 'Expired'
 
 
+# Statuses that hold one of a lot's spaces for the booked interval
+OCCUPYING_STATUSES = [BookingStatus.CONFIRMED, BookingStatus.ACTIVE]
+
+
 class ParkingLotTypes(models.TextChoices):
     GARAGE = 'garage', 'Parking Garage'
     LOT = 'lot', 'Parking Lot'
@@ -58,17 +63,42 @@ class ParkingLot(BaseModel):
         indexes = [
             # PostGIS automatically creates spatial indexes, but we can be explicit
             gis_models.Index(fields=['location']),
+            # Demand cells join lots on their geohash, see apps.core.demand
+            models.Index(GeoHash('location', precision=6), name='parking_lot_geohash_idx'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_coordinates = instance._coordinates()
+        return instance
+
+    def _coordinates(self):
+        # Read from __dict__ so deferred coordinates are not fetched
+        return self.__dict__.get('latitude'), self.__dict__.get('longitude')
+
     def save(self, *args, **kwargs):
-        if self.latitude and self.longitude:
-            self.location = Point(float(self.longitude), float(self.latitude))
+        # The database trigger keeps location in sync on every write; this only
+        # keeps the instance itself consistent, and only when coordinates moved
+        coordinates = self._coordinates()
+        if None not in coordinates and coordinates != getattr(self, '_loaded_coordinates', None):
+            self.location = Point(float(coordinates[1]), float(coordinates[0]), srid=4326)
         # Extract lat/lng from Point if location is set but lat/lng are None
-        elif self.location and not (self.latitude and self.longitude):
+        elif self.__dict__.get('location') and None in coordinates:
             self.longitude = self.location.x
             self.latitude = self.location.y
-        
+
         super().save(*args, **kwargs)
+        self._loaded_coordinates = self._coordinates()
+
+    @property
+    def capacity(self):
+        """Number of bookings the lot can hold at the same time.
+
+        Lots listed before capacity was tracked have ``available_spots=0``;
+        they keep behaving as a single bookable space.
+        """
+        return max(self.available_spots, 1)
 
     def __str__(self):
         return f"{self.title} - {self.address}"
@@ -92,6 +122,11 @@ class Booking(BaseModel):
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['spot', 'start_time', 'end_time']),
+            # Partial indexes for the expiry worker, they shrink as bookings move on
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'), name='booking_pending_created_idx'),
+            models.Index(fields=['end_time'], condition=models.Q(status='active'), name='booking_active_end_idx'),
+            # Incremental rollups pick up changed bookings by this column
+            models.Index(fields=['updated_at'], name='booking_updated_idx'),
         ]
 
     def save(self, *args, **kwargs):
@@ -99,9 +134,134 @@ class Booking(BaseModel):
             self.booking_id = self.generate_booking_id()
         super().save(*args, **kwargs)
 
-    def generate_booking_id(self):
+    @staticmethod
+    def generate_booking_id():
         import random
         return f"BK{random.randint(100, 999)}-{random.randint(10000, 99999)}"
 
+    @classmethod
+    def generate_booking_ids(cls, count):
+        """``count`` distinct booking ids, checked against existing ones in one query per round"""
+        booking_ids = set()
+        while len(booking_ids) < count:
+            candidates = {cls.generate_booking_id() for _ in range(count - len(booking_ids))} - booking_ids
+            taken = cls.objects.filter(booking_id__in=candidates).values_list('booking_id', flat=True)
+            booking_ids |= candidates.difference(taken)
+        return list(booking_ids)
+
+    def __str__(self):
+        return f"Booking {self.booking_id} - {self.user.email}"
+
+class AvailabilityBucket(models.Model):
+    """Remaining capacity of a lot during one fixed-size bucket of its timeline"""
+    spot = models.ForeignKey(ParkingLot, on_delete=models.CASCADE, related_name='availability_buckets')
+    start = models.DateTimeField()
+    remaining = models.IntegerField()
+
+    class Meta:
+        db_table = 'availability_bucket'
+        constraints = [
+            models.UniqueConstraint(fields=['spot', 'start'], name='availability_bucket_spot_start_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.spot_id} @ {self.start}: {self.remaining}"
+
+
+class Weekday(models.IntegerChoices):
+    MONDAY = 0, 'Monday'
+    TUESDAY = 1, 'Tuesday'
+    WEDNESDAY = 2, 'Wednesday'
+    THURSDAY = 3, 'Thursday'
+    FRIDAY = 4, 'Friday'
+    SATURDAY = 5, 'Saturday'
+    SUNDAY = 6, 'Sunday'
+
+
+class RateRule(BaseModel):
+    """Multiplier applied to a lot's hourly price during some hours of the week.
+
+    A rule without ``weekday`` applies every day. Where rules overlap the one
+    with the highest ``priority`` wins.
+    """
+    spot = models.ForeignKey(ParkingLot, on_delete=models.CASCADE, related_name='rate_rules')
+    weekday = models.PositiveSmallIntegerField(choices=Weekday.choices, null=True, blank=True)
+    start_hour = models.PositiveSmallIntegerField(validators=[MaxValueValidator(23)])
+    end_hour = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(24)])
+    multiplier = models.DecimalField(max_digits=5, decimal_places=2, validators=[MinValueValidator(0)])
+    priority = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'rate_rule'
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(start_hour__lt=models.F('end_hour'), end_hour__lte=24),
+                name='rate_rule_hours_valid'
+            ),
+        ]
+
+    def __str__(self):
+        day = self.get_weekday_display() if self.weekday is not None else 'Every day'
+        return f"{self.spot_id} {day} {self.start_hour}-{self.end_hour}h x{self.multiplier}"
+
+
+class DemandCell(models.Model):
+    """Bookings, revenue and occupancy of one geohash cell during one hour.
+
+    ``bookings`` and ``revenue`` count bookings starting in the hour,
+    ``occupied_hours`` sums the part of every booking that falls in it.
+    """
+    hour = models.DateTimeField()
+    cell = models.CharField(max_length=12)
+    bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    occupied_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'demand_cell'
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'cell'], name='demand_cell_hour_cell_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.cell} @ {self.hour}: {self.bookings}"
+
+
+class LotDailyStats(models.Model):
+    """Bookings, cancellations, revenue and occupancy of one lot on one day.
+
+    Bookings, cancellations and revenue count on the day a booking starts,
+    ``occupied_hours`` on every day it covers. Kept by ``apps.core.rollups``.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='lot_daily_stats')
+    spot = models.ForeignKey(ParkingLot, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    bookings = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    occupied_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'lot_daily_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['spot', 'day'], name='lot_daily_stats_spot_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.spot_id} @ {self.day}: {self.bookings}"
+
+
+class Watermark(models.Model):
+    """Position up to which an incremental job has processed its source rows"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'watermark'
+
     def __str__(self):
-        return f"Booking {self.booking_id} - {self.user.email}"
\ No newline at end of file
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,114 @@
+"""
+Time-of-day and weekday pricing
+
+The ``RateRule`` rows of a lot are compiled once into a weekly grid of 168
+hourly prices in cents, with prefix sums, and kept in process memory. Pricing
+an interval is then a couple of grid lookups, no rule is evaluated per quote.
+
+Grids are dropped when a lot or its rules change in this process, and are
+recompiled after ``PRICE_GRID_TTL_SECONDS`` anyway so changes made by other
+processes are picked up. Demand-based prices are applied by jobs writing
+``price_per_hour`` or rules, which invalidates the grids like any other change.
+"""
+import time
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import accumulate
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.core.models import ParkingLot, RateRule
+from apps.core.signals import parking_lots_updated
+
+HOURS_PER_WEEK = 7 * 24
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_WEEK = HOURS_PER_WEEK * SECONDS_PER_HOUR
+CENT = Decimal('0.01')
+# A Monday, so offsets from it fall on the grid's weekday order. Grids are in
+# wall-clock time of settings.TIME_ZONE.
+EPOCH = datetime(2024, 1, 1)
+
+_grids = {}
+
+
+class PriceGrid:
+    """Hourly prices of one lot over a week, Monday 00:00 first"""
+    __slots__ = ('cents', 'prefix', 'week_total')
+
+    def __init__(self, cents):
+        self.cents = cents
+        self.prefix = [0, *accumulate(cents)]
+        self.week_total = self.prefix[-1]
+
+    def _cumulative(self, moment):
+        """Price in cent-seconds from ``EPOCH`` to ``moment``"""
+        seconds = int((timezone.localtime(moment).replace(tzinfo=None) - EPOCH).total_seconds())
+        weeks, offset = divmod(seconds, SECONDS_PER_WEEK)
+        hour, second = divmod(offset, SECONDS_PER_HOUR)
+        return (weeks * self.week_total + self.prefix[hour]) * SECONDS_PER_HOUR + self.cents[hour] * second
+
+    def quote(self, start_time, end_time):
+        """Price of ``[start_time, end_time)``, partial hours charged pro rata"""
+        cent_seconds = self._cumulative(end_time) - self._cumulative(start_time)
+        return (Decimal(cent_seconds) / (100 * SECONDS_PER_HOUR)).quantize(CENT, ROUND_HALF_UP)
+
+
+def compile_grid(price_per_hour, rules):
+    """Build the grid of a lot from its base price and its rules"""
+    base = Decimal(price_per_hour) * 100
+    cents = [int(base.quantize(1, ROUND_HALF_UP))] * HOURS_PER_WEEK
+    for rule in sorted(rules, key=lambda rule: rule.priority):
+        price = int((base * rule.multiplier).quantize(1, ROUND_HALF_UP))
+        days = range(7) if rule.weekday is None else [rule.weekday]
+        for day in days:
+            for hour in range(rule.start_hour, rule.end_hour):
+                cents[day * 24 + hour] = price
+    return PriceGrid(cents)
+
+
+def price_grid(spot):
+    """Compiled grid of ``spot``, from the cache when still fresh"""
+    now = time.monotonic()
+    entry = _grids.get(spot.pk)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    grid = compile_grid(spot.price_per_hour, RateRule.objects.filter(spot_id=spot.pk, is_active=True))
+    _grids.pop(spot.pk, None)
+    while len(_grids) >= settings.PRICE_GRID_CACHE_SIZE:
+        # Oldest compiled first
+        _grids.pop(next(iter(_grids)), None)
+    _grids[spot.pk] = (now + settings.PRICE_GRID_TTL_SECONDS, grid)
+    return grid
+
+
+def quote(spot, start_time, end_time):
+    """Total price of booking ``spot`` for ``[start_time, end_time)``"""
+    return price_grid(spot).quote(start_time, end_time)
+
+
+def invalidate(spot_ids=None):
+    """Forget the grids of ``spot_ids``, or every grid"""
+    if spot_ids is None:
+        _grids.clear()
+        return
+    for spot_id in spot_ids:
+        _grids.pop(spot_id, None)
+
+
+@receiver(parking_lots_updated)
+def _lots_updated(sender, spot_ids, **kwargs):
+    invalidate(spot_ids)
+
+
+@receiver(post_save, sender=ParkingLot)
+@receiver(post_delete, sender=ParkingLot)
+def _lot_changed(sender, instance, **kwargs):
+    invalidate([instance.pk])
+
+
+@receiver(post_save, sender=RateRule)
+@receiver(post_delete, sender=RateRule)
+def _rule_changed(sender, instance, **kwargs):
+    invalidate([instance.spot_id])
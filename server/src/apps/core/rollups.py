@@ -0,0 +1,142 @@
+"""
+Incremental rollups over bookings
+
+Each rollup keeps a ``Watermark`` on ``booking.updated_at`` and, for every
+slice of changed bookings, recomputes the keys those bookings touch from all
+the bookings behind each key. Rollups therefore never diff a booking against
+its previous version; this relies on bookings only moving forward in time
+(an extension pushes the end, nothing moves the start), so the keys of a
+booking's current interval cover those of its earlier versions.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+from apps.core.models import Booking, BookingStatus, LotDailyStats, Watermark
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Bookings that turned into real demand
+DEMAND_STATUSES = [BookingStatus.CONFIRMED, BookingStatus.ACTIVE, BookingStatus.COMPLETED]
+
+
+def refresh(name, refresh_window, until=None, window=timedelta(hours=6)):
+    """Bring rollup ``name`` up to ``until`` (now minus ``ROLLUP_LAG_SECONDS``).
+
+    ``refresh_window(since, until)`` recomputes the keys of the bookings
+    changed in ``(since, until]`` and returns how many it wrote. Changes are
+    processed in ``window``-sized slices of ``updated_at``, each in its own
+    transaction together with the watermark, and quiet periods are skipped.
+    Returns ``(slices, rows)``: slices processed and rows written.
+    """
+    until = until or timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    slices = rows = 0
+    while True:
+        with transaction.atomic():
+            Watermark.objects.get_or_create(name=name, defaults={'value': EPOCH})
+            # Locked so two runs never process the same slice
+            watermark = Watermark.objects.select_for_update().get(name=name)
+            if watermark.value >= until:
+                return slices, rows
+
+            first_change = Booking.objects.filter(
+                updated_at__gt=watermark.value, updated_at__lte=until
+            ).aggregate(first=Min('updated_at'))['first']
+            if first_change is None:
+                watermark.value = until
+            else:
+                watermark.value = min(first_change + window, until)
+                rows += refresh_window(first_change - timedelta(microseconds=1), watermark.value)
+                slices += 1
+            watermark.save(update_fields=['value', 'updated_at'])
+
+
+def reset(name, model):
+    """Drop rollup ``name`` so the next refresh recomputes it from every booking"""
+    with transaction.atomic():
+        model.objects.all().delete()
+        Watermark.objects.filter(name=name).delete()
+
+
+LOT_STATS_WATERMARK = 'lot_daily_stats'
+
+# Days are calendar days of settings.TIME_ZONE. Bookings and revenue count on
+# the day a booking starts, occupied hours on every day it covers.
+LOT_STATS_SQL = """
+WITH changed AS (
+    SELECT DISTINCT
+        booking.spot_id,
+        generate_series(
+            (booking.start_time AT TIME ZONE %(tz)s)::date,
+            ((booking.end_time - interval '1 microsecond') AT TIME ZONE %(tz)s)::date,
+            interval '1 day'
+        )::date AS day
+    FROM booking
+    WHERE booking.updated_at > %(since)s AND booking.updated_at <= %(until)s
+),
+days AS (
+    SELECT
+        spot_id,
+        day,
+        day::timestamp AT TIME ZONE %(tz)s AS day_start,
+        (day + 1)::timestamp AT TIME ZONE %(tz)s AS day_end
+    FROM changed
+),
+facts AS (
+    SELECT
+        parking_lot.owner_id,
+        days.spot_id,
+        days.day,
+        COUNT(booking.id) FILTER (
+            WHERE booking.status = ANY(%(statuses)s) AND booking.start_time >= days.day_start
+        ) AS bookings,
+        COUNT(booking.id) FILTER (
+            WHERE booking.status = %(cancelled)s AND booking.start_time >= days.day_start
+        ) AS cancelled,
+        COALESCE(SUM(booking.total_price) FILTER (
+            WHERE booking.status = ANY(%(statuses)s) AND booking.start_time >= days.day_start
+        ), 0) AS revenue,
+        COALESCE(SUM(EXTRACT(EPOCH FROM
+            LEAST(booking.end_time, days.day_end) - GREATEST(booking.start_time, days.day_start)
+        )) FILTER (WHERE booking.status = ANY(%(statuses)s)) / 3600, 0) AS occupied_hours
+    FROM days
+    JOIN parking_lot ON parking_lot.id = days.spot_id
+    LEFT JOIN booking ON booking.spot_id = days.spot_id
+        AND booking.start_time < days.day_end
+        AND booking.end_time > days.day_start
+    GROUP BY parking_lot.owner_id, days.spot_id, days.day
+)
+INSERT INTO lot_daily_stats (owner_id, spot_id, day, bookings, cancelled, revenue, occupied_hours)
+SELECT owner_id, spot_id, day, bookings, cancelled, revenue, occupied_hours FROM facts
+ON CONFLICT (spot_id, day) DO UPDATE SET
+    owner_id = EXCLUDED.owner_id,
+    bookings = EXCLUDED.bookings,
+    cancelled = EXCLUDED.cancelled,
+    revenue = EXCLUDED.revenue,
+    occupied_hours = EXCLUDED.occupied_hours
+"""
+
+
+def refresh_lot_stats_window(since, until):
+    """Recompute the lot days touched by bookings changed in ``(since, until]``"""
+    with connection.cursor() as cursor:
+        cursor.execute(LOT_STATS_SQL, {
+            'since': since,
+            'until': until,
+            'tz': settings.TIME_ZONE,
+            'statuses': [str(status) for status in DEMAND_STATUSES],
+            'cancelled': str(BookingStatus.CANCELLED),
+        })
+        return cursor.rowcount
+
+
+def refresh_lot_stats(until=None):
+    """Roll bookings changed since the last run into the daily lot stats"""
+    return refresh(LOT_STATS_WATERMARK, refresh_lot_stats_window, until)
+
+
+def rebuild_lot_stats():
+    """Drop the daily lot stats and recompute them from every booking"""
+    reset(LOT_STATS_WATERMARK, LotDailyStats)
+    return refresh_lot_stats()
@@ -0,0 +1,173 @@
+"""
+Synthetic datasets for benchmarks
+
+Users, lots and bookings are generated in batches and written with COPY, one
+transaction per batch, so millions of rows load in minutes and an interrupted
+run keeps what it wrote. Lots are clustered around a few city centres and
+each lot's bookings are laid out one after the other over the seeded period,
+so no lot is ever booked beyond its capacity. Statuses follow the clock:
+bookings in the past are completed or cancelled, running ones are active and
+future ones confirmed or pending.
+
+The availability timeline and the rollups are not built; bookings of lots
+without buckets are checked against the bookings table, and
+``rebuild_availability_timeline``, ``aggregate_demand`` and
+``aggregate_lot_stats`` can be run afterwards when a benchmark needs them.
+"""
+import csv
+import io
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.common.db import copy_from
+from apps.core.importers import COPY_COLUMNS as LOT_COLUMNS
+from apps.core.models import Booking, BookingStatus, ParkingLot, ParkingLotAvailability, ParkingLotTypes
+
+User = get_user_model()
+
+PASSWORD = 'benchmark'
+
+# (latitude, longitude) of the cities lots are spread around
+CITIES = [
+    (40.7128, -74.0060), (34.0522, -118.2437), (41.8781, -87.6298), (29.7604, -95.3698),
+    (33.4484, -112.0740), (39.9526, -75.1652), (47.6062, -122.3321), (37.7749, -122.4194),
+    (25.7617, -80.1918), (42.3601, -71.0589), (39.7392, -104.9903), (38.9072, -77.0369),
+]
+
+USER_COLUMNS = [
+    'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email', 'is_staff',
+    'is_active', 'date_joined', 'is_verified', 'created_at', 'updated_at',
+]
+
+BOOKING_COLUMNS = [
+    'id', 'booking_id', 'user_id', 'spot_id', 'start_time', 'end_time', 'duration_hours', 'total_price',
+    'status', 'payment_intent_id', 'notes', 'is_active', 'created_at', 'updated_at',
+]
+
+FEATURES = ['covered', 'security', 'ev_charging', 'lighting', 'accessible']
+
+
+@dataclass
+class SeedResult:
+    tag: str
+    users: int = 0
+    lots: int = 0
+    bookings: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def _copy(table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        copy_from(cursor, f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _seed_users(result, count, batch_size):
+    password = make_password(PASSWORD)
+    now = timezone.now().isoformat()
+    for offset in range(0, count, batch_size):
+        rows = []
+        for index in range(offset, min(offset + batch_size, count)):
+            username = f'bench-{result.tag}-{index}'
+            rows.append([
+                password, False, username, 'Bench', f'User {index}', f'{username}@example.com', False,
+                True, now, True, now, now,
+            ])
+        with transaction.atomic():
+            _copy(User._meta.db_table, USER_COLUMNS, rows)
+        result.users += len(rows)
+    return list(
+        User.objects.filter(username__startswith=f'bench-{result.tag}-').order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def _lot_row(rng, owner_id, now):
+    latitude, longitude = rng.choice(CITIES)
+    return [
+        uuid.UUID(int=rng.getrandbits(128)), owner_id, f'Lot {rng.randrange(10 ** 6)}', '',
+        f'{rng.randrange(1, 9999)} Benchmark Street',
+        f'{latitude + rng.gauss(0, 0.15):.8f}', f'{longitude + rng.gauss(0, 0.15):.8f}',
+        rng.choice(ParkingLotTypes.values), Decimal(rng.randrange(200, 2500)) / 100,
+        rng.choice((1, 1, 2, 5, 10, 50)), rng.choice(ParkingLotAvailability.values),
+        json.dumps(rng.sample(FEATURES, rng.randrange(3))), '',
+        True, now, now,
+    ]
+
+
+def _booking_status(rng, start_time, end_time, now):
+    if end_time <= now:
+        return BookingStatus.CANCELLED if rng.random() < 0.1 else BookingStatus.COMPLETED
+    if start_time <= now:
+        return BookingStatus.ACTIVE
+    return BookingStatus.PENDING if rng.random() < 0.1 else BookingStatus.CONFIRMED
+
+
+def _booking_rows(rng, result, lot, count, user_ids, period, now):
+    """``count`` bookings of one lot, one after the other over ``period``"""
+    lot_id, price = lot[0], lot[8]
+    start, end = period
+    slot = (end - start) / count
+    for index in range(count):
+        # Slots shorter than a booking still never overlap their neighbours
+        duration = min(timedelta(hours=rng.randrange(1, 9)), slot)
+        start_time = start + index * slot + (slot - duration) * rng.random()
+        end_time = start_time + duration
+        hours = Decimal(duration.total_seconds() / 3600).quantize(Decimal('0.01'))
+        created_at = min(now, start_time - timedelta(hours=rng.randrange(1, 24 * 14)))
+        yield [
+            uuid.UUID(int=rng.getrandbits(128)), f'BM{result.tag}-{result.bookings + index:010d}',
+            rng.choice(user_ids), lot_id, start_time.isoformat(), end_time.isoformat(), hours,
+            (price * hours).quantize(Decimal('0.01')), _booking_status(rng, start_time, end_time, now), '', '',
+            True, created_at.isoformat(), created_at.isoformat(),
+        ]
+
+
+def seed(users, lots, bookings, batch_size=10000, days_back=180, days_ahead=14, seed=None, progress=None):
+    """Write ``users`` users, ``lots`` lots and ``bookings`` bookings.
+
+    Every seeded user is named ``bench-<tag>-<n>`` with the password
+    ``PASSWORD``. ``progress(result)`` is called after every batch.
+    """
+    rng = random.Random(seed)
+    result = SeedResult(tag=uuid.uuid4().hex[:6])
+    user_ids = _seed_users(result, users, batch_size)
+    if not user_ids:
+        return result
+
+    now = timezone.now()
+    period = (now - timedelta(days=days_back), now + timedelta(days=days_ahead))
+    per_lot, extra = divmod(bookings, lots) if lots else (0, 0)
+    for offset in range(0, lots, batch_size):
+        lot_rows, booking_rows = [], []
+        for index in range(offset, min(offset + batch_size, lots)):
+            lot = _lot_row(rng, rng.choice(user_ids), now.isoformat())
+            lot_rows.append(lot)
+            count = per_lot + (index < extra)
+            if count:
+                booking_rows.extend(_booking_rows(rng, result, lot, count, user_ids, period, now))
+                result.bookings += count
+        with transaction.atomic():
+            _copy(ParkingLot._meta.db_table, LOT_COLUMNS, lot_rows)
+            _copy(Booking._meta.db_table, BOOKING_COLUMNS, booking_rows)
+        result.lots += len(lot_rows)
+        if progress:
+            progress(result)
+
+    with connection.cursor() as cursor:
+        for model in (User, ParkingLot, Booking):
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+    return result
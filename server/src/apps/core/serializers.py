@@ -1,5 +1,13 @@
+from datetime import timedelta
+from decimal import Decimal
 from rest_framework import serializers
-from apps.core.models import ParkingLot, Booking
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from apps.common import metrics
+from apps.core import pricing, timeline
+from apps.core.models import ParkingLot, Booking, OCCUPYING_STATUSES
+from apps.core.services import has_capacity, lock_spot
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -34,7 +42,7 @@ class ParkingLotDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = ParkingLot
         fields = ['id', 'title', 'description', 'address', 'latitude', 'longitude',
-                 'spot_type', 'price_per_hour', 'availability',
+                 'spot_type', 'price_per_hour', 'available_spots', 'availability',
                  'features', 'instructions', 'owner_name',
                  'upcoming_bookings', 'created_at']
 
@@ -44,16 +52,27 @@ class ParkingLotDetailSerializer(serializers.ModelSerializer):
     #         return FavoriteSpot.objects.filter(user=request.user, spot=obj).exists()
     #     return False
 
-    def get_upcoming_bookings(self, obj):
-        from datetime import datetime, timedelta
-        now = datetime.now()
-        upcoming = Booking.objects.filter(
-            spot=obj,
-            status__in=['confirmed', 'active'],
+    @staticmethod
+    def upcoming_bookings():
+        now = timezone.now()
+        return Booking.objects.filter(
+            status__in=OCCUPYING_STATUSES,
             start_time__gte=now,
             start_time__lte=now + timedelta(days=7)
-        ).values('start_time', 'end_time')
-        return list(upcoming)
+        ).only('spot_id', 'start_time', 'end_time').order_by('start_time')
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load owners and upcoming bookings of a whole page in two queries"""
+        return queryset.select_related('owner').prefetch_related(
+            Prefetch('booking', queryset=cls.upcoming_bookings(), to_attr='upcoming')
+        )
+
+    def get_upcoming_bookings(self, obj):
+        upcoming = getattr(obj, 'upcoming', None)
+        if upcoming is None:
+            upcoming = self.upcoming_bookings().filter(spot=obj)
+        return [{'start_time': booking.start_time, 'end_time': booking.end_time} for booking in upcoming]
 
 class CreateParkingLotSerializer(serializers.ModelSerializer):
     # images = serializers.ListField(
@@ -65,8 +84,8 @@ class CreateParkingLotSerializer(serializers.ModelSerializer):
     class Meta:
         model = ParkingLot
         fields = ['title', 'description', 'address', 'latitude', 'longitude',
-                 'spot_type', 'price_per_hour', 'availability', 'features',
-                 'instructions',]
+                 'spot_type', 'price_per_hour', 'available_spots', 'availability',
+                 'features', 'instructions',]
 
     def create(self, validated_data):
         # images_data = validated_data.pop('images', [])
@@ -80,6 +99,101 @@ class CreateParkingLotSerializer(serializers.ModelSerializer):
         #     )
         # return spot
 
+class BulkParkingLotUpdateItemSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    price_per_hour = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    available_spots = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if 'price_per_hour' not in attrs and 'available_spots' not in attrs:
+            raise serializers.ValidationError("Provide price_per_hour and/or available_spots.")
+        return attrs
+
+class BulkParkingLotUpdateSerializer(serializers.Serializer):
+    lots = BulkParkingLotUpdateItemSerializer(many=True, allow_empty=False, max_length=5000)
+
+    def validate_lots(self, value):
+        if len({item['id'] for item in value}) != len(value):
+            raise serializers.ValidationError("Each lot can only appear once.")
+        return value
+
+class QuoteSerializer(serializers.Serializer):
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        return attrs
+
+class ExtendSessionSerializer(serializers.Serializer):
+    # What Booking.duration_hours (4 digits, 2 decimals) can hold
+    MAX_HOURS = Decimal('99.99')
+
+    hours = serializers.DecimalField(
+        max_digits=4, decimal_places=2, min_value=Decimal('0.01'), max_value=MAX_HOURS, default=Decimal(1),
+        help_text="Number of hours to extend; the whole session can last at most 99.99 hours",
+    )
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    MAX_LOTS = 100
+    MAX_DAYS = 31
+
+    ids = serializers.CharField(help_text="Comma-separated parking lot ids")
+    date = serializers.DateField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate_ids(self, value):
+        field = serializers.UUIDField()
+        ids = list(dict.fromkeys(field.run_validation(item.strip()) for item in value.split(',') if item.strip()))
+        if not ids:
+            raise serializers.ValidationError("Provide at least one parking lot id.")
+        if len(ids) > self.MAX_LOTS:
+            raise serializers.ValidationError(f"At most {self.MAX_LOTS} parking lots per request.")
+        return ids
+
+    def validate(self, attrs):
+        # ``date`` alone asks for a single day, today by default
+        day = attrs.pop('date', None) or timezone.localdate()
+        attrs.setdefault('start_date', day)
+        attrs.setdefault('end_date', attrs['start_date'])
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError("End date must not be before start date.")
+        if (attrs['end_date'] - attrs['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"The range can span at most {self.MAX_DAYS} days.")
+        return attrs
+
+class DemandHeatmapQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 92
+
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    precision = serializers.IntegerField(min_value=1, max_value=6, default=6)
+
+    def validate(self, attrs):
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        if (attrs['end_time'] - attrs['start_time']).days > self.MAX_DAYS:
+            raise serializers.ValidationError(f"The window can span at most {self.MAX_DAYS} days.")
+        return attrs
+
+class DashboardStatsQuerySerializer(serializers.Serializer):
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('end_date', timezone.localdate())
+        attrs.setdefault('start_date', attrs['end_date'] - timedelta(days=self.DEFAULT_DAYS - 1))
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError("End date must not be before start date.")
+        if (attrs['end_date'] - attrs['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"The range can span at most {self.MAX_DAYS} days.")
+        return attrs
+
 class BookingSerializer(serializers.ModelSerializer):
     spot_title = serializers.CharField(source='spot.title', read_only=True)
     spot_address = serializers.CharField(source='spot.address', read_only=True)
@@ -92,6 +206,10 @@ class BookingSerializer(serializers.ModelSerializer):
                  'notes', 'created_at', 'updated_at']
         read_only_fields = ['id', 'booking_id', 'created_at', 'updated_at']
 
+    def get_spot_image(self, obj):
+        # Lot images are not stored yet
+        return None
+
     # def get_spot_image(self, obj):
     #     primary_image = obj.spot.images.filter(is_primary=True).first()
     #     if primary_image:
@@ -108,25 +226,52 @@ class CreateBookingSerializer(serializers.ModelSerializer):
         start_time = attrs.get('start_time')
         end_time = attrs.get('end_time')
 
-        # Check for overlapping bookings
-        overlapping = Booking.objects.filter(
-            spot=spot,
-            status__in=['confirmed', 'active'],
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).exists()
+        if start_time >= end_time:
+            raise serializers.ValidationError("End time must be after start time.")
 
-        if overlapping:
+        # Count concurrent bookings against the lot capacity
+        if not has_capacity(spot, start_time, end_time):
+            metrics.inc('booking_conflicts_total', source='api')
             raise serializers.ValidationError("This time slot is already booked.")
 
-        # Calculate total price
-        duration_hours = attrs.get('duration_hours')
-        attrs['total_price'] = duration_hours * spot.price_per_hour
+        # Price the booked interval from the lot's rate grid
+        attrs['total_price'] = pricing.quote(spot, start_time, end_time)
 
         return attrs
 
     def create(self, validated_data):
-        return Booking.objects.create(user=self.context['request'].user, **validated_data)
+        with transaction.atomic():
+            # validate() ran without the lock, check again now that concurrent
+            # bookings and extensions of this lot have to wait for us
+            spot = lock_spot(validated_data['spot'].pk)
+            if not has_capacity(spot, validated_data['start_time'], validated_data['end_time']):
+                metrics.inc('booking_conflicts_total', source='api')
+                raise serializers.ValidationError("This time slot is already booked.")
+            booking = Booking.objects.create(user=self.context['request'].user, **validated_data)
+            if booking.status in OCCUPYING_STATUSES:
+                timeline.reserve(booking.spot_id, booking.start_time, booking.end_time)
+        metrics.inc('bookings_created_total', source='api')
+        return booking
+
+class BulkBookingItemSerializer(serializers.Serializer):
+    """One booking of a bulk request; capacity is checked for the whole batch at once"""
+    spot = serializers.UUIDField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    duration_hours = serializers.DecimalField(max_digits=4, decimal_places=2)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        return attrs
+
+class BulkCreateBookingSerializer(serializers.Serializer):
+    MODE_ATOMIC = 'atomic'
+    MODE_PARTIAL = 'partial'
+
+    mode = serializers.ChoiceField(choices=[MODE_ATOMIC, MODE_PARTIAL], default=MODE_ATOMIC)
+    bookings = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=500)
 
 # class ReviewSerializer(serializers.ModelSerializer):
 #     user_name = serializers.CharField(source='user.full_name', read_only=True)
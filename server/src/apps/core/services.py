@@ -0,0 +1,444 @@
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from apps.common import metrics
+from apps.core import pricing, timeline
+from apps.core.models import Booking, BookingStatus, LotDailyStats, ParkingLot, OCCUPYING_STATUSES
+from apps.core.signals import parking_lots_updated
+
+logger = logging.getLogger(__name__)
+
+
+# Sweep-line over the booking start/end events of each lot: every start adds
+# one occupied space, every end frees one. The running sum is the number of
+# concurrent bookings, and its maximum inside the window is the peak. Ends
+# sort before starts at the same instant because intervals are half-open.
+PEAK_OCCUPANCY_SQL = """
+WITH overlapping AS ({overlapping}),
+events AS (
+    SELECT spot_id, GREATEST(start_time, %s) AS ts, 1 AS delta FROM overlapping
+    UNION ALL
+    SELECT spot_id, LEAST(end_time, %s) AS ts, -1 AS delta FROM overlapping
+),
+sweep AS (
+    SELECT spot_id, SUM(delta) OVER (
+        PARTITION BY spot_id ORDER BY ts, delta ROWS UNBOUNDED PRECEDING
+    ) AS occupied
+    FROM events
+)
+"""
+
+
+def lock_spot(spot_id):
+    """Lock the lot row for the current transaction.
+
+    Every write that changes how many spaces a lot holds goes through this
+    lock, so capacity checks and timeline updates on a lot are serialized.
+    """
+    return ParkingLot.objects.select_for_update().get(pk=spot_id)
+
+
+def overlapping_bookings(start_time, end_time, spot_ids=None, exclude=None):
+    """Bookings holding a space at some point of ``[start_time, end_time)``"""
+    queryset = Booking.objects.filter(
+        status__in=OCCUPYING_STATUSES,
+        start_time__lt=end_time,
+        end_time__gt=start_time
+    )
+    if spot_ids is not None:
+        queryset = queryset.filter(spot_id__in=spot_ids)
+    if exclude is not None:
+        queryset = queryset.exclude(pk=exclude)
+    return queryset
+
+
+def _sweep(select, start_time, end_time, spot_ids=None, exclude=None):
+    overlapping = overlapping_bookings(start_time, end_time, spot_ids, exclude)
+    sql, params = overlapping.values_list('spot_id', 'start_time', 'end_time').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            PEAK_OCCUPANCY_SQL.format(overlapping=sql) + select,
+            [*params, start_time, end_time]
+        )
+        return cursor.fetchall()
+
+
+def peak_occupancy(spot_ids, start_time, end_time, exclude=None):
+    """Maximum number of concurrent bookings per lot inside the window.
+
+    Lots without overlapping bookings are left out of the result.
+    """
+    rows = _sweep(
+        'SELECT spot_id, MAX(occupied) FROM sweep GROUP BY spot_id',
+        start_time, end_time, spot_ids, exclude
+    )
+    return dict(rows)
+
+
+def has_capacity(spot, start_time, end_time, exclude=None, count=1):
+    """Whether ``count`` more bookings fit in ``spot`` for the whole window"""
+    peak = peak_occupancy([spot.pk], start_time, end_time, exclude).get(spot.pk, 0)
+    return peak + count <= spot.capacity
+
+
+def peak_concurrency(intervals, start_time, end_time):
+    """Python counterpart of the SQL sweep, for intervals already in memory"""
+    events = []
+    for interval_start, interval_end in intervals:
+        if interval_start < end_time and interval_end > start_time:
+            events.append((max(interval_start, start_time), 1))
+            events.append((min(interval_end, end_time), -1))
+    events.sort()
+
+    peak = occupied = 0
+    for _, delta in events:
+        occupied += delta
+        peak = max(peak, occupied)
+    return peak
+
+
+def occupancy_intervals(spot_ids, start_time, end_time):
+    """Booked space count over ``[start_time, end_time)`` for every lot.
+
+    One range query loads the occupying bookings of all the lots, then a
+    sweep per lot turns them into run-length ``(start, end, booked)``
+    intervals that cover the whole window, with consecutive intervals of the
+    same count merged.
+    """
+    events = {spot_id: [] for spot_id in spot_ids}
+    for spot_id, interval_start, interval_end in overlapping_bookings(
+        start_time, end_time, spot_ids
+    ).values_list('spot_id', 'start_time', 'end_time').iterator():
+        events[spot_id].append((max(interval_start, start_time), 1))
+        events[spot_id].append((min(interval_end, end_time), -1))
+
+    intervals = {}
+    for spot_id, spot_events in events.items():
+        spot_events.sort()
+        runs = []
+        booked, position = 0, start_time
+        for moment, delta in [*spot_events, (end_time, 0)]:
+            if moment > position:
+                if runs and runs[-1][2] == booked:
+                    runs[-1][1] = moment
+                else:
+                    runs.append([position, moment, booked])
+                position = moment
+            booked += delta
+        intervals[spot_id] = [tuple(run) for run in runs]
+    return intervals
+
+
+def full_spot_ids(start_time, end_time, spot_ids=None):
+    """Ids of the lots that are booked to capacity at some point of the window"""
+    rows = _sweep(
+        """
+        SELECT sweep.spot_id FROM sweep
+        JOIN parking_lot ON parking_lot.id = sweep.spot_id
+        GROUP BY sweep.spot_id, parking_lot.available_spots
+        HAVING MAX(sweep.occupied) >= GREATEST(parking_lot.available_spots, 1)
+        """,
+        start_time, end_time, spot_ids
+    )
+    return [spot_id for spot_id, in rows]
+
+
+def unavailable_spot_ids(spot_ids, start_time, end_time):
+    """Lots with no space left at some point of the window.
+
+    Answered from the availability timeline for the lots it covers, and from
+    the bookings for the rest (new lots, windows beyond the horizon).
+    """
+    covered = timeline.min_remaining(spot_ids, start_time, end_time)
+    unavailable = [spot_id for spot_id, remaining in covered.items() if remaining <= 0]
+    uncovered = [spot_id for spot_id in spot_ids if spot_id not in covered]
+    if uncovered:
+        unavailable += full_spot_ids(start_time, end_time, uncovered)
+    return unavailable
+
+
+# Every occupying booking that overlaps any of the requested windows, found
+# with one join against the requested (spot, start, end) triples
+BOOKED_INTERVALS_SQL = """
+SELECT DISTINCT booking.id, booking.spot_id, booking.start_time, booking.end_time
+FROM unnest(%s::uuid[], %s::timestamptz[], %s::timestamptz[])
+    AS requested(spot_id, start_time, end_time)
+JOIN booking ON booking.spot_id = requested.spot_id
+    AND booking.start_time < requested.end_time
+    AND booking.end_time > requested.start_time
+WHERE booking.status = ANY(%s)
+"""
+
+
+def booked_intervals(windows):
+    """Occupied intervals per lot overlapping any of the ``(spot_id, start, end)`` windows"""
+    intervals = {}
+    if not windows:
+        return intervals
+
+    spot_ids, starts, ends = zip(*windows)
+    with connection.cursor() as cursor:
+        cursor.execute(BOOKED_INTERVALS_SQL, [
+            [str(spot_id) for spot_id in spot_ids], list(starts), list(ends),
+            [str(status) for status in OCCUPYING_STATUSES]
+        ])
+        for _, spot_id, start_time, end_time in cursor.fetchall():
+            intervals.setdefault(spot_id, []).append((start_time, end_time))
+    return intervals
+
+
+def create_bookings(user, items, partial=False):
+    """Create many bookings with one overlap query and one insert.
+
+    ``items`` are ``(index, data)`` pairs of validated booking data. Returns
+    ``(created, rejected)``: bookings and error messages keyed by index.
+    Unless ``partial`` is set nothing is created when any item is rejected.
+    """
+    created, rejected = {}, {}
+    with transaction.atomic():
+        # Locked in primary key order so concurrent bulk requests cannot deadlock
+        spots = {
+            spot.pk: spot
+            for spot in ParkingLot.objects.select_for_update().filter(
+                pk__in={data['spot'] for _, data in items}
+            ).order_by('pk')
+        }
+        booked = booked_intervals([
+            (data['spot'], data['start_time'], data['end_time'])
+            for _, data in items if data['spot'] in spots
+        ])
+
+        # New bookings start pending and do not hold a space until they are
+        # confirmed, so items are only checked against existing bookings
+        accepted, conflicts = [], 0
+        for index, data in items:
+            spot = spots.get(data['spot'])
+            if spot is None:
+                rejected[index] = "Parking spot not found."
+            elif peak_concurrency(booked.get(spot.pk, []), data['start_time'], data['end_time']) >= spot.capacity:
+                rejected[index] = "This time slot is already booked."
+                conflicts += 1
+            else:
+                accepted.append((index, spot, data))
+
+        if conflicts:
+            metrics.inc('booking_conflicts_total', conflicts, source='bulk')
+        if rejected and not partial:
+            return created, rejected
+
+        bookings = Booking.objects.bulk_create([
+            Booking(
+                booking_id=booking_id,
+                user=user,
+                spot=spot,
+                start_time=data['start_time'],
+                end_time=data['end_time'],
+                duration_hours=data['duration_hours'],
+                total_price=pricing.quote(spot, data['start_time'], data['end_time']),
+                notes=data.get('notes', ''),
+            )
+            for booking_id, (_, spot, data) in zip(Booking.generate_booking_ids(len(accepted)), accepted)
+        ])
+        created = {index: booking for (index, _, _), booking in zip(accepted, bookings)}
+
+    metrics.inc('bookings_created_total', len(created), source='bulk')
+    return created, rejected
+
+
+def update_lots(owner, changes):
+    """Apply price and capacity changes to many lots of ``owner`` at once.
+
+    ``changes`` maps lot ids to dicts with ``price_per_hour`` and/or
+    ``available_spots``. Ownership is checked with one locking query, the
+    changes are written with one ``UPDATE ... FROM (VALUES ...)`` and
+    ``parking_lots_updated`` is sent once for the whole batch.
+
+    Returns the ids that are not lots of ``owner``; nothing is written then.
+    """
+    with transaction.atomic():
+        owned = dict(
+            ParkingLot.objects.select_for_update().filter(
+                owner=owner, pk__in=list(changes)
+            ).order_by('pk').values_list('pk', 'available_spots')
+        )
+        missing = [spot_id for spot_id in changes if spot_id not in owned]
+        if missing:
+            return missing
+
+        values = ', '.join(['(%s::uuid, %s::numeric, %s::integer)'] * len(changes))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE parking_lot SET
+                    price_per_hour = COALESCE(changes.price_per_hour, parking_lot.price_per_hour),
+                    available_spots = COALESCE(changes.available_spots, parking_lot.available_spots),
+                    updated_at = NOW()
+                FROM (VALUES {values}) AS changes(id, price_per_hour, available_spots)
+                WHERE parking_lot.id = changes.id
+                """,
+                [
+                    value
+                    for spot_id, change in changes.items()
+                    for value in (str(spot_id), change.get('price_per_hour'), change.get('available_spots'))
+                ]
+            )
+
+        timeline.adjust_capacity({
+            spot_id: max(change['available_spots'], 1) - max(owned[spot_id], 1)
+            for spot_id, change in changes.items() if 'available_spots' in change
+        })
+
+        transaction.on_commit(
+            lambda: parking_lots_updated.send(sender=ParkingLot, spot_ids=list(changes))
+        )
+    return []
+
+
+def _occupancy_rate(occupied_hours, capacity, days):
+    available_hours = capacity * 24 * days
+    return round(float(occupied_hours) / available_hours, 4) if available_hours else 0.0
+
+
+def dashboard_stats(user, start_date, end_date):
+    """Booking and owner statistics of ``user`` for ``[start_date, end_date]``.
+
+    Owner figures come from the ``LotDailyStats`` rollup, so the cost depends
+    on the number of lots and days, not on the size of the booking history.
+    Responses are cached for ``DASHBOARD_STATS_CACHE_SECONDS``.
+    """
+    key = f'dashboard-stats:{user.pk}:{start_date}:{end_date}'
+    stats = cache.get(key)
+    if stats is not None:
+        return stats
+
+    now = timezone.now()
+    user_stats = Booking.objects.filter(user=user).aggregate(
+        total_bookings=Count('id'),
+        active_bookings=Count('id', filter=Q(status=BookingStatus.ACTIVE)),
+        upcoming_bookings=Count('id', filter=Q(status__in=OCCUPYING_STATUSES, start_time__gt=now))
+    )
+
+    days = (end_date - start_date).days + 1
+    rollup = LotDailyStats.objects.filter(owner=user, day__gte=start_date, day__lte=end_date)
+    per_lot = {
+        row['spot']: row
+        for row in rollup.values('spot').annotate(
+            total_bookings=Sum('bookings'),
+            total_cancelled=Sum('cancelled'),
+            total_revenue=Sum('revenue'),
+            total_occupied_hours=Sum('occupied_hours')
+        )
+    }
+
+    lots = []
+    totals = {'bookings': 0, 'cancelled': 0, 'revenue': 0, 'occupied_hours': 0, 'capacity': 0}
+    for spot_id, title, available_spots in ParkingLot.objects.filter(owner=user).order_by('title').values_list(
+        'pk', 'title', 'available_spots'
+    ):
+        row = per_lot.get(spot_id, {})
+        lot = {
+            'spot': spot_id,
+            'title': title,
+            'bookings': row.get('total_bookings') or 0,
+            'cancelled': row.get('total_cancelled') or 0,
+            'revenue': row.get('total_revenue') or 0,
+            'occupied_hours': row.get('total_occupied_hours') or 0,
+        }
+        lot['occupancy_rate'] = _occupancy_rate(lot['occupied_hours'], max(available_spots, 1), days)
+        for field in ('bookings', 'cancelled', 'revenue', 'occupied_hours'):
+            totals[field] += lot[field]
+        totals['capacity'] += max(available_spots, 1)
+        lots.append(lot)
+
+    stats = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'user_stats': user_stats,
+        'owner_stats': {
+            'owned_spots': len(lots),
+            'total_earnings': totals['revenue'],
+            'bookings': totals['bookings'],
+            'cancelled': totals['cancelled'],
+            'occupied_hours': totals['occupied_hours'],
+            'occupancy_rate': _occupancy_rate(totals['occupied_hours'], totals['capacity'], days),
+            'lots': lots,
+            'days': [
+                {'day': day, 'bookings': bookings, 'revenue': revenue, 'occupied_hours': occupied_hours}
+                for day, bookings, revenue, occupied_hours in rollup.values('day').annotate(
+                    total_bookings=Sum('bookings'),
+                    total_revenue=Sum('revenue'),
+                    total_occupied_hours=Sum('occupied_hours')
+                ).order_by('day').values_list('day', 'total_bookings', 'total_revenue', 'total_occupied_hours')
+            ],
+        },
+    }
+    cache.set(key, stats, settings.DASHBOARD_STATS_CACHE_SECONDS)
+    return stats
+
+
+# Claims one batch of rows and moves them in the same statement. SKIP LOCKED
+# lets several workers run at once, each one taking rows nobody else holds.
+TRANSITION_SQL = """
+WITH batch AS (
+    SELECT id FROM booking
+    WHERE status = %s AND {field} < %s
+    ORDER BY {field}
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE booking SET status = %s, updated_at = NOW()
+FROM batch WHERE booking.id = batch.id
+"""
+
+
+def booking_transitions(now=None):
+    """(from status, to status, field, cutoff) of the time-driven transitions.
+
+    None of them touches the availability timeline: pending bookings never
+    held a space, and active ones only complete once their end has passed.
+    """
+    now = now or timezone.now()
+    return [
+        (BookingStatus.PENDING, BookingStatus.EXPIRED, 'created_at',
+         now - timedelta(minutes=settings.BOOKING_PENDING_TTL_MINUTES)),
+        (BookingStatus.ACTIVE, BookingStatus.COMPLETED, 'end_time', now),
+    ]
+
+
+def transition_batch(from_status, to_status, field, cutoff, batch_size):
+    """Move up to ``batch_size`` bookings, returns how many were moved"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            TRANSITION_SQL.format(field=field),
+            [from_status, cutoff, batch_size, to_status]
+        )
+        return cursor.rowcount
+
+
+def expire_bookings(batch_size=1000, now=None):
+    """Run one pass of every booking transition until nothing is left.
+
+    Returns the number of rows moved per transition, also counted in
+    ``bookings_transitioned_total``; the pass time goes to the
+    ``booking_expiry_pass_seconds`` gauge.
+    """
+    started = time.monotonic()
+    moved = {}
+    for from_status, to_status, field, cutoff in booking_transitions(now):
+        name = f"{from_status}_to_{to_status}"
+        moved[name] = 0
+        while True:
+            count = transition_batch(from_status, to_status, field, cutoff, batch_size)
+            moved[name] += count
+            if count < batch_size:
+                break
+        metrics.inc('bookings_transitioned_total', moved[name], transition=name)
+
+    metrics.set_gauge('booking_expiry_pass_seconds', time.monotonic() - started)
+    logger.info("booking transitions", extra={'transitions': moved})
+    return moved
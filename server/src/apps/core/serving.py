@@ -0,0 +1,180 @@
+"""
+WSGI against ASGI under a mixed load
+
+``run`` starts gunicorn with ``config/gunicorn.py`` in every requested
+serving mode on a free local port, drives it for ``duration`` seconds from
+``concurrency`` client threads, each on its own keep-alive connection, and
+reports requests per second and latency percentiles per mode, overall and per
+scenario. Requests are drawn from the ``loadtest`` scenarios in proportion to
+their weight in ``mix``, so a mix of reads and booking writes hits the
+servers at once.
+
+Unlike ``loadtest.run`` requests cross a socket and a real server, and the
+writes are committed: run it against a dataset from ``seed_benchmark_data``,
+not against data that matters. Queries per request are read from the
+``Server-Timing`` header. The client threads share one interpreter, so keep
+an eye on the client's CPU when the servers get many workers; a status of 0
+is a request that got no response.
+"""
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlencode
+from django.conf import settings
+from django.utils import timezone
+from apps.core import loadtest
+
+MODES = ('wsgi', 'asgi')
+DEFAULT_MIX = {'nearby': 4, 'search': 2, 'bookings_list': 2, 'booking_create': 1, 'booking_extend': 1}
+GUNICORN_CONFIG = Path(settings.BASE_DIR) / 'config' / 'gunicorn.py'
+SERVER_TIMING_QUERIES = re.compile(r'db;desc="(\d+) queries"')
+
+
+def parse_mix(text):
+    """``'nearby=4,booking_create=1'`` -> {'nearby': 4, 'booking_create': 1}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in loadtest.SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(process, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/nearby/?latitude=0&longitude=0')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not answer within {timeout}s")
+
+
+@contextmanager
+def server(mode, workers, port, ready_timeout=60):
+    """A gunicorn in ``mode`` listening on ``port`` until the block exits"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', str(GUNICORN_CONFIG)],
+        env={
+            **os.environ,
+            'SERVER_MODE': mode,
+            'WEB_CONCURRENCY': str(workers),
+            'BIND': f'127.0.0.1:{port}',
+        },
+    )
+    try:
+        _wait_ready(process, port, ready_timeout)
+        yield
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _request(connection, context, name):
+    method, path, data, user_id = loadtest.SCENARIOS[name](context)
+    headers = {'Authorization': f'Bearer {context.token(user_id)}'} if user_id is not None else {}
+    body = None
+    if method == 'post':
+        body = json.dumps(data)
+        headers['Content-Type'] = 'application/json'
+    elif data:
+        path = f'{path}?{urlencode(data)}'
+    connection.request(method.upper(), path, body, headers)
+    response = connection.getresponse()
+    response.read()
+    match = SERVER_TIMING_QUERIES.search(response.getheader('Server-Timing') or '')
+    return response.status, int(match.group(1)) if match else 0
+
+
+def _drive(port, context, mix, concurrency, duration, warmup):
+    """Samples (scenario, latency, queries, status) of the measured period"""
+    names, weights = list(mix), list(mix.values())
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+    samples = []
+    lock = threading.Lock()
+
+    def client(index):
+        rng = random.Random(index)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        collected = []
+        while (started := time.perf_counter()) < deadline:
+            name = rng.choices(names, weights)[0]
+            try:
+                status, queries = _request(connection, context, name)
+            except (OSError, http.client.HTTPException):
+                status, queries = 0, 0
+                connection.close()
+            if started >= measure_from:
+                collected.append((name, time.perf_counter() - started, queries, status))
+        connection.close()
+        with lock:
+            samples.extend(collected)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def run(modes=MODES, mix=None, concurrency=32, duration=30, warmup=5, workers=4, seed=None, label=''):
+    """Serve with gunicorn in every mode of ``modes`` in turn and measure it"""
+    mix = mix or DEFAULT_MIX
+    context = loadtest.Context(random.Random(seed))
+    if not context.lots:
+        raise RuntimeError("No parking lots to draw requests from; run seed_benchmark_data first")
+    if not context.active_bookings:
+        mix = {name: weight for name, weight in mix.items() if name != 'booking_extend'}
+
+    report = {
+        'label': label,
+        'started_at': timezone.now().isoformat(),
+        'concurrency': concurrency,
+        'duration': duration,
+        'workers': workers,
+        'mix': mix,
+        'modes': {},
+    }
+    for mode in modes:
+        port = _free_port()
+        with server(mode, workers, port):
+            samples = _drive(port, context, mix, concurrency, duration, warmup)
+        if not samples:
+            raise RuntimeError(f"No request completed against the {mode} server")
+        report['modes'][mode] = {
+            'overall': loadtest.summarize([sample[1:] for sample in samples], duration),
+            'scenarios': {
+                name: loadtest.summarize([sample[1:] for sample in samples if sample[0] == name], duration)
+                for name in mix if any(sample[0] == name for sample in samples)
+            },
+        }
+    return report
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent once per write batch with ``spot_ids``, the lots whose price, capacity
+# or other listing data changed. Caches derived from lots listen to this
+# instead of per-row post_save, which bulk writes never send.
+parking_lots_updated = Signal()
@@ -0,0 +1,182 @@
+"""
+Materialized availability timeline
+
+Every active parking lot keeps one ``AvailabilityBucket`` per 15 minutes for
+the next ``AVAILABILITY_TIMELINE_DAYS`` days, holding its remaining capacity.
+Booking writes adjust the affected buckets in place, so a time-window
+availability check is a range-min over buckets instead of a scan of bookings.
+"""
+from datetime import timedelta
+from itertools import accumulate
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from apps.core.models import AvailabilityBucket, Booking, ParkingLot, OCCUPYING_STATUSES
+
+BUCKET_SIZE = timedelta(minutes=15)
+
+
+def bucket_floor(value):
+    """Start of the bucket containing ``value``"""
+    return value.replace(minute=value.minute - value.minute % 15, second=0, microsecond=0)
+
+
+def bucket_count(start_time, end_time):
+    """Number of buckets touched by ``[start_time, end_time)``"""
+    return max(0, -(-(end_time - bucket_floor(start_time)) // BUCKET_SIZE))
+
+
+def horizon(now=None):
+    """Window covered by the timeline"""
+    start = bucket_floor(now or timezone.now())
+    return start, start + timedelta(days=settings.AVAILABILITY_TIMELINE_DAYS)
+
+
+def reserve(spot_id, start_time, end_time, count=1):
+    """Take ``count`` spaces from every bucket overlapping the interval"""
+    return AvailabilityBucket.objects.filter(
+        spot_id=spot_id,
+        start__gte=bucket_floor(start_time),
+        start__lt=end_time
+    ).update(remaining=F('remaining') - count)
+
+
+def extend(spot_id, previous_end_time, end_time, count=1):
+    """Take ``count`` spaces for a booking moving its end from
+    ``previous_end_time`` to ``end_time``: the bucket holding the old end
+    already counts it, so only the buckets starting from the old end on"""
+    return AvailabilityBucket.objects.filter(
+        spot_id=spot_id,
+        start__gte=previous_end_time,
+        start__lt=end_time
+    ).update(remaining=F('remaining') - count)
+
+
+def release(spot_id, start_time, end_time, count=1):
+    """Give ``count`` spaces back to every bucket overlapping the interval"""
+    return reserve(spot_id, start_time, end_time, -count)
+
+
+def adjust_capacity(deltas):
+    """Shift every bucket of each lot by its capacity change, in one statement"""
+    deltas = {spot_id: delta for spot_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    values = ', '.join(['(%s::uuid, %s::integer)'] * len(deltas))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE availability_bucket SET remaining = remaining + deltas.delta
+            FROM (VALUES {values}) AS deltas(spot_id, delta)
+            WHERE availability_bucket.spot_id = deltas.spot_id
+            """,
+            [value for spot_id, delta in deltas.items() for value in (str(spot_id), delta)]
+        )
+        return cursor.rowcount
+
+
+def min_remaining(spot_ids, start_time, end_time):
+    """Lowest remaining capacity per lot over the window.
+
+    Only lots whose timeline has every bucket of the window are returned, the
+    others have to be answered from the bookings themselves.
+    """
+    rows = AvailabilityBucket.objects.filter(
+        spot_id__in=spot_ids,
+        start__gte=bucket_floor(start_time),
+        start__lt=end_time
+    ).values('spot_id').annotate(
+        remaining=Min('remaining'),
+        buckets=Count('id')
+    ).filter(buckets=bucket_count(start_time, end_time))
+    return {row['spot_id']: row['remaining'] for row in rows}
+
+
+def _expected_timelines(capacities, origin, size):
+    """Remaining capacity per bucket computed from the raw bookings"""
+    deltas = {spot_id: [0] * (size + 1) for spot_id in capacities}
+    bookings = Booking.objects.filter(
+        spot_id__in=list(capacities),
+        status__in=OCCUPYING_STATUSES,
+        start_time__lt=origin + size * BUCKET_SIZE,
+        end_time__gt=origin
+    ).values_list('spot_id', 'start_time', 'end_time')
+
+    for spot_id, start_time, end_time in bookings.iterator():
+        deltas[spot_id][max(0, (start_time - origin) // BUCKET_SIZE)] += 1
+        deltas[spot_id][min(size, -(-(end_time - origin) // BUCKET_SIZE))] -= 1
+
+    return {
+        spot_id: [capacity - occupied for occupied in accumulate(deltas[spot_id][:size])]
+        for spot_id, capacity in capacities.items()
+    }
+
+
+def _locked_capacities(chunk):
+    # Booking writes take the same lock (services.lock_spot), so nothing moves
+    # between reading the bookings and writing the buckets
+    spots = ParkingLot.objects.select_for_update().filter(pk__in=chunk).only('available_spots')
+    return {spot.pk: spot.capacity for spot in spots}
+
+
+def _chunks(spot_ids, chunk_size):
+    lots = ParkingLot.objects.filter(is_active=True).order_by('pk')
+    if spot_ids is not None:
+        lots = lots.filter(pk__in=spot_ids)
+    ids = list(lots.values_list('pk', flat=True))
+    for index in range(0, len(ids), chunk_size):
+        yield ids[index:index + chunk_size]
+
+
+def rebuild(spot_ids=None, chunk_size=200):
+    """Recompute the timeline of the given lots (all active lots by default)
+    from their bookings, rolling it forward to the current horizon.
+
+    Returns the number of lots rebuilt.
+    """
+    origin, end = horizon()
+    size = (end - origin) // BUCKET_SIZE
+    rebuilt = 0
+
+    for chunk in _chunks(spot_ids, chunk_size):
+        with transaction.atomic():
+            timelines = _expected_timelines(_locked_capacities(chunk), origin, size)
+            AvailabilityBucket.objects.filter(spot_id__in=chunk).delete()
+            AvailabilityBucket.objects.bulk_create(
+                (
+                    AvailabilityBucket(spot_id=spot_id, start=origin + index * BUCKET_SIZE, remaining=remaining)
+                    for spot_id, timeline in timelines.items()
+                    for index, remaining in enumerate(timeline)
+                ),
+                batch_size=5000
+            )
+        rebuilt += len(chunk)
+
+    return rebuilt
+
+
+def check(spot_ids=None, chunk_size=200):
+    """Compare the stored timeline with the one derived from the bookings.
+
+    Yields ``(spot_id, bucket_start, stored, expected)`` for every bucket that
+    differs; ``stored`` is ``None`` when the bucket is missing.
+    """
+    origin, end = horizon()
+    size = (end - origin) // BUCKET_SIZE
+
+    for chunk in _chunks(spot_ids, chunk_size):
+        with transaction.atomic():
+            timelines = _expected_timelines(_locked_capacities(chunk), origin, size)
+            stored = {
+                (spot_id, start): remaining
+                for spot_id, start, remaining in AvailabilityBucket.objects.filter(
+                    spot_id__in=chunk, start__gte=origin, start__lt=end
+                ).values_list('spot_id', 'start', 'remaining')
+            }
+
+        for spot_id, timeline in timelines.items():
+            for index, expected in enumerate(timeline):
+                start = origin + index * BUCKET_SIZE
+                if stored.get((spot_id, start)) != expected:
+                    yield spot_id, start, stored.get((spot_id, start)), expected
@@ -5,7 +5,8 @@ from apps.core.views import (
     BookingViewSet,
     MyParkingLotsViewSet,
     search_parking_spots,
-    nearby_parking_spots
+    nearby_parking_spots,
+    demand_heatmap
 )
 
 router = DefaultRouter()
@@ -17,4 +18,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('search/', search_parking_spots, name='search-parking-spots'),
     path('nearby/', nearby_parking_spots, name='nearby-parking-spots'),
+    path('demand-heatmap/', demand_heatmap, name='demand-heatmap'),
 ]
\ No newline at end of file
@@ -0,0 +1,48 @@
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(latitude, longitude, precision=6):
+    """Geohash of a point, same cells as PostGIS ``ST_GeoHash``"""
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    value = [float(latitude), float(longitude)]
+    cell, bits, index, even = [], 0, 0, True
+    while len(cell) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        low, high = bounds[even]
+        middle = (low + high) / 2
+        index <<= 1
+        if value[even] >= middle:
+            index |= 1
+            bounds[even][0] = middle
+        else:
+            bounds[even][1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            cell.append(GEOHASH_ALPHABET[index])
+            bits, index = 0, 0
+    return ''.join(cell)
+
+
+def geohash_bounds(cell):
+    """``(south, west, north, east)`` of a geohash cell"""
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    even = True
+    for character in cell:
+        index = GEOHASH_ALPHABET.index(character)
+        for shift in range(4, -1, -1):
+            low, high = bounds[even]
+            middle = (low + high) / 2
+            if index >> shift & 1:
+                bounds[even][0] = middle
+            else:
+                bounds[even][1] = middle
+            even = not even
+    (south, north), (west, east) = bounds
+    return south, west, north, east
+
+
+def geohash_center(cell):
+    """``(latitude, longitude)`` of the center of a geohash cell"""
+    south, west, north, east = geohash_bounds(cell)
+    return (south + north) / 2, (west + east) / 2
@@ -1,6 +1,10 @@
 # Updated views.py with PostGIS optimizations
+from adrf.decorators import api_view as async_api_view
+from adrf.viewsets import ModelViewSet as AsyncModelViewSet
+from asgiref.sync import sync_to_async
 from rest_framework import status, permissions, filters
 from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
@@ -10,14 +14,28 @@ from django.contrib.gis.db.models.functions import Distance as DistanceFunction
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import Distance
 from django.contrib.gis.db.models.functions import Distance as DistanceFunction
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+import io
 import django_filters
 from apps import docs
 
-from apps.core.models import ParkingLot, Booking
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Count, F
+from apps.common import metrics
+from apps.core import demand, pricing, timeline
+from apps.core.importers import FORMATS, detect_format, import_parking_lots
+from apps.core.models import ParkingLot, Booking, OCCUPYING_STATUSES
+from apps.core.services import (
+    create_bookings, dashboard_stats, has_capacity, lock_spot, occupancy_intervals, unavailable_spot_ids,
+    update_lots
+)
 from apps.core.serializers import (
     ParkingLotListSerializer, ParkingLotDetailSerializer, CreateParkingLotSerializer,
-    BookingSerializer, CreateBookingSerializer
+    BookingSerializer, CreateBookingSerializer, BulkBookingItemSerializer, BulkCreateBookingSerializer,
+    BulkParkingLotUpdateSerializer, QuoteSerializer, DemandHeatmapQuerySerializer, DashboardStatsQuerySerializer,
+    AvailabilityQuerySerializer, ExtendSessionSerializer
 )
 
 class ParkingLotFilter(django_filters.FilterSet):
@@ -78,16 +96,89 @@ class ParkingLotViewSet(ModelViewSet):
 
         return queryset
 
+    def perform_update(self, serializer):
+        # available_spots is writable here too: move the timeline with it,
+        # under the lock booking writes take
+        with transaction.atomic():
+            previous = lock_spot(serializer.instance.pk).capacity
+            spot = serializer.save()
+            timeline.adjust_capacity({spot.pk: spot.capacity - previous})
+
+    @docs.PARKING_LOT_AVAILABILITY_DOCS
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """Booked and free intervals of one or many parking lots over a date range"""
+        serializer = AvailabilityQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+
+        capacities = {
+            spot.pk: spot.capacity
+            for spot in self.get_queryset().filter(pk__in=ids).only('available_spots')
+        }
+        missing = [spot_id for spot_id in ids if spot_id not in capacities]
+        if missing:
+            return Response({'error': 'Parking lots not found', 'ids': missing}, 
+                          status=status.HTTP_404_NOT_FOUND)
+
+        start_time = timezone.make_aware(datetime.combine(start_date, time.min))
+        end_time = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        intervals = occupancy_intervals(ids, start_time, end_time)
+
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'lots': [
+                {
+                    'spot_id': spot_id,
+                    'capacity': capacities[spot_id],
+                    'intervals': [
+                        {'start': start, 'end': end, 'booked': booked,
+                         'available': max(capacities[spot_id] - booked, 0)}
+                        for start, end, booked in intervals[spot_id]
+                    ]
+                }
+                for spot_id in ids
+            ]
+        })
+
+    @docs.PARKING_LOT_QUOTE_DOCS
+    @action(detail=True, methods=['get'])
+    def quote(self, request, pk=None):
+        """Price of booking this parking lot for a time window"""
+        spot = self.get_object()
+        serializer = QuoteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start_time = serializer.validated_data['start_time']
+        end_time = serializer.validated_data['end_time']
+
+        return Response({
+            'spot': spot.id,
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration_hours': round(Decimal((end_time - start_time).total_seconds()) / 3600, 2),
+            'total_price': pricing.quote(spot, start_time, end_time)
+        })
+
 # Keep BookingViewSet and MyParkingLotsViewSet as they were...
 # Keep BookingViewSet and MyParkingLotsViewSet as they were...
-class BookingViewSet(ModelViewSet):
+class BookingViewSet(AsyncModelViewSet):
+    """Reads are async; the other actions run in a thread under ASGI"""
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'spot']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        return Booking.objects.filter(user=self.request.user).select_related('spot')
+
+    async def list(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -103,26 +194,40 @@ class BookingViewSet(ModelViewSet):
             return Response({'error': 'Can only extend active sessions'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        additional_hours = request.data.get('hours', 1)
-        additional_cost = additional_hours * booking.spot.price_per_hour
+        serializer = ExtendSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        additional_hours = serializer.validated_data['hours']
         
-        # Check for conflicts
-        new_end_time = booking.end_time + timedelta(hours=additional_hours)
-        conflicts = Booking.objects.filter(
-            spot=booking.spot,
-            status__in=['confirmed', 'active'],
-            start_time__lt=new_end_time,
-            end_time__gt=booking.end_time
-        ).exclude(id=booking.id).exists()
-        
-        if conflicts:
-            return Response({'error': 'Cannot extend due to conflicting bookings'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-        
-        booking.end_time = new_end_time
-        booking.duration_hours += additional_hours
-        booking.total_price += additional_cost
-        booking.save()
+        with transaction.atomic():
+            # Same lock as booking creation, so nothing else can take the
+            # spaces between the capacity check and the update
+            spot = lock_spot(booking.spot_id)
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+            if booking.status != 'active':
+                return Response({'error': 'Can only extend active sessions'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+            if booking.duration_hours + additional_hours > ExtendSessionSerializer.MAX_HOURS:
+                return Response({'error': f'Sessions cannot last longer than {ExtendSessionSerializer.MAX_HOURS} hours'},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            previous_end_time = booking.end_time
+            new_end_time = previous_end_time + timedelta(hours=float(additional_hours))
+            additional_cost = pricing.quote(spot, previous_end_time, new_end_time)
+
+            # Check for conflicts
+            if not has_capacity(spot, previous_end_time, new_end_time, exclude=booking.pk):
+                metrics.inc('booking_conflicts_total', source='extension')
+                return Response({'error': 'Cannot extend due to conflicting bookings'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            booking.end_time = F('end_time') + (new_end_time - previous_end_time)
+            booking.duration_hours = F('duration_hours') + additional_hours
+            booking.total_price = F('total_price') + additional_cost
+            booking.save(update_fields=['end_time', 'duration_hours', 'total_price', 'updated_at'])
+            timeline.extend(spot.pk, previous_end_time, new_end_time)
+
+        metrics.inc('booking_extensions_total')
+        booking.refresh_from_db(fields=['end_time', 'duration_hours', 'total_price'])
         
         return Response({
             'message': 'Session extended successfully',
@@ -131,6 +236,45 @@ class BookingViewSet(ModelViewSet):
             'total_price': booking.total_price
         })
 
+    @docs.BOOKING_BULK_CREATE_DOCS
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create many bookings in one request"""
+        serializer = BulkCreateBookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data['bookings']
+        partial = serializer.validated_data['mode'] == BulkCreateBookingSerializer.MODE_PARTIAL
+
+        items, invalid = [], {}
+        for index, data in enumerate(requested):
+            item = BulkBookingItemSerializer(data=data)
+            if item.is_valid():
+                items.append((index, item.validated_data))
+            else:
+                invalid[index] = item.errors
+
+        created, rejected = {}, {}
+        if items and (partial or not invalid):
+            created, rejected = create_bookings(request.user, items, partial=partial)
+        rejected = {index: {'non_field_errors': [error]} for index, error in rejected.items()}
+        rejected.update(invalid)
+
+        results = []
+        for index in range(len(requested)):
+            if index in created:
+                results.append({'index': index, 'status': 'created',
+                                'booking': BookingSerializer(created[index]).data})
+            elif index in rejected:
+                results.append({'index': index, 'status': 'rejected', 'errors': rejected[index]})
+            else:
+                results.append({'index': index, 'status': 'skipped'})
+
+        return Response({
+            'created': len(created),
+            'rejected': len(rejected),
+            'results': results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=['post'])
     def cancel_booking(self, request, pk=None):
         """Cancel a pending or confirmed booking"""
@@ -140,9 +284,20 @@ class BookingViewSet(ModelViewSet):
             return Response({'error': 'Cannot cancel this booking'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        booking.status = 'cancelled'
-        booking.save()
+        with transaction.atomic():
+            lock_spot(booking.spot_id)
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+            if booking.status not in ['pending', 'confirmed']:
+                return Response({'error': 'Cannot cancel this booking'}, 
+                              status=status.HTTP_400_BAD_REQUEST)
+
+            was_occupying = booking.status in OCCUPYING_STATUSES
+            booking.status = 'cancelled'
+            booking.save(update_fields=['status', 'updated_at'])
+            if was_occupying:
+                timeline.release(booking.spot_id, booking.start_time, booking.end_time)
         
+        metrics.inc('bookings_cancelled_total')
         return Response({'message': 'Booking cancelled successfully'})
 
 class MyParkingLotsViewSet(ReadOnlyModelViewSet):
@@ -151,7 +306,10 @@ class MyParkingLotsViewSet(ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return ParkingLot.objects.filter(owner=self.request.user)
+        queryset = ParkingLot.objects.filter(owner=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = ParkingLotDetailSerializer.setup_eager_loading(queryset)
+        return queryset
 
     @action(detail=True, methods=['get'])
     def bookings(self, request, pk=None):
@@ -161,9 +319,53 @@ class MyParkingLotsViewSet(ReadOnlyModelViewSet):
         serializer = BookingSerializer(bookings, many=True)
         return Response(serializer.data)
 
-@api_view(['GET'])
+    @docs.DASHBOARD_STATS_DOCS
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Booking, revenue and occupancy statistics of the owned parking lots"""
+        serializer = DashboardStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(dashboard_stats(request.user, **serializer.validated_data))
+
+    @docs.MY_PARKING_LOTS_BULK_UPDATE_DOCS
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk_update(self, request):
+        """Change price and capacity of many owned parking lots at once"""
+        serializer = BulkParkingLotUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = {
+            item.pop('id'): item for item in serializer.validated_data['lots']
+        }
+
+        missing = update_lots(request.user, changes)
+        if missing:
+            return Response({'error': 'Parking lots not found', 'ids': missing}, 
+                          status=status.HTTP_404_NOT_FOUND)
+
+        return Response({'updated': len(changes)})
+
+    @docs.MY_PARKING_LOTS_IMPORT_DOCS
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_lots(self, request):
+        """Import parking lots from an uploaded CSV, GeoJSON or NDJSON file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('format') or detect_format(upload.name)
+        if file_format not in FORMATS:
+            return Response({'error': f"format must be one of {', '.join(FORMATS)}"}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = import_parking_lots(stream, file_format, request.user)
+        return Response(result.as_dict(), 
+                        status=status.HTTP_201_CREATED if result.imported else status.HTTP_400_BAD_REQUEST)
+
+@async_api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def search_parking_spots(request):
+async def search_parking_spots(request):
     """Advanced search with PostGIS optimization"""
     """Advanced search with PostGIS optimization"""
     lat = request.query_params.get('lat')
@@ -183,28 +385,18 @@ def search_parking_spots(request):
     start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
     end_time = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
     
-    # Get unavailable spots for the time period
-    # Get unavailable spots for the time period
-    unavailable_spots = Booking.objects.filter(
-        status__in=['confirmed', 'active'],
-        start_time__lt=end_time,
-        end_time__gt=start_time
-    ).values_list('spot_id', flat=True)
-    
     # PostGIS optimized query
     queryset = ParkingLot.objects.filter(
         is_active=True,
         location__dwithin=(user_location, radius_m)
-    ).exclude(
-        id__in=unavailable_spots
-    ).annotate(
-        distance=DistanceFunction('location', user_location)
-    ).order_by('distance')
-    # PostGIS optimized query
-    queryset = ParkingLot.objects.filter(
-        is_active=True,
-        location__dwithin=(user_location, radius_m)
-    ).exclude(
+    )
+
+    # Get spots booked to capacity for the time period
+    unavailable_spots = await sync_to_async(unavailable_spot_ids)(
+        [spot_id async for spot_id in queryset.values_list('id', flat=True)], start_time, end_time
+    )
+
+    queryset = queryset.exclude(
         id__in=unavailable_spots
     ).annotate(
         distance=DistanceFunction('location', user_location)
@@ -212,7 +404,7 @@ def search_parking_spots(request):
     
     # Serialize results
     results = []
-    for spot in queryset:
+    async for spot in queryset:
         serializer = ParkingLotListSerializer(spot, context={'request': request})
         data = serializer.data
         data['distance'] = round(spot.distance.km, 2)
@@ -223,9 +415,9 @@ def search_parking_spots(request):
         'results': results
     })
 
-@api_view(['GET'])
+@async_api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def nearby_parking_spots(request):
+async def nearby_parking_spots(request):
     lat = request.query_params.get('latitude')
     lng = request.query_params.get('longitude')
     radius = float(request.query_params.get('radius', 5))
@@ -246,21 +438,24 @@ def nearby_parking_spots(request):
     ).annotate(
         distance=DistanceFunction('location', user_location)
     ).order_by('distance')[:limit]
+    spots = [spot async for spot in queryset]
+    
+    # Current occupancy of every returned spot, counted in one grouped query
+    now = timezone.now()
+    current_bookings = {
+        spot_id: count async for spot_id, count in Booking.objects.filter(
+            spot_id__in=[spot.pk for spot in spots],
+            status__in=OCCUPYING_STATUSES,
+            start_time__lte=now,
+            end_time__gte=now
+        ).values('spot_id').annotate(count=Count('id')).values_list('spot_id', 'count')
+    }
     
     # Serialize results
     results = []
-    now = datetime.now()
     
-    for spot in queryset:
-        # Check current availability
-        current_bookings = Booking.objects.filter(
-            spot=spot,
-            status__in=['confirmed', 'active'],
-            start_time__lte=now,
-            end_time__gte=now
-        ).count()
-        
-        available_now = max(0, spot.available_spots - current_bookings)
+    for spot in spots:
+        available_now = max(0, spot.available_spots - current_bookings.get(spot.pk, 0))
         
         data = {
             'id': spot.id,
@@ -280,6 +475,20 @@ def nearby_parking_spots(request):
     
     return Response({"spots": results})
 
+@docs.DEMAND_HEATMAP_DOCS
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def demand_heatmap(request):
+    """Bookings, revenue and occupancy per geohash cell, from the hourly rollup"""
+    serializer = DemandHeatmapQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    cells = demand.heatmap(**serializer.validated_data)
+
+    return Response({
+        'count': len(cells),
+        'cells': cells
+    })
+
 # Advanced PostGIS queries for future features
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -1,12 +1,17 @@
 from apps.docs.decorators import (
     PARKING_LOT_VIEWSET_DOCS,
     PARKING_LOT_AVAILABILITY_DOCS,
+    PARKING_LOT_QUOTE_DOCS,
     BOOKING_VIEWSET_DOCS,
     BOOKING_EXTEND_SESSION_DOCS,
     BOOKING_CANCEL_DOCS,
+    BOOKING_BULK_CREATE_DOCS,
     MY_PARKING_LOTS_VIEWSET_DOCS,
     MY_PARKING_LOT_BOOKINGS_DOCS,
+    MY_PARKING_LOTS_BULK_UPDATE_DOCS,
+    MY_PARKING_LOTS_IMPORT_DOCS,
     SEARCH_PARKING_SPOTS_DOCS,
+    DEMAND_HEATMAP_DOCS,
     DASHBOARD_STATS_DOCS
 )
 
@@ -3,9 +3,10 @@
 API Documentation Decorators
 Pre-configured decorators for consistent API documentation
 """
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiResponse, extend_schema, extend_schema_view
 from apps.docs.schemas import *
 from apps.docs.parameters import *
+from apps.core.serializers import BulkCreateBookingSerializer, BulkParkingLotUpdateSerializer
 
 # User Documentation Decorators
 USER_VIEWSET_DOCS = extend_schema_view(
@@ -41,7 +42,8 @@ USER_REGISTER_DOCS = extend_schema(
     description="Create a new user account and return JWT tokens",
     responses={
         201: UserAuthResponseSchema,
-        400: ValidationErrorResponseSchema
+        400: ValidationErrorResponseSchema,
+        429: OpenApiResponse(description="Too many attempts; retry after Retry-After seconds")
     },
     tags=["Authentication"],
     auth=[]
@@ -49,10 +51,11 @@ USER_REGISTER_DOCS = extend_schema(
 
 USER_LOGIN_DOCS = extend_schema(
     summary="User login",
-    description="Authenticate user and return JWT tokens",
+    description="Authenticate user and return JWT tokens. No session is started unless `session` is true.",
     responses={
         200: UserAuthResponseSchema,
-        400: ValidationErrorResponseSchema
+        400: ValidationErrorResponseSchema,
+        429: OpenApiResponse(description="Too many attempts; retry after Retry-After seconds")
     },
     tags=["Authentication"],
     auth=[]
@@ -130,9 +133,14 @@ PARKING_LOT_VIEWSET_DOCS = extend_schema_view(
 
 PARKING_LOT_AVAILABILITY_DOCS = extend_schema(
     summary="Check parking lot availability",
-    description="Get availability information for a specific parking lot on a given date",
-    parameters=[DATE_PARAM],
-    responses={200: ParkingLotAvailabilityResponseSchema},
+    description="Booked and available spaces of up to 100 parking lots over up to 31 days, as "
+                "consecutive intervals of constant occupancy covering the whole range",
+    parameters=[IDS_PARAM, DATE_PARAM, START_DATE_PARAM, END_DATE_PARAM],
+    responses={
+        200: ParkingLotAvailabilityResponseSchema,
+        400: ValidationErrorResponseSchema,
+        404: NotFoundIdsResponseSchema
+    },
     tags=["Parking Lots"]
 )
 
@@ -187,6 +195,18 @@ BOOKING_CANCEL_DOCS = extend_schema(
     tags=["Bookings"]
 )
 
+BOOKING_BULK_CREATE_DOCS = extend_schema(
+    summary="Create bookings in bulk",
+    description="Create up to 500 bookings at once. In 'atomic' mode nothing is created if any "
+                "booking is rejected, in 'partial' mode every booking that fits is created",
+    request=BulkCreateBookingSerializer,
+    responses={
+        201: BulkBookingResponseSchema,
+        400: BulkBookingResponseSchema
+    },
+    tags=["Bookings"]
+)
+
 # My Parking Lots Documentation Decorators
 MY_PARKING_LOTS_VIEWSET_DOCS = extend_schema_view(
     list=extend_schema(
@@ -208,6 +228,44 @@ MY_PARKING_LOT_BOOKINGS_DOCS = extend_schema(
     tags=["My Parking Lots"]
 )
 
+PARKING_LOT_QUOTE_DOCS = extend_schema(
+    summary="Quote parking lot price",
+    description="Price of booking the parking lot for a time window, with its time-of-day "
+                "and weekday rates applied. Partial hours are charged pro rata",
+    parameters=[START_TIME_PARAM, END_TIME_PARAM],
+    responses={
+        200: QuoteResponseSchema,
+        400: ValidationErrorResponseSchema,
+        404: ErrorResponseSchema
+    },
+    tags=["Parking Lots"]
+)
+
+MY_PARKING_LOTS_BULK_UPDATE_DOCS = extend_schema(
+    summary="Bulk update owned parking lots",
+    description="Change price_per_hour and/or available_spots of up to 5000 owned parking lots "
+                "in one request. Nothing is changed if any lot is not owned by the user",
+    request=BulkParkingLotUpdateSerializer,
+    responses={
+        200: BulkParkingLotUpdateResponseSchema,
+        400: ValidationErrorResponseSchema,
+        404: NotFoundIdsResponseSchema
+    },
+    tags=["My Parking Lots"]
+)
+
+MY_PARKING_LOTS_IMPORT_DOCS = extend_schema(
+    summary="Import parking lots",
+    description="Create parking lots in bulk from a CSV, GeoJSON or NDJSON upload. "
+                "Rejected rows are reported with their line number",
+    request={'multipart/form-data': ParkingLotImportRequestSchema},
+    responses={
+        201: ParkingLotImportResponseSchema,
+        400: ParkingLotImportResponseSchema
+    },
+    tags=["My Parking Lots"]
+)
+
 # Function-based View Documentation Decorators
 SEARCH_PARKING_SPOTS_DOCS = extend_schema(
     summary="Advanced parking spot search",
@@ -223,9 +281,26 @@ SEARCH_PARKING_SPOTS_DOCS = extend_schema(
     tags=["Search"]
 )
 
+DEMAND_HEATMAP_DOCS = extend_schema(
+    summary="Demand heatmap",
+    description="Bookings, revenue and occupied hours per geohash cell over a time window of "
+                "up to 92 days, served from the hourly demand rollup (admin only)",
+    parameters=[START_TIME_PARAM, END_TIME_PARAM, PRECISION_PARAM],
+    responses={
+        200: DemandHeatmapResponseSchema,
+        400: ValidationErrorResponseSchema
+    },
+    tags=["Dashboard"]
+)
+
 DASHBOARD_STATS_DOCS = extend_schema(
     summary="Get dashboard statistics",
-    description="Get comprehensive statistics for the authenticated user including bookings and earnings",
-    responses={200: DashboardStatsResponseSchema},
+    description="Get comprehensive statistics for the authenticated user including bookings and earnings. "
+                "Owner figures come from the daily lot rollup and responses are cached for a short while",
+    parameters=[START_DATE_PARAM, END_DATE_PARAM],
+    responses={
+        200: DashboardStatsResponseSchema,
+        400: ValidationErrorResponseSchema
+    },
     tags=["Dashboard"]
 )
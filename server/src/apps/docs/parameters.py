@@ -55,6 +55,14 @@ DATE_PARAM = OpenApiParameter(
     default='today'
 )
 
+IDS_PARAM = OpenApiParameter(
+    name='ids',
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.QUERY,
+    description='Comma-separated parking lot ids',
+    required=True
+)
+
 # Filter Parameters
 MIN_PRICE_PARAM = OpenApiParameter(
     name='min_price',
@@ -110,4 +118,28 @@ STATUS_PARAM = OpenApiParameter(
     location=OpenApiParameter.QUERY,
     description='Filter bookings by status',
     enum=['pending', 'confirmed', 'active', 'completed', 'cancelled', 'expired']
-)
\ No newline at end of file
+)
+
+# Dashboard Parameters
+START_DATE_PARAM = OpenApiParameter(
+    name='start_date',
+    type=OpenApiTypes.DATE,
+    location=OpenApiParameter.QUERY,
+    description='First day of the statistics (defaults to 29 days before end_date)'
+)
+
+END_DATE_PARAM = OpenApiParameter(
+    name='end_date',
+    type=OpenApiTypes.DATE,
+    location=OpenApiParameter.QUERY,
+    description='Last day of the statistics (defaults to today)'
+)
+
+# Demand Parameters
+PRECISION_PARAM = OpenApiParameter(
+    name='precision',
+    type=OpenApiTypes.INT,
+    location=OpenApiParameter.QUERY,
+    description='Geohash length of the heatmap cells, from 1 (continent) to 6 (about 1 km)',
+    default=6
+)
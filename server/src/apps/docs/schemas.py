@@ -4,6 +4,7 @@ Centralized location for all API response/request schemas
 """
 from rest_framework import serializers
 from apps.user.serializers import UserProfileSerializer
+from apps.core.serializers import BookingSerializer, ExtendSessionSerializer
 
 # User Authentication Schemas
 class UserAuthResponseSchema(serializers.Serializer):
@@ -40,9 +41,8 @@ class BookingsResponseSchema(serializers.Serializer):
         )
     )
 
-class ExtendSessionRequestSchema(serializers.Serializer):
+class ExtendSessionRequestSchema(ExtendSessionSerializer):
     """Schema for extend session request"""
-    hours = serializers.FloatField(help_text="Number of hours to extend", default=1)
 
 class ExtendSessionResponseSchema(serializers.Serializer):
     """Schema for extend session response"""
@@ -55,16 +55,75 @@ class CancelBookingResponseSchema(serializers.Serializer):
     """Schema for cancel booking response"""
     message = serializers.CharField()
 
+class BulkBookingResultSchema(serializers.Serializer):
+    """Schema for the outcome of one item of a bulk booking request"""
+    index = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=['created', 'rejected', 'skipped'])
+    booking = BookingSerializer(required=False)
+    errors = serializers.DictField(required=False)
+
+class BulkBookingResponseSchema(serializers.Serializer):
+    """Schema for bulk booking response"""
+    created = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+    results = BulkBookingResultSchema(many=True)
+
 # Parking Lot Schemas
+class ParkingLotImportRequestSchema(serializers.Serializer):
+    """Schema for parking lot import request"""
+    file = serializers.FileField(help_text="CSV, GeoJSON FeatureCollection or NDJSON file")
+    format = serializers.ChoiceField(choices=['csv', 'geojson', 'ndjson'], required=False,
+                                     help_text="Defaults to the file extension")
+
+class QuoteResponseSchema(serializers.Serializer):
+    """Schema for parking lot price quote response"""
+    spot = serializers.UUIDField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    duration_hours = serializers.DecimalField(max_digits=6, decimal_places=2)
+    total_price = serializers.DecimalField(max_digits=8, decimal_places=2)
+
+class BulkParkingLotUpdateResponseSchema(serializers.Serializer):
+    """Schema for bulk parking lot update response"""
+    updated = serializers.IntegerField()
+
+class NotFoundIdsResponseSchema(serializers.Serializer):
+    """Schema for errors listing ids that were not found"""
+    error = serializers.CharField()
+    ids = serializers.ListField(child=serializers.UUIDField())
+
+class ImportErrorSchema(serializers.Serializer):
+    """Schema for one rejected row of an import"""
+    line = serializers.IntegerField()
+    errors = serializers.DictField()
+
+class ParkingLotImportResponseSchema(serializers.Serializer):
+    """Schema for parking lot import response"""
+    rows = serializers.IntegerField()
+    imported = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors = ImportErrorSchema(many=True)
+    elapsed = serializers.FloatField()
+    rows_per_second = serializers.FloatField()
+
+class AvailabilityIntervalSchema(serializers.Serializer):
+    """Schema for a run of constant occupancy"""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    booked = serializers.IntegerField()
+    available = serializers.IntegerField()
+
+class LotAvailabilitySchema(serializers.Serializer):
+    """Schema for the availability of one parking lot"""
+    spot_id = serializers.UUIDField()
+    capacity = serializers.IntegerField()
+    intervals = AvailabilityIntervalSchema(many=True)
+
 class ParkingLotAvailabilityResponseSchema(serializers.Serializer):
     """Schema for parking lot availability response"""
-    spot_id = serializers.UUIDField()
-    date = serializers.DateField()
-    booked_slots = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.DateTimeField()
-        )
-    )
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    lots = LotAvailabilitySchema(many=True)
 
 # Dashboard Schemas
 class UserStatsSchema(serializers.Serializer):
@@ -73,13 +132,38 @@ class UserStatsSchema(serializers.Serializer):
     active_bookings = serializers.IntegerField()
     upcoming_bookings = serializers.IntegerField()
 
+class LotStatsSchema(serializers.Serializer):
+    """Schema for the statistics of one owned lot"""
+    spot = serializers.UUIDField()
+    title = serializers.CharField()
+    bookings = serializers.IntegerField()
+    cancelled = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    occupied_hours = serializers.DecimalField(max_digits=12, decimal_places=2)
+    occupancy_rate = serializers.FloatField()
+
+class DailyStatsSchema(serializers.Serializer):
+    """Schema for the statistics of one day over all owned lots"""
+    day = serializers.DateField()
+    bookings = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    occupied_hours = serializers.DecimalField(max_digits=12, decimal_places=2)
+
 class OwnerStatsSchema(serializers.Serializer):
     """Schema for owner statistics"""
     owned_spots = serializers.IntegerField()
     total_earnings = serializers.DecimalField(max_digits=10, decimal_places=2)
+    bookings = serializers.IntegerField()
+    cancelled = serializers.IntegerField()
+    occupied_hours = serializers.DecimalField(max_digits=12, decimal_places=2)
+    occupancy_rate = serializers.FloatField()
+    lots = LotStatsSchema(many=True)
+    days = DailyStatsSchema(many=True)
 
 class DashboardStatsResponseSchema(serializers.Serializer):
     """Schema for dashboard stats response"""
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
     user_stats = UserStatsSchema()
     owner_stats = OwnerStatsSchema()
 
@@ -89,6 +173,21 @@ class SearchResultsSchema(serializers.Serializer):
     count = serializers.IntegerField()
     results = serializers.ListField()  # Will be populated with ParkingLotListSerializer
 
+# Demand Schemas
+class DemandCellSchema(serializers.Serializer):
+    """Schema for one heatmap cell"""
+    cell = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    bookings = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    occupied_hours = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+class DemandHeatmapResponseSchema(serializers.Serializer):
+    """Schema for demand heatmap response"""
+    count = serializers.IntegerField()
+    cells = DemandCellSchema(many=True)
+
 # Error Schemas
 class ErrorResponseSchema(serializers.Serializer):
     """Standard error response schema"""
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class UserConfig(AppConfig):
+    name = 'apps.user'
+    label = 'user'
+
+    def ready(self):
+        from django.contrib.auth.models import update_last_login
+        from django.contrib.auth.signals import user_logged_in
+        from apps.user.last_login import user_logged_in_receiver
+
+        # last_login is written in batches instead of one save per login
+        user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+        user_logged_in.connect(user_logged_in_receiver, dispatch_uid='update_last_login')
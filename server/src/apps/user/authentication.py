@@ -0,0 +1,101 @@
+"""
+JWT authentication without a user query
+
+``StatelessJWTAuthentication`` builds ``request.user`` from the claims of the
+access token: the id, the email and the ``is_staff`` / ``is_active`` flags
+put there by ``UserRefreshToken``. The other fields are deferred, and the
+first one a view touches loads all of them at once, from a per-process cache
+kept ``AUTH_USER_CACHE_SECONDS`` or from the database. Views that only filter
+by the user, which is most of them, never query for it.
+
+Claims are as fresh as the access token: a deactivated user or a revoked
+staff flag takes effect when the token expires (the refresh endpoint reads
+them again). For the same reason such a user is only saved with
+``update_fields``: a full save would write the token's flags and the cached
+fields back over newer ones. Tokens issued without the claims are
+authenticated the usual way, with a user query.
+"""
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+# Claims a user can be built from, besides the user id
+CLAIM_FIELDS = ('email', 'is_staff', 'is_active')
+
+_users = {}
+
+
+def _fields(pk):
+    """Values of every concrete field of user ``pk``, from the cache when still fresh"""
+    now = time.monotonic()
+    entry = _users.get(pk)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    fields = User._base_manager.filter(pk=pk).values(*(field.attname for field in User._meta.concrete_fields)).first()
+    if fields is None:
+        raise User.DoesNotExist("User matching query does not exist.")
+    _users.pop(pk, None)
+    while len(_users) >= settings.AUTH_USER_CACHE_SIZE:
+        # Oldest loaded first
+        _users.pop(next(iter(_users)), None)
+    _users[pk] = (now + settings.AUTH_USER_CACHE_SECONDS, fields)
+    return fields
+
+
+def load_deferred(user, attnames):
+    """Fill the deferred fields of a user built from claims"""
+    fields = _fields(user.pk)
+    for attname in attnames:
+        user.__dict__[attname] = fields[attname]
+
+
+def invalidate(pk=None):
+    """Forget the cached fields of user ``pk``, or of every user"""
+    if pk is None:
+        _users.clear()
+    else:
+        _users.pop(pk, None)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    invalidate(instance.pk)
+
+
+def user_from_claims(validated_token):
+    """User with the token's fields loaded and the others deferred, or None
+    when the token was issued without the claims"""
+    if any(claim not in validated_token for claim in CLAIM_FIELDS):
+        return None
+    claims = {field: validated_token[field] for field in CLAIM_FIELDS}
+    id_field = User._meta.get_field(api_settings.USER_ID_FIELD)
+    claims[id_field.attname] = id_field.to_python(validated_token[api_settings.USER_ID_CLAIM])
+
+    concrete = [field.attname for field in User._meta.concrete_fields if field.attname in claims]
+    user = User.from_db(User.objects.db, concrete, [claims[attname] for attname in concrete])
+    user.from_claims = True
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_from_claims(validated_token)
+        if user is None:
+            return super().get_user(validated_token)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,188 @@
+"""
+Bloom filter in front of the token blacklist
+
+With rotation every refresh checks the presented token against
+``token_blacklist_blacklistedtoken``, and nearly every check finds nothing.
+Each process keeps a Bloom filter of the JTIs of blacklisted tokens that have
+not expired yet (expired tokens are rejected before the blacklist matters),
+and only tokens the filter may hold are looked up in the database. A Bloom
+filter has no false negatives, so a blacklisted token is always caught as
+long as the filter has seen it.
+
+Blacklisting a token adds it to the local filter and, once the row is
+committed, publishes its JTI in the ``TOKEN_BLACKLIST_CACHE`` cache under the
+next value of a generation counter. A check that sees a new generation adds
+the JTIs published since its own with one ``get_many``, so rotating tokens
+costs other workers no database read. A process only reads the blacklist
+rows when published JTIs are missing (expired, evicted, or just being
+written) or it fell more than ``PUBLISHED_BATCH`` behind, and every
+``TOKEN_BLACKLIST_SYNC_SECONDS`` in case a publication was lost. A cache of
+each process (local memory, dummy) would hide the publications from the
+other workers, so with one the filter is skipped and every token is looked
+up. The filter is rebuilt from scratch every hour, or sooner once it holds
+more JTIs than it was sized for, which also drops the tokens pruned in the
+meantime.
+"""
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+GENERATION_KEY = 'token_blacklist:generation'
+PUBLISHED_KEY = 'token_blacklist:jti:{}'
+# Published JTIs a check reads at once; further behind, it reads the rows
+PUBLISHED_BATCH = 1000
+ERROR_RATE = 0.001
+REBUILD_SECONDS = 3600
+# Row ids are taken at insert but rows show up at commit, so a sync reads the
+# last rows again in case one committed after a higher id was read
+REREAD_ROWS = 1000
+# Caches other workers do not see
+PROCESS_CACHES = (LocMemCache, DummyCache)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings"""
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        # Double hashing: k positions from two 64-bit halves
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, item):
+        if item in self:
+            return
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class _Blacklist:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.last_id = 0
+        self.generation = None
+        self.synced_at = 0.0
+        self.built_at = 0.0
+
+    def _rows(self, after_id=0):
+        return BlacklistedToken.objects.filter(
+            id__gt=after_id, token__expires_at__gt=timezone.now()
+        ).order_by('id').values_list('id', 'token__jti')
+
+    def _rebuild(self):
+        rows = list(self._rows())
+        # Room to grow until the next rebuild
+        bloom = BloomFilter(max(len(rows) * 2, settings.TOKEN_BLACKLIST_FILTER_CAPACITY))
+        for _, jti in rows:
+            bloom.add(jti)
+        self.filter = bloom
+        self.last_id = rows[-1][0] if rows else self.last_id
+        self.built_at = time.monotonic()
+
+    def _sync(self, generation):
+        now = time.monotonic()
+        if (
+            self.filter is None
+            or now - self.built_at >= REBUILD_SECONDS
+            or self.filter.count >= self.filter.capacity
+        ):
+            self._rebuild()
+        else:
+            for row_id, jti in self._rows(self.last_id - REREAD_ROWS):
+                self.filter.add(jti)
+                self.last_id = max(self.last_id, row_id)
+        self.generation = generation
+        self.synced_at = now
+
+    def _read_published(self, cache, generation):
+        """Add the JTIs published after our generation up to ``generation``;
+        False when some of them are gone"""
+        keys = [PUBLISHED_KEY.format(number) for number in range(self.generation + 1, generation + 1)]
+        published = cache.get_many(keys)
+        for jti in published.values():
+            self.filter.add(jti)
+        if len(published) < len(keys):
+            return False
+        self.generation = generation
+        return True
+
+    def may_contain(self, jti):
+        cache = caches[settings.TOKEN_BLACKLIST_CACHE]
+        if isinstance(cache, PROCESS_CACHES):
+            return True
+        generation = cache.get(GENERATION_KEY, 0)
+        with self.lock:
+            if (
+                self.filter is None
+                or time.monotonic() - self.synced_at >= settings.TOKEN_BLACKLIST_SYNC_SECONDS
+                or not self.generation <= generation <= self.generation + PUBLISHED_BATCH
+                or (generation != self.generation and not self._read_published(cache, generation))
+            ):
+                self._sync(generation)
+            return jti in self.filter
+
+    def publish(self, jti):
+        cache = caches[settings.TOKEN_BLACKLIST_CACHE]
+        cache.add(GENERATION_KEY, 0, timeout=None)
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            # Evicted between add and incr: starting over sends everyone to the rows
+            generation = 1
+            cache.set(GENERATION_KEY, generation, timeout=None)
+        cache.set(PUBLISHED_KEY.format(generation), jti, timeout=REBUILD_SECONDS)
+        with self.lock:
+            if self.filter is not None and generation == self.generation + 1:
+                # Our own, already in the filter
+                self.generation = generation
+
+    def added(self, jti):
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+        # Published once the row is visible, so a process that reads the rows
+        # for a publication it cannot find finds the row
+        transaction.on_commit(lambda: self.publish(jti))
+
+    def reset(self):
+        with self.lock:
+            self.filter = None
+
+
+_blacklist = _Blacklist()
+
+
+def may_be_blacklisted(jti):
+    """False when the token with ``jti`` is certainly not blacklisted"""
+    return _blacklist.may_contain(jti)
+
+
+def blacklisted(jti):
+    """Note a token just written to the blacklist"""
+    _blacklist.added(jti)
+
+
+def reset():
+    """Rebuild this process' filter on the next check"""
+    _blacklist.reset()
@@ -0,0 +1,65 @@
+"""
+Password hashers with their cost taken from settings
+
+Django's hashers fix their cost in class attributes; these read it from the
+``PASSWORD_SCRYPT_*`` and ``PASSWORD_ARGON2_*`` settings so it can be tuned
+per deployment. Stored hashes record the parameters they were made with, so
+changing a setting makes ``must_update`` true for older hashes and they are
+hashed again on the next successful login.
+"""
+import base64
+import hashlib
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+def scrypt_maxmem(n, r, p):
+    """Memory limit letting OpenSSL run scrypt(n, r, p): its 128 * r * (n + p + 2)
+    bytes, and a MiB to spare. Django's default (0) means OpenSSL's 32 MiB,
+    which stops at n=2**14, r=8"""
+    return 128 * r * (n + p + 2) + 2 ** 20
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt; memory per hash is 128 * work_factor * block_size bytes"""
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # Django's, with a memory limit fitting the parameters of this hash,
+        # which may be a stored one made with a higher cost
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=scrypt_maxmem(n, r, p), dklen=64
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """argon2id, which needs argon2-cffi (the argon2 extra)"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
@@ -0,0 +1,114 @@
+"""
+Password hashing off the request thread
+
+Hashing a password is deliberately expensive, and a burst of logins (after an
+outage, or the morning rush) can keep every worker busy hashing. Logins and
+registrations hand the hashing to a per-process pool of
+``PASSWORD_HASH_WORKERS`` threads; hashlib's PBKDF2 and scrypt, and argon2-cffi,
+release the GIL, so the threads hash in parallel while the request threads
+keep serving other requests. At most ``PASSWORD_HASH_QUEUE`` hashes wait for a
+thread; past that, or after ``PASSWORD_HASH_TIMEOUT`` seconds, the request is
+answered with 503 instead of piling up.
+
+Only the hash runs in the pool; reading and saving the user stay on the
+request thread and its database connection.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import ModelBackend
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+User = get_user_model()
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, try again shortly."
+    default_code = 'password_hashing_busy'
+
+
+class _Pool:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def _start(self):
+        # Created lazily, and again in forked workers
+        with self.lock:
+            if self.pid != os.getpid():
+                self.executor = ThreadPoolExecutor(settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+                self.slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE)
+                self.pid = os.getpid()
+
+    def run(self, function, *args):
+        if self.pid != os.getpid():
+            self._start()
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        slots = self.slots
+
+        def task():
+            # The slot is held until the hash is done, even when the request gave up
+            try:
+                return function(*args)
+            finally:
+                slots.release()
+
+        future = self.executor.submit(task)
+        try:
+            return future.result(timeout=settings.PASSWORD_HASH_TIMEOUT)
+        except TimeoutError:
+            raise PasswordHashingBusy()
+
+
+_pool = _Pool()
+
+
+@receiver(setting_changed)
+def _pool_settings_changed(setting, **kwargs):
+    if setting.startswith('PASSWORD_HASH_'):
+        _pool.pid = None
+
+
+def make_password(password):
+    """``django.contrib.auth.hashers.make_password`` in the pool"""
+    return _pool.run(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """``user.check_password`` with the hash in the pool.
+
+    A password stored with another hasher than the preferred one, or with
+    other cost parameters, is hashed again and saved on success.
+    """
+    is_correct, must_update = _pool.run(hashers.verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = make_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend hashing in the pool"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway, so unknown and known users take as long
+            make_password(password)
+            return None
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
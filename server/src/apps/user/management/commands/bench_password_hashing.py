@@ -0,0 +1,47 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password, verify_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from apps.user import hashing
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = "Measure password verifications per second per core for each hasher, directly and through the hashing pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=50, help="Verifications per hasher and path")
+        parser.add_argument('--clients', type=int, default=32, help="Concurrent request threads using the pool")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        cores = os.cpu_count() or 1
+        self.stdout.write(f"{cores} cores, pool of {settings.PASSWORD_HASH_WORKERS} threads")
+
+        for name, path in settings.PASSWORD_HASHER_CLASSES.items():
+            with override_settings(PASSWORD_HASHERS=[path]):
+                try:
+                    get_hasher().encode(PASSWORD, get_hasher().salt())
+                except ValueError as error:
+                    self.stdout.write(self.style.WARNING(f"{name}: skipped ({error})"))
+                    continue
+                encoded = make_password(PASSWORD)
+
+                started = time.perf_counter()
+                for _ in range(count):
+                    verify_password(PASSWORD, encoded)
+                single = count / (time.perf_counter() - started)
+
+                with ThreadPoolExecutor(options['clients']) as clients:
+                    started = time.perf_counter()
+                    list(clients.map(lambda _: hashing._pool.run(verify_password, PASSWORD, encoded), range(count)))
+                    pooled = count / (time.perf_counter() - started)
+
+            self.stdout.write(
+                f"{name:<7} one thread: {single:8.1f} logins/s   "
+                f"pool: {pooled:8.1f} logins/s ({pooled / min(cores, settings.PASSWORD_HASH_WORKERS):.1f} per core)"
+            )
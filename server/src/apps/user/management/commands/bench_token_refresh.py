@@ -0,0 +1,108 @@
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.user import blacklist
+from apps.user.tokens import UserRefreshToken
+
+User = get_user_model()
+
+SEED_SQL = f"""
+WITH outstanding AS (
+    INSERT INTO {OutstandingToken._meta.db_table} (jti, token, created_at, expires_at)
+    SELECT md5(%(prefix)s || n), '', now(), now() + interval '7 days'
+    FROM generate_series(1, %(count)s) AS n
+    RETURNING id
+)
+INSERT INTO {BlacklistedToken._meta.db_table} (token_id, blacklisted_at)
+SELECT id, now() FROM outstanding
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure refresh token blacklist checks against a large blacklist, with and without the Bloom filter (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--blacklisted', type=int, default=1000000, help="Blacklisted tokens seeded first")
+        parser.add_argument('--count', type=int, default=2000, help="Refresh tokens checked by each path")
+
+    def rotate(self, token_class, tokens, publisher=None):
+        """Refreshes with rotation: check each token, then blacklist it. The
+        publications a commit would send go out through ``publisher``, standing
+        for the other workers. Returns the seconds and queries taken"""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for token in tokens:
+                refresh = token_class(token)
+                refresh.blacklist()
+                if publisher is not None:
+                    publisher.publish(refresh['jti'])
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        if isinstance(caches[settings.TOKEN_BLACKLIST_CACHE], blacklist.PROCESS_CACHES):
+            raise CommandError("The Bloom filter needs a shared TOKEN_BLACKLIST_CACHE (set REDIS_URL)")
+        count = options['count']
+        with transaction.atomic():
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute(SEED_SQL, {'prefix': uuid.uuid4().hex, 'count': options['blacklisted']})
+                cursor.execute(f'ANALYZE {OutstandingToken._meta.db_table}')
+                cursor.execute(f'ANALYZE {BlacklistedToken._meta.db_table}')
+            self.stdout.write(f"seeded {options['blacklisted']:,} blacklisted tokens in {time.perf_counter() - started:.1f}s")
+
+            user = User.objects.create_user(
+                email=f'bench-{uuid.uuid4().hex}@example.com', username=f'bench-{uuid.uuid4().hex}',
+                first_name='Bench', last_name='Mark', password=None
+            )
+            tokens = [str(UserRefreshToken.for_user(user)) for _ in range(count)]
+
+            started = time.perf_counter()
+            for token in tokens:
+                RefreshToken(token)
+            database = time.perf_counter() - started
+
+            blacklist.reset()
+            started = time.perf_counter()
+            UserRefreshToken(tokens[0])
+            build = time.perf_counter() - started
+            started = time.perf_counter()
+            for token in tokens:
+                UserRefreshToken(token)
+            bloom = time.perf_counter() - started
+
+            # Rolled back: publications on commit never go out, so another
+            # worker's filter publishes them instead
+            database_rotation = self.rotate(RefreshToken, [str(UserRefreshToken.for_user(user)) for _ in range(count)])
+            bloom_rotation = self.rotate(
+                UserRefreshToken, [str(UserRefreshToken.for_user(user)) for _ in range(count)], blacklist._Blacklist()
+            )
+
+            revoked = UserRefreshToken(tokens[0])
+            revoked.blacklist()
+            try:
+                UserRefreshToken(tokens[0])
+                caught = False
+            except TokenError:
+                caught = True
+
+            transaction.set_rollback(True)
+        blacklist.reset()
+
+        self.stdout.write(f"database lookup: {count / database:,.0f} checks/s")
+        self.stdout.write(f"bloom filter:    {count / bloom:,.0f} checks/s (filter built in {build:.2f}s)")
+        for name, (elapsed, queries) in (('database lookup', database_rotation), ('bloom filter', bloom_rotation)):
+            self.stdout.write(
+                f"{name + ', rotating:':<26} {count / elapsed:,.0f} refreshes/s, {queries / count:.1f} queries each"
+            )
+        if not caught:
+            self.stdout.write(self.style.ERROR("a blacklisted token was accepted"))
+        self.stdout.write(self.style.SUCCESS(f"speedup x{database / bloom:.1f}"))
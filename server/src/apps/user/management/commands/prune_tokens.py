@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+# Both tables in one statement: blacklist rows reference the outstanding
+# tokens, and Django's foreign keys are only checked at commit
+PRUNE_SQL = f"""
+WITH batch AS (
+    SELECT id FROM {OutstandingToken._meta.db_table}
+    WHERE expires_at <= %(now)s
+    ORDER BY expires_at, id
+    LIMIT %(batch_size)s
+),
+blacklisted AS (
+    DELETE FROM {BlacklistedToken._meta.db_table} WHERE token_id IN (SELECT id FROM batch)
+)
+DELETE FROM {OutstandingToken._meta.db_table} WHERE id IN (SELECT id FROM batch)
+"""
+
+
+def prune(batch_size, now=None):
+    """Delete expired outstanding tokens and their blacklist rows, one
+    transaction per batch; returns the number of tokens deleted"""
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(PRUNE_SQL, {'now': now, 'batch_size': batch_size})
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted JWT refresh tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="Tokens deleted per transaction")
+        parser.add_argument('--loop', action='store_true', help="Keep running a pass every --interval seconds")
+        parser.add_argument('--interval', type=float, default=3600, help="Seconds between passes in --loop mode")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            deleted = prune(options['batch_size'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"deleted={deleted} elapsed={elapsed:.3f}s")
+
+            if not options['loop']:
+                return
+            try:
+                time.sleep(max(0, options['interval'] - elapsed))
+            except KeyboardInterrupt:
+                return
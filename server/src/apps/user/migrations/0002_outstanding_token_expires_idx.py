@@ -0,0 +1,23 @@
+from django.db import migrations
+
+# prune_tokens deletes outstanding tokens by expiry in batches; without an
+# index every batch scans the whole table. The table belongs to
+# token_blacklist, so the index is added here.
+CREATE_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS outstanding_token_expires_idx
+    ON token_blacklist_outstandingtoken (expires_at, id);
+"""
+
+DROP_INDEX_SQL = "DROP INDEX IF EXISTS outstanding_token_expires_idx;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0001_initial"),
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX_SQL, DROP_INDEX_SQL),
+    ]
@@ -1,6 +1,15 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from apps.common.models import BaseModel
 from django.db import models
+from django.db.models.functions import Lower
+
+
+class UserManager(DjangoUserManager):
+
+    def get_by_natural_key(self, username):
+        # Emails are unique regardless of case; this matches user_email_ci_uniq
+        return self.alias(email_lower=Lower('email')).get(email_lower=username.lower())
+
 
 class User(AbstractUser, BaseModel):
     email = models.EmailField(unique=True)
@@ -10,12 +19,36 @@ class User(AbstractUser, BaseModel):
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     # profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
 
+    objects = UserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='user_email_ci_uniq'),
+        ]
+
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        if getattr(self, 'from_claims', False) and kwargs.get('update_fields') is None:
+            # Its flags come from the token and the other fields from a cache;
+            # saving them all would undo changes made since
+            raise ValueError("A user built from token claims can only be saved with update_fields")
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if getattr(self, 'from_claims', False) and fields and deferred.issuperset(fields) and from_queryset is None:
+            # Built from token claims: the first deferred field touched loads
+            # all of them, from the authentication cache
+            from apps.user.authentication import load_deferred
+            load_deferred(self, deferred)
+            return
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
@@ -1,7 +1,15 @@
+from contextlib import nullcontext
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, connection, transaction
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from apps.user import hashing, last_login
+from apps.user.tokens import ReissuedRefreshToken
 
 User = get_user_model()
 
@@ -15,30 +23,54 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('email', 'username', 'first_name', 'last_name', 'password', 'password_confirm')
+        # Uniqueness is left to the database, see create
+        extra_kwargs = {
+            'email': {'validators': []},
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
 
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Passwords don't match.")
         return attrs
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
-
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # create_user, with the password hashed in the pool
+        user = User(**validated_data)
+        user.email = User.objects.normalize_email(user.email)
+        user.username = User.normalize_username(user.username)
+        user.password = hashing.make_password(password)
+
+        # One INSERT: taken emails and usernames surface as unique violations,
+        # which also settles concurrent signups. Inside a transaction the
+        # violation must not abort it, hence the savepoint.
+        try:
+            with transaction.atomic() if connection.in_atomic_block else nullcontext():
+                user.save(force_insert=True)
+        except IntegrityError as error:
+            field = self.unique_violation_field(error)
+            if field is None:
+                raise
+            raise serializers.ValidationError({field: [f"A user with this {field} already exists."]})
         return user
 
+    @staticmethod
+    def unique_violation_field(error):
+        """Field whose unique constraint ``error`` violated, if any"""
+        diag = getattr(error.__cause__, 'diag', None)
+        constraint = getattr(diag, 'constraint_name', None) or ''
+        for field in ('email', 'username'):
+            if field in constraint:
+                return field
+        return None
+
+
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField()
+    session = serializers.BooleanField(default=False, help_text="Also start a Django session (browsable API, admin)")
 
     def validate(self, attrs):
         email = attrs.get('email')
@@ -78,3 +110,12 @@ class ChangePasswordSerializer(serializers.Serializer):
         if not user.check_password(value):
             raise serializers.ValidationError("Old password is incorrect.")
         return value
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ReissuedRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # A refresh counts as a login for last_login
+        last_login.record(UntypedToken(data['access'])[api_settings.USER_ID_CLAIM])
+        return data
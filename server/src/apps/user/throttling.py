@@ -0,0 +1,145 @@
+"""
+Token buckets in front of login and registration
+
+Both endpoints are open to anyone and end in a password hash, so a burst of
+credential stuffing turns straight into CPU. Every attempt takes a token from
+the bucket of the client's IP and, for logins, from the bucket of the
+normalized email; an empty bucket answers 429 with ``Retry-After`` before the
+view runs, so nothing is hashed. The client's IP is the peer address unless
+``NUM_PROXIES`` trusted proxies put it in ``X-Forwarded-For``; a header the
+client wrote itself would give it a new bucket per request. A bucket holds up
+to ``<burst>`` tokens and refills evenly over ``<period>``
+(``LOGIN_THROTTLE_RATES``), and is stored as two numbers: the tokens left and
+when they were counted.
+
+Without ``LOGIN_THROTTLE_CACHE`` the buckets live in each process, the least
+recently used dropped past ``LOGIN_THROTTLE_MAX_KEYS`` (a dropped bucket is
+simply full again). Several workers should share a cache instead: each then
+enforces the same limits, and buckets expire from the cache once they would
+be full. Reading and writing a bucket in a shared cache is not atomic, so
+concurrent attempts of the same client may now and then take one token
+between them.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+from apps.common import metrics
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'5/min'`` -> (burst 5, 5 tokens per 60 seconds), None -> None"""
+    if not rate:
+        return None
+    burst, period = rate.split('/')
+    return int(burst), int(burst) / PERIODS[period[0]]
+
+
+def take_token(state, now, burst, per_second):
+    """Take a token from a bucket in ``state`` (tokens, counted at) or a new
+    one; returns whether one was left, the new state, and the seconds until
+    the next token"""
+    tokens, counted_at = state or (burst, now)
+    tokens = min(burst, tokens + (now - counted_at) * per_second)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0.0
+    return False, (tokens, now), (1 - tokens) / per_second
+
+
+class LocalBuckets:
+    """Per-process buckets, least recently used dropped first"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def take(self, key, burst, per_second):
+        now = time.monotonic()
+        with self.lock:
+            allowed, state, wait = take_token(self.buckets.pop(key, None), now, burst, per_second)
+            self.buckets[key] = state
+            while len(self.buckets) > settings.LOGIN_THROTTLE_MAX_KEYS:
+                self.buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBuckets:
+    """Buckets in a Django cache shared by the workers"""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, burst, per_second):
+        cache = caches[self.alias]
+        # Wall clock, the same in every worker
+        allowed, state, wait = take_token(cache.get(key), time.time(), burst, per_second)
+        cache.set(key, state, timeout=math.ceil(burst / per_second))
+        return allowed, wait
+
+
+_local = LocalBuckets()
+
+
+def buckets():
+    if settings.LOGIN_THROTTLE_CACHE:
+        return CacheBuckets(settings.LOGIN_THROTTLE_CACHE)
+    return _local
+
+
+def reset():
+    """Refill this process' buckets"""
+    _local.clear()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Takes a token from the bucket of every scope in ``scopes`` that has a
+    rate and a key for the request"""
+    scopes = ()
+
+    def get_key(self, request, scope):
+        if scope.endswith('_ip'):
+            return self.get_ident(request)
+        return None
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        for scope in self.scopes:
+            rate = parse_rate(settings.LOGIN_THROTTLE_RATES.get(scope))
+            key = self.get_key(request, scope)
+            if rate is None or key is None:
+                continue
+            allowed, self.wait_seconds = buckets().take(f'throttle:{scope}:{key}', *rate)
+            if not allowed:
+                metrics.inc('auth_throttled_total', scope=scope)
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scopes = ('login_ip', 'login_email')
+
+    def get_key(self, request, scope):
+        if scope == 'login_email':
+            email = request.data.get('email') if hasattr(request.data, 'get') else None
+            if not isinstance(email, str) or not email.strip():
+                return None
+            # Hashed: fixed length, safe in any cache key, and no addresses in the cache
+            return hashlib.blake2b(email.strip().lower().encode(), digest_size=16).hexdigest()
+        return super().get_key(request, scope)
+
+
+class RegistrationThrottle(TokenBucketThrottle):
+    scopes = ('register_ip',)
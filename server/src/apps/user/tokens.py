@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.user.blacklist import blacklisted, may_be_blacklisted
+
+User = get_user_model()
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh token carrying the claims ``StatelessJWTAuthentication`` builds
+    users from; access tokens copy them"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def check_blacklist(self):
+        # Only tokens the Bloom filter may hold are looked up
+        if may_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklisted(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+    def set_user_claims(self, user):
+        self['email'] = user.email
+        self['is_staff'] = user.is_staff
+        self['is_active'] = user.is_active
+
+
+class ReissuedRefreshToken(UserRefreshToken):
+    """A refresh token presented for new tokens: the user claims are read again,
+    so a changed email or flag reaches the next access token"""
+
+    def __init__(self, token=None, verify=True):
+        super().__init__(token, verify)
+        if token is None:
+            return
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: self.payload.get(api_settings.USER_ID_CLAIM)}
+        ).only('email', 'is_staff', 'is_active').first()
+        if user is not None:
+            self.set_user_claims(user)
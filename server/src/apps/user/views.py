@@ -2,9 +2,11 @@ from rest_framework import status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import login, logout, get_user_model
+from django.contrib.auth.signals import user_logged_in
 
+from apps.user.throttling import LoginThrottle, RegistrationThrottle
+from apps.user.tokens import UserRefreshToken
 from apps.user.serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
@@ -34,6 +36,14 @@ class UserViewSet(ModelViewSet):
         
         return super().get_permissions()
 
+    def get_throttles(self):
+        # Checked before the view runs, so throttled attempts hash nothing
+        if self.action == 'create':
+            return [RegistrationThrottle()]
+        elif self.action == 'login':
+            return [LoginThrottle()]
+        return super().get_throttles()
+
     def get_serializer_class(self):
         if self.action == 'create':
             return UserRegistrationSerializer
@@ -49,7 +59,7 @@ class UserViewSet(ModelViewSet):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             return Response({
                 'message': 'User registered successfully',
                 'user': UserProfileSerializer(user).data,
@@ -65,8 +75,12 @@ class UserViewSet(ModelViewSet):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
-            login(request, user)
+            refresh = UserRefreshToken.for_user(user)
+            if serializer.validated_data['session']:
+                login(request, user)
+            else:
+                # JWT clients get no session; last_login is still recorded
+                user_logged_in.send(sender=user.__class__, request=request, user=user)
             return Response({
                 'message': 'Login successful',
                 'user': UserProfileSerializer(user).data,
@@ -86,7 +100,7 @@ class UserViewSet(ModelViewSet):
                     'error': 'Refresh token is required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            token = RefreshToken(refresh_token)
+            token = UserRefreshToken(refresh_token)
             token.blacklist()
             logout(request)
             return Response({
@@ -114,7 +128,8 @@ class UserViewSet(ModelViewSet):
         if serializer.is_valid():
             user = request.user
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            # request.user holds token claims and cached fields: write the password only
+            user.save(update_fields=['password'])
             return Response({
                 'message': 'Password changed successfully'
             }, status=status.HTTP_200_OK)
@@ -0,0 +1,46 @@
+"""
+Gunicorn settings for production serving
+
+``gunicorn -c src/config/gunicorn.py`` serves ``config.asgi`` with uvicorn
+workers, one event loop per process, so the async views (nearby, search,
+booking reads) wait on the database without holding a thread.
+``SERVER_MODE=wsgi`` serves ``config.wsgi`` with threaded sync workers
+instead, for comparison (``manage.py benchmark_serving``) or as a fallback.
+
+Every worker is a separate process with its own caches, throttle buckets and
+metrics: run it with ``REDIS_URL`` (a shared cache), ``LOGIN_THROTTLE_CACHE``
+and ``METRICS_DIR`` set, and with ``DB_POOL`` under ASGI, where persistent
+connections are not reused.
+"""
+import multiprocessing
+import os
+from pathlib import Path
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'asgi')
+
+chdir = str(Path(__file__).resolve().parent.parent)
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+# Event loops only need one process per core; sync workers also have threads
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('WEB_THREADS', 4))
+else:
+    raise ValueError(f"SERVER_MODE must be asgi or wsgi, not {SERVER_MODE!r}")
+
+# The app is loaded in every worker: the hashing pool, the last_login writer
+# and the database connections must not be created before the fork
+preload_app = False
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then, a few at a time
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = '-'
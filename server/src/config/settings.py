@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     "drf_spectacular",
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     'django.contrib.gis',
     'apps.user',
@@ -52,6 +53,9 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'user.User'
 
 MIDDLEWARE = [
+    'apps.common.middleware.MetricsMiddleware',
+    'apps.common.middleware.QueryInstrumentationMiddleware',
+    'apps.common.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +88,12 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection reuse: with DB_POOL every process keeps a psycopg pool (psycopg 3
+# only, and the only reuse that works under ASGI, where requests do not keep a
+# thread); otherwise each thread keeps its connection DB_CONN_MAX_AGE seconds,
+# 0 opening one per request. Reused connections are checked before use.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
@@ -92,9 +102,64 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                # Seconds a request waits for a free connection before failing
+                'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),
+                'max_idle': config('DB_POOL_MAX_IDLE', default=600.0, cast=float),
+                'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600.0, cast=float),
+            },
+        } if DB_POOL else {},
     }
 }
 
+# Read replicas (apps.common.routing): host[:port] of servers replicating the
+# default database, each becoming a replica_<n> alias. Pointing one at the
+# primary itself (DB_REPLICA_HOSTS=localhost) exercises the routing locally.
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=Csv())
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(DB_REPLICA_HOSTS, 1):
+    replica_host, _, replica_port = replica_host.partition(':')
+    DATABASE_REPLICAS.append(f'replica_{index}')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['apps.common.routing.ReplicaRouter']
+# URL names whose reads may go to a replica
+REPLICA_READ_VIEWS = [
+    'nearby-parking-spots',
+    'search-parking-spots',
+    'parkinglot-list',
+    'parkinglot-detail',
+]
+# A replica further behind than this gets no reads; checked this often per process
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=2.0, cast=float)
+REPLICA_LAG_CHECK_SECONDS = config('REPLICA_LAG_CHECK_SECONDS', default=5.0, cast=float)
+# After a write the user reads from the primary this long (cache and cookie)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+REPLICA_STICKY_COOKIE = 'db_primary_until'
+
+# Local memory by default, which is per process. With several worker processes
+# (config/gunicorn.py) point REDIS_URL at a Redis all of them share: the token
+# blacklist generation and the dashboard cache live here, and login throttles
+# with LOGIN_THROTTLE_CACHE=default.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -114,6 +179,34 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Preferred password hasher: 'scrypt', 'argon2' (the argon2 extra) or
+# 'pbkdf2'. Passwords stored with another hasher, or with other cost
+# parameters, are hashed again on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='scrypt')
+PASSWORD_HASHER_CLASSES = {
+    'scrypt': 'apps.user.hashers.TunedScryptPasswordHasher',
+    'argon2': 'apps.user.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=1, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+
+# Logins and registrations hash passwords in a bounded thread pool
+# (apps.user.hashing); requests beyond the queue get a 503
+AUTHENTICATION_BACKENDS = ['apps.user.hashing.PooledModelBackend']
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=os.cpu_count() or 1, cast=int)
+PASSWORD_HASH_QUEUE = config('PASSWORD_HASH_QUEUE', default=32, cast=int)
+PASSWORD_HASH_TIMEOUT = config('PASSWORD_HASH_TIMEOUT', default=10.0, cast=float)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -139,15 +232,29 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
+# JSON library behind the API: 'stdlib' (DRF's json renderer and parser) or
+# 'orjson' (the fast-json extra), which renders the same bytes several times faster
+JSON_BACKEND = config('JSON_BACKEND', default='stdlib')
+JSON_BACKEND_CLASSES = {
+    'stdlib': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+    'orjson': ('apps.common.renderers.ORJSONRenderer', 'apps.common.renderers.ORJSONParser'),
+}
+JSON_RENDERER, JSON_PARSER = JSON_BACKEND_CLASSES[JSON_BACKEND]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.user.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        JSON_RENDERER,
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -157,6 +264,10 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Proxies in front of the app whose X-Forwarded-For entries are trusted
+    # when throttling by client IP; 0 (served directly, as gunicorn in
+    # compose.yaml) uses the peer address and ignores the header
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # JWT Settings
@@ -165,7 +276,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is written in batches by apps.user.last_login instead
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -175,8 +287,38 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.user.serializers.UserTokenRefreshSerializer',
 }
 
+# Users authenticated from token claims load their other fields from a
+# per-process cache, kept this many seconds
+AUTH_USER_CACHE_SECONDS = config('AUTH_USER_CACHE_SECONDS', default=30, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=10000, cast=int)
+
+# Seconds between batched last_login writes; 0 writes on every login
+LAST_LOGIN_FLUSH_SECONDS = config('LAST_LOGIN_FLUSH_SECONDS', default=5.0, cast=float)
+
+# Bloom filter in front of the token blacklist (apps.user.blacklist). New
+# blacklisted JTIs are published in this cache, which must be shared by all
+# worker processes (with a per-process cache every token is looked up); each
+# process also reads new blacklist rows every SYNC_SECONDS.
+TOKEN_BLACKLIST_CACHE = config('TOKEN_BLACKLIST_CACHE', default='default')
+TOKEN_BLACKLIST_SYNC_SECONDS = config('TOKEN_BLACKLIST_SYNC_SECONDS', default=30, cast=int)
+TOKEN_BLACKLIST_FILTER_CAPACITY = config('TOKEN_BLACKLIST_FILTER_CAPACITY', default=100000, cast=int)
+
+# Token buckets in front of login and registration (apps.user.throttling), as
+# "<burst>/<period>": that many attempts at once, refilled evenly over the
+# period. An empty rate turns the scope off.
+LOGIN_THROTTLE_RATES = {
+    'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='30/min'),
+    'login_email': config('LOGIN_THROTTLE_EMAIL_RATE', default='5/min'),
+    'register_ip': config('REGISTER_THROTTLE_IP_RATE', default='10/hour'),
+}
+# Cache alias holding the buckets, shared by all workers; empty keeps them in
+# each process, at most MAX_KEYS of them
+LOGIN_THROTTLE_CACHE = config('LOGIN_THROTTLE_CACHE', default='')
+LOGIN_THROTTLE_MAX_KEYS = config('LOGIN_THROTTLE_MAX_KEYS', default=100000, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -194,4 +336,42 @@ SPECTACULAR_SETTINGS = {
     # Optional: Add authentication schemes
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': '/api/',
-}
\ No newline at end of file
+}
+# Availability timeline: days of 15-minute buckets kept per parking lot
+AVAILABILITY_TIMELINE_DAYS = config('AVAILABILITY_TIMELINE_DAYS', default=14, cast=int)
+
+# Pending bookings that are not paid within this window expire
+BOOKING_PENDING_TTL_MINUTES = config('BOOKING_PENDING_TTL_MINUTES', default=30, cast=int)
+
+# Seconds a compiled price grid is reused before its lot's rules are read again
+PRICE_GRID_TTL_SECONDS = config('PRICE_GRID_TTL_SECONDS', default=300, cast=int)
+PRICE_GRID_CACHE_SIZE = config('PRICE_GRID_CACHE_SIZE', default=10000, cast=int)
+
+# Rollups only read bookings changed at least this many seconds ago, so rows of
+# transactions still in flight are not skipped by the watermark
+ROLLUP_LAG_SECONDS = config('ROLLUP_LAG_SECONDS', default=60, cast=int)
+
+# Seconds an owner dashboard response is served from the cache
+DASHBOARD_STATS_CACHE_SECONDS = config('DASHBOARD_STATS_CACHE_SECONDS', default=60, cast=int)
+
+# Maximum queries per request, keyed by URL name (QueryInstrumentationMiddleware).
+# Over budget is a warning, or an error with QUERY_BUDGET_STRICT (tests).
+QUERY_BUDGETS = {
+    'nearby-parking-spots': 3,
+    'search-parking-spots': 6,
+    'parkinglot-availability': 3,
+    'parkinglot-quote': 3,
+    'my-spots-list': 4,
+    'my-spots-stats': 6,
+}
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=None, cast=lambda value: int(value) if value else None)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+
+# Metrics (apps.common.metrics). With several worker processes, point
+# METRICS_DIR at a directory shared by all of them and emptied on start.
+# Workers outside the server (manage.py expire_bookings --loop) need the same
+# directory for their metrics to show up in /metrics.
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_SECONDS = config('METRICS_FLUSH_SECONDS', default=1.0, cast=float)
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
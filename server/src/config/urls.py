@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.common.views import metrics_view
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -12,6 +13,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('apps.user.urls')),
     path('api/', include('apps.core.urls')),
+    path('metrics', metrics_view, name='metrics'),
 
     # Schema and documentation URLs
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
@@ -2,7 +2,7 @@ import pytest
 from django.test import Client
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
+from apps.user.tokens import UserRefreshToken
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -13,6 +13,22 @@ def django_db_setup():
     """Database setup for tests"""
     pass
 
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    """Views going over their query budget fail the test"""
+    settings.QUERY_BUDGET_STRICT = True
+
+@pytest.fixture(autouse=True)
+def immediate_last_login(settings):
+    """last_login is written on login, inside the test's transaction"""
+    settings.LAST_LOGIN_FLUSH_SECONDS = 0
+
+@pytest.fixture(autouse=True)
+def full_throttle_buckets():
+    """Every test starts with full login and registration buckets"""
+    from apps.user.throttling import reset
+    reset()
+
 @pytest.fixture
 def api_client():
     """Provide API client for tests"""
@@ -23,7 +39,7 @@ def authenticated_client(api_client):
     """Provide authenticated API client using Factory Boy"""
     from src.tests.factories import UserFactory
     user = UserFactory()
-    refresh = RefreshToken.for_user(user)
+    refresh = UserRefreshToken.for_user(user)
     api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
     api_client.user = user
     return api_client
@@ -0,0 +1,78 @@
+import pytest
+from datetime import date, datetime, timedelta
+from django.utils import timezone
+from rest_framework import status
+
+from apps.core.models import BookingStatus
+from apps.core.services import occupancy_intervals
+from tests.factories import BookingFactory, ParkingLotFactory
+
+DAY = date(2030, 1, 7)
+MIDNIGHT = timezone.make_aware(datetime(2030, 1, 7))
+
+
+def at(hours):
+    return MIDNIGHT + timedelta(hours=hours)
+
+
+@pytest.mark.django_db
+class TestAvailability:
+
+    @pytest.fixture
+    def spot(self):
+        return ParkingLotFactory(available_spots=2)
+
+    def book(self, spot, start, end, status=BookingStatus.CONFIRMED):
+        return BookingFactory(spot=spot, status=status, start_time=at(start), end_time=at(end))
+
+    def test_intervals_merge_back_to_back_bookings(self, spot):
+        self.book(spot, 8, 10)
+        self.book(spot, 10, 12)
+        self.book(spot, 9, 11)
+        self.book(spot, 14, 15, status=BookingStatus.CANCELLED)
+
+        intervals = occupancy_intervals([spot.pk], MIDNIGHT, at(24))
+
+        assert intervals[spot.pk] == [
+            (at(0), at(8), 0),
+            (at(8), at(9), 1),
+            (at(9), at(11), 2),
+            (at(11), at(12), 1),
+            (at(12), at(24), 0),
+        ]
+
+    def test_calendar_for_many_lots_in_one_request(self, authenticated_client, spot, django_assert_max_num_queries):
+        other = ParkingLotFactory(available_spots=1)
+        self.book(spot, 20, 30)
+        self.book(other, 9, 10)
+
+        with django_assert_max_num_queries(3):
+            response = authenticated_client.get('/api/parking-spots/availability/', {
+                'ids': f'{spot.id},{other.id}',
+                'start_date': DAY.isoformat(),
+                'end_date': (DAY + timedelta(days=1)).isoformat(),
+            })
+
+        assert response.status_code == status.HTTP_200_OK
+        lots = {lot['spot_id']: lot for lot in response.data['lots']}
+        assert [(interval['booked'], interval['available']) for interval in lots[spot.pk]['intervals']] == [
+            (0, 2), (1, 1), (0, 2)
+        ]
+        assert lots[spot.pk]['intervals'][1]['end'] == at(30)
+        assert lots[other.pk]['intervals'][-1]['end'] == at(48)
+
+    def test_unknown_lot(self, authenticated_client, spot):
+        response = authenticated_client.get('/api/parking-spots/availability/', {
+            'ids': f'{spot.id},00000000-0000-0000-0000-000000000000',
+        })
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_rejects_too_long_range(self, authenticated_client, spot):
+        response = authenticated_client.get('/api/parking-spots/availability/', {
+            'ids': str(spot.id),
+            'start_date': DAY.isoformat(),
+            'end_date': (DAY + timedelta(days=40)).isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
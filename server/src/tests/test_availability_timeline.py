@@ -0,0 +1,52 @@
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from datetime import timedelta
+from decimal import Decimal
+
+from apps.core import timeline
+from apps.core.models import AvailabilityBucket, BookingStatus
+from tests.factories import BookingFactory, ParkingLotFactory
+
+
+@pytest.mark.django_db
+class TestAvailabilityTimeline:
+
+    @pytest.fixture
+    def garage(self):
+        return ParkingLotFactory(available_spots=3, price_per_hour=Decimal('10.00'))
+
+    @pytest.fixture
+    def start(self):
+        return timeline.bucket_floor(timezone.now() + timedelta(days=1))
+
+    def test_rebuild_matches_bookings(self, garage, start):
+        BookingFactory.create_batch(
+            2, spot=garage, status=BookingStatus.CONFIRMED,
+            start_time=start, end_time=start + timedelta(hours=2)
+        )
+
+        timeline.rebuild([garage.pk])
+
+        assert list(timeline.check([garage.pk])) == []
+        assert timeline.min_remaining([garage.pk], start, start + timedelta(hours=1)) == {garage.pk: 1}
+        assert timeline.min_remaining([garage.pk], start + timedelta(hours=2), start + timedelta(hours=3)) == {garage.pk: 3}
+
+    def test_cancel_releases_buckets(self, authenticated_client, garage, start):
+        booking = BookingFactory(
+            user=authenticated_client.user, spot=garage, status=BookingStatus.CONFIRMED,
+            start_time=start, end_time=start + timedelta(hours=1)
+        )
+        timeline.rebuild([garage.pk])
+
+        response = authenticated_client.post(f'/api/bookings/{booking.id}/cancel_booking/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not AvailabilityBucket.objects.filter(spot=garage).exclude(remaining=3).exists()
+        assert list(timeline.check([garage.pk])) == []
+
+    def test_check_reports_drift(self, garage, start):
+        timeline.rebuild([garage.pk])
+        AvailabilityBucket.objects.filter(spot=garage, start=start).update(remaining=0)
+
+        assert list(timeline.check([garage.pk])) == [(garage.pk, start, 0, 3)]
@@ -0,0 +1,53 @@
+import pytest
+from apps.core import loadtest, seeding
+from apps.core.models import Booking, ParkingLot
+
+
+@pytest.mark.django_db
+class TestSeeding:
+
+    def test_seed_dataset(self):
+        result = seeding.seed(users=5, lots=20, bookings=110, batch_size=8, seed=1)
+
+        assert (result.users, result.lots, result.bookings) == (5, 20, 110)
+        lots = ParkingLot.objects.filter(owner__username__startswith=f'bench-{result.tag}-')
+        assert lots.count() == 20
+        assert not lots.filter(location__isnull=True).exists()
+
+        # Bookings of a lot follow each other, so capacity is never exceeded
+        previous = {}
+        for spot_id, start_time, end_time in Booking.objects.filter(spot__in=lots).order_by(
+            'spot_id', 'start_time'
+        ).values_list('spot_id', 'start_time', 'end_time'):
+            assert start_time >= previous.get(spot_id, start_time)
+            previous[spot_id] = end_time
+
+
+@pytest.mark.django_db
+class TestLoadTest:
+
+    def test_run_reports_percentiles_and_rolls_back(self):
+        seeding.seed(users=3, lots=10, bookings=40, seed=2)
+        bookings = Booking.objects.count()
+
+        report = loadtest.run(['nearby', 'booking_create'], requests=5, warmup=1, seed=3)
+
+        summary = report['scenarios']['nearby']
+        assert summary['requests'] == 5
+        assert summary['errors'] == 0
+        assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms']
+        assert summary['queries_max'] >= 1
+        assert Booking.objects.count() == bookings
+
+
+class TestCompare:
+
+    def test_percentile(self):
+        assert loadtest.percentile(list(range(1, 101)), 95) == 95
+        assert loadtest.percentile([7], 99) == 7
+
+    def test_regressions(self):
+        baseline = {'scenarios': {'nearby': {'p95_ms': 10.0, 'queries_max': 2}}}
+
+        assert loadtest.compare({'scenarios': {'nearby': {'p95_ms': 11.0, 'queries_max': 2}}}, baseline) == []
+        assert len(loadtest.compare({'scenarios': {'nearby': {'p95_ms': 13.0, 'queries_max': 3}}}, baseline)) == 2
@@ -0,0 +1,94 @@
+import itertools
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from datetime import timedelta
+from decimal import Decimal
+
+from apps.core.models import Booking, BookingStatus
+from apps.core.services import peak_occupancy, full_spot_ids
+from tests.factories import ParkingLotFactory, UserFactory
+
+booking_numbers = itertools.count()
+
+
+def peak_hour_bookings(spot, user, start, count, status=BookingStatus.CONFIRMED):
+    """Staggered bookings that all overlap the hour after ``start``"""
+    return Booking.objects.bulk_create([
+        Booking(
+            booking_id=f"BKP-{next(booking_numbers):06d}",
+            user=user,
+            spot=spot,
+            start_time=start - timedelta(minutes=i % 60),
+            end_time=start + timedelta(hours=1, minutes=i % 45),
+            duration_hours=Decimal('2.00'),
+            total_price=Decimal('20.00'),
+            status=status,
+        )
+        for i in range(count)
+    ])
+
+
+@pytest.mark.django_db
+class TestBookingCapacity:
+
+    @pytest.fixture
+    def garage(self):
+        return ParkingLotFactory(available_spots=300, price_per_hour=Decimal('10.00'))
+
+    @pytest.fixture
+    def peak_start(self):
+        return (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+    def booking_data(self, spot, start):
+        return {
+            'spot': str(spot.id),
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(hours=1)).isoformat(),
+            'duration_hours': 1,
+        }
+
+    def test_peak_occupancy_counts_concurrent_bookings(self, garage, peak_start):
+        peak_hour_bookings(garage, UserFactory(), peak_start, 250)
+        # Earlier and cancelled bookings do not hold a space in the window
+        peak_hour_bookings(garage, UserFactory(), peak_start - timedelta(hours=3), 20)
+        peak_hour_bookings(garage, UserFactory(), peak_start, 30, status=BookingStatus.CANCELLED)
+
+        peak = peak_occupancy([garage.pk], peak_start, peak_start + timedelta(hours=1))
+        assert peak == {garage.pk: 250}
+
+    def test_booking_accepted_below_capacity(self, authenticated_client, garage, peak_start):
+        peak_hour_bookings(garage, UserFactory(), peak_start, 299)
+
+        response = authenticated_client.post('/api/bookings/', self.booking_data(garage, peak_start))
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_booking_rejected_at_capacity(self, authenticated_client, garage, peak_start):
+        peak_hour_bookings(garage, UserFactory(), peak_start, 300)
+
+        response = authenticated_client.post('/api/bookings/', self.booking_data(garage, peak_start))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert garage.pk in full_spot_ids(peak_start, peak_start + timedelta(hours=1))
+        # Outside the peak the garage is free again
+        assert garage.pk not in full_spot_ids(peak_start + timedelta(hours=3), peak_start + timedelta(hours=4))
+
+    def test_search_excludes_only_full_lots(self, authenticated_client, peak_start):
+        full = ParkingLotFactory(latitude=Decimal('40.7128'), longitude=Decimal('-74.0060'), available_spots=200)
+        busy = ParkingLotFactory(latitude=Decimal('40.7130'), longitude=Decimal('-74.0062'), available_spots=200)
+        peak_hour_bookings(full, UserFactory(), peak_start, 200)
+        peak_hour_bookings(busy, UserFactory(), peak_start, 150)
+
+        response = authenticated_client.get('/api/search/', {
+            'lat': 40.7128,
+            'lng': -74.0060,
+            'start_time': peak_start.isoformat(),
+            'end_time': (peak_start + timedelta(hours=1)).isoformat(),
+            'radius': 1
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        ids = {result['id'] for result in response.data['results']}
+        assert str(busy.id) in ids
+        assert str(full.id) not in ids
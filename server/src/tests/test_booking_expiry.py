@@ -0,0 +1,69 @@
+import os
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+
+from apps.common import metrics
+from apps.core.models import Booking, BookingStatus
+from apps.core.services import expire_bookings
+from tests.factories import BookingFactory, ParkingLotFactory
+
+
+@pytest.mark.django_db
+class TestBookingExpiry:
+
+    @pytest.fixture
+    def spot(self):
+        return ParkingLotFactory()
+
+    def test_stale_pending_bookings_expire(self, spot):
+        stale = BookingFactory(spot=spot, status=BookingStatus.PENDING)
+        fresh = BookingFactory(spot=spot, status=BookingStatus.PENDING)
+        Booking.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(hours=2))
+
+        moved = expire_bookings()
+
+        assert moved['pending_to_expired'] == 1
+        assert Booking.objects.get(pk=stale.pk).status == BookingStatus.EXPIRED
+        assert Booking.objects.get(pk=fresh.pk).status == BookingStatus.PENDING
+
+    def test_finished_active_bookings_complete_in_batches(self, spot):
+        now = timezone.now()
+        finished = BookingFactory.create_batch(
+            5, spot=spot, status=BookingStatus.ACTIVE,
+            start_time=now - timedelta(hours=3), end_time=now - timedelta(hours=1)
+        )
+        running = BookingFactory(
+            spot=spot, status=BookingStatus.ACTIVE,
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1)
+        )
+
+        moved = expire_bookings(batch_size=2)
+
+        assert moved['active_to_completed'] == 5
+        assert set(Booking.objects.filter(pk__in=[b.pk for b in finished]).values_list('status', flat=True)) == {BookingStatus.COMPLETED}
+        assert Booking.objects.get(pk=running.pk).status == BookingStatus.ACTIVE
+
+    def test_command_runs_single_pass(self, spot, capsys):
+        call_command('expire_bookings', batch_size=10)
+
+        assert 'pending_to_expired=0' in capsys.readouterr().out
+
+    def test_pass_recorded_in_metrics(self, spot, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        metrics._counters.clear()
+        now = timezone.now()
+        BookingFactory.create_batch(
+            3, spot=spot, status=BookingStatus.ACTIVE,
+            start_time=now - timedelta(hours=3), end_time=now - timedelta(hours=1)
+        )
+
+        call_command('expire_bookings', batch_size=2)
+
+        # Flushed for the server processes to read
+        assert (tmp_path / f'{os.getpid()}.json').exists()
+        text = metrics.render()
+        assert 'bookings_transitioned_total{transition="active_to_completed"} 3' in text
+        assert 'bookings_transitioned_total{transition="pending_to_expired"} 0' in text
+        assert 'booking_expiry_pass_seconds ' in text
@@ -0,0 +1,64 @@
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from datetime import timedelta
+from decimal import Decimal
+
+from apps.core.models import Booking, BookingStatus
+from tests.factories import BookingFactory, ParkingLotFactory
+
+
+@pytest.mark.django_db
+class TestBulkBookings:
+
+    @pytest.fixture
+    def start(self):
+        return (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+    @pytest.fixture
+    def spots(self, start):
+        free = ParkingLotFactory(available_spots=5, price_per_hour=Decimal('4.00'))
+        full = ParkingLotFactory(available_spots=1)
+        BookingFactory(spot=full, status=BookingStatus.CONFIRMED, start_time=start, end_time=start + timedelta(hours=4))
+        return free, full
+
+    def payload(self, mode, spots, start):
+        return {
+            'mode': mode,
+            'bookings': [
+                {'spot': str(spot.id), 'start_time': (start + timedelta(hours=1)).isoformat(),
+                 'end_time': (start + timedelta(hours=3)).isoformat(), 'duration_hours': '2.00'}
+                for spot in spots
+            ]
+        }
+
+    def test_atomic_mode_creates_nothing_when_one_is_rejected(self, authenticated_client, spots, start):
+        response = authenticated_client.post('/api/bookings/bulk/', self.payload('atomic', spots, start), format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert [result['status'] for result in response.data['results']] == ['skipped', 'rejected']
+        assert not Booking.objects.filter(user=authenticated_client.user).exists()
+
+    def test_partial_mode_creates_what_fits(self, authenticated_client, spots, start):
+        free, _ = spots
+        response = authenticated_client.post(
+            '/api/bookings/bulk/', self.payload('partial', [free, free, free, *spots], start), format='json'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == 4
+        assert response.data['rejected'] == 1
+        bookings = Booking.objects.filter(user=authenticated_client.user)
+        assert bookings.count() == 4
+        assert len({booking.booking_id for booking in bookings}) == 4
+        assert {booking.total_price for booking in bookings} == {Decimal('8.00')}
+
+    def test_invalid_items_are_reported_per_index(self, authenticated_client, spots, start):
+        payload = self.payload('partial', spots[:1], start)
+        payload['bookings'].append({'spot': 'not-a-uuid'})
+
+        response = authenticated_client.post('/api/bookings/bulk/', payload, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['results'][1]['status'] == 'rejected'
+        assert 'spot' in response.data['results'][1]['errors']
@@ -0,0 +1,85 @@
+import pytest
+from decimal import Decimal
+from unittest import mock
+from rest_framework import status
+
+from apps.core import timeline
+from apps.core.models import AvailabilityBucket, ParkingLot
+from apps.core.signals import parking_lots_updated
+from tests.factories import ParkingLotFactory
+
+
+@pytest.mark.django_db
+class TestBulkLotUpdate:
+
+    @pytest.fixture
+    def lots(self, authenticated_client):
+        return ParkingLotFactory.create_batch(
+            5, owner=authenticated_client.user, available_spots=10, price_per_hour=Decimal('5.00')
+        )
+
+    def test_updates_prices_and_capacities(self, authenticated_client, lots, django_capture_on_commit_callbacks):
+        receiver = mock.Mock()
+        parking_lots_updated.connect(receiver)
+        data = {'lots': [
+            {'id': str(lots[0].id), 'price_per_hour': '7.50'},
+            {'id': str(lots[1].id), 'available_spots': 4},
+            {'id': str(lots[2].id), 'price_per_hour': '3.00', 'available_spots': 20},
+        ]}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.patch('/api/my-spots/bulk/', data, format='json')
+        parking_lots_updated.disconnect(receiver)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'updated': 3}
+        updated = {lot.pk: lot for lot in ParkingLot.objects.filter(pk__in=[lot.pk for lot in lots])}
+        assert (updated[lots[0].pk].price_per_hour, updated[lots[0].pk].available_spots) == (Decimal('7.50'), 10)
+        assert (updated[lots[1].pk].price_per_hour, updated[lots[1].pk].available_spots) == (Decimal('5.00'), 4)
+        assert (updated[lots[2].pk].price_per_hour, updated[lots[2].pk].available_spots) == (Decimal('3.00'), 20)
+        assert updated[lots[3].pk].price_per_hour == Decimal('5.00')
+        receiver.assert_called_once()
+
+    def test_capacity_change_moves_the_timeline(self, authenticated_client, lots):
+        timeline.rebuild([lots[0].pk])
+
+        authenticated_client.patch('/api/my-spots/bulk/', {
+            'lots': [{'id': str(lots[0].id), 'available_spots': 6}]
+        }, format='json')
+
+        remaining = set(AvailabilityBucket.objects.filter(spot=lots[0]).values_list('remaining', flat=True))
+        assert remaining == {6}
+        assert list(timeline.check([lots[0].pk])) == []
+
+    def test_single_lot_capacity_change_moves_the_timeline(self, authenticated_client, lots):
+        timeline.rebuild([lots[0].pk])
+
+        response = authenticated_client.patch(f'/api/parking-spots/{lots[0].id}/', {'available_spots': 3}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        remaining = set(AvailabilityBucket.objects.filter(spot=lots[0]).values_list('remaining', flat=True))
+        assert remaining == {3}
+        assert list(timeline.check([lots[0].pk])) == []
+
+    def test_rejects_lots_of_other_owners(self, authenticated_client, lots):
+        other = ParkingLotFactory(price_per_hour=Decimal('5.00'))
+
+        response = authenticated_client.patch('/api/my-spots/bulk/', {'lots': [
+            {'id': str(lots[0].id), 'price_per_hour': '9.00'},
+            {'id': str(other.id), 'price_per_hour': '9.00'},
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data['ids'] == [other.id]
+        lots[0].refresh_from_db()
+        assert lots[0].price_per_hour == Decimal('5.00')
+
+    def test_rejects_duplicates_and_empty_changes(self, authenticated_client, lots):
+        duplicate = authenticated_client.patch('/api/my-spots/bulk/', {'lots': [
+            {'id': str(lots[0].id), 'price_per_hour': '9.00'},
+            {'id': str(lots[0].id), 'available_spots': 2},
+        ]}, format='json')
+        empty = authenticated_client.patch('/api/my-spots/bulk/', {'lots': [{'id': str(lots[0].id)}]}, format='json')
+
+        assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+        assert empty.status_code == status.HTTP_400_BAD_REQUEST
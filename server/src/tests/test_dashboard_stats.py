@@ -0,0 +1,78 @@
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import status
+
+from apps.core import rollups
+from apps.core.models import BookingStatus, LotDailyStats
+from tests.factories import BookingFactory, ParkingLotFactory
+
+DAY = date(2030, 1, 7)
+MORNING = timezone.make_aware(datetime(2030, 1, 7, 9))
+
+
+def catch_up():
+    return rollups.refresh_lot_stats(until=timezone.now() + timedelta(minutes=1))
+
+
+@pytest.mark.django_db
+class TestDashboardStats:
+
+    @pytest.fixture
+    def spot(self, authenticated_client):
+        return ParkingLotFactory(owner=authenticated_client.user, available_spots=2, title='Garage')
+
+    def book(self, spot, start, hours, price, status=BookingStatus.COMPLETED):
+        return BookingFactory(
+            spot=spot, status=status, start_time=start, end_time=start + timedelta(hours=hours),
+            duration_hours=Decimal(hours), total_price=Decimal(price)
+        )
+
+    def test_rollup_counts_per_lot_and_day(self, spot):
+        self.book(spot, MORNING, 2, '20.00')
+        # Overnight: counted on the first day, occupancy split over both
+        self.book(spot, MORNING + timedelta(hours=13), 4, '40.00')
+        self.book(spot, MORNING, 1, '10.00', status=BookingStatus.CANCELLED)
+
+        catch_up()
+
+        first, second = LotDailyStats.objects.filter(spot=spot).order_by('day')
+        assert (first.day, first.bookings, first.cancelled, first.revenue) == (DAY, 2, 1, Decimal('60.00'))
+        assert first.occupied_hours == Decimal('4.00')
+        assert (second.day, second.bookings, second.occupied_hours) == (DAY + timedelta(days=1), 0, Decimal('2.00'))
+
+    def test_stats_endpoint(self, authenticated_client, spot):
+        self.book(spot, MORNING, 12, '120.00')
+        catch_up()
+
+        response = authenticated_client.get('/api/my-spots/stats/', {
+            'start_date': DAY.isoformat(),
+            'end_date': DAY.isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        owner_stats = response.data['owner_stats']
+        assert owner_stats['owned_spots'] == 1
+        assert owner_stats['total_earnings'] == Decimal('120.00')
+        # 12 of the 48 hours two spaces offer in a day
+        assert owner_stats['occupancy_rate'] == 0.25
+        assert owner_stats['lots'][0]['title'] == 'Garage'
+        assert [day['day'] for day in owner_stats['days']] == [DAY]
+
+    def test_stats_are_cached(self, authenticated_client, spot, django_assert_num_queries):
+        params = {'start_date': DAY.isoformat(), 'end_date': DAY.isoformat()}
+        authenticated_client.get('/api/my-spots/stats/', params)
+
+        # The user comes from the token claims, so nothing is left
+        with django_assert_num_queries(0):
+            response = authenticated_client.get('/api/my-spots/stats/', params)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_rejects_inverted_range(self, authenticated_client):
+        response = authenticated_client.get('/api/my-spots/stats/', {
+            'start_date': DAY.isoformat(),
+            'end_date': (DAY - timedelta(days=1)).isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,86 @@
+import io
+import pytest
+from psycopg_pool import ConnectionPool
+
+from apps.common import metrics
+from apps.common.db import copy_from
+from apps.core.management.commands.bench_db_connections import settings_for
+
+
+class Psycopg2Cursor:
+    def copy_expert(self, sql, file):
+        self.copied = (sql, file.read())
+
+
+class Psycopg3Copy:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def write(self, data):
+        self.cursor.written.append(data)
+
+
+class Psycopg3Cursor:
+    def __init__(self):
+        self.written = []
+
+    def copy(self, sql):
+        self.sql = sql
+        return Psycopg3Copy(self)
+
+
+class DjangoCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+
+class TestCopyFrom:
+
+    def test_psycopg2(self):
+        raw = Psycopg2Cursor()
+
+        copy_from(DjangoCursor(raw), 'COPY t FROM STDIN', io.StringIO('1,a\n'))
+
+        assert raw.copied == ('COPY t FROM STDIN', '1,a\n')
+
+    def test_psycopg3_in_chunks(self, monkeypatch):
+        monkeypatch.setattr('apps.common.db.COPY_CHUNK', 4)
+        raw = Psycopg3Cursor()
+
+        copy_from(DjangoCursor(raw), 'COPY t FROM STDIN', io.StringIO('1,a\n2,b\n3'))
+
+        assert raw.sql == 'COPY t FROM STDIN'
+        assert raw.written == ['1,a\n', '2,b\n', '3']
+
+
+class TestConnectionReuse:
+
+    def test_pool_metrics(self):
+        for store in (metrics._counters, metrics._gauges):
+            store.clear()
+        pool = ConnectionPool('', min_size=2, max_size=5, open=False)
+
+        metrics.record_pool('default', pool)
+
+        assert metrics._gauges[metrics._key('db_pool_available', {'alias': 'default'})] == 0
+        assert metrics._key('db_pool_requests_total', {'alias': 'default'}) not in metrics._counters
+
+    @pytest.mark.parametrize('mode, max_age, pool', [
+        ('connect', 0, None),
+        ('persistent', None, None),
+        ('pool', 0, {'min_size': 3, 'max_size': 3}),
+    ])
+    def test_bench_settings(self, mode, max_age, pool):
+        settings_dict = {'NAME': 'parking', 'CONN_MAX_AGE': 60, 'OPTIONS': {'pool': {'max_size': 10}}}
+
+        configured = settings_for(mode, settings_dict, threads=3)
+
+        assert configured['CONN_MAX_AGE'] == max_age
+        assert configured['OPTIONS'].get('pool') == pool
+        assert settings_dict['OPTIONS'] == {'pool': {'max_size': 10}}
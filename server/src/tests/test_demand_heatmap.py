@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import status
+
+from apps.core import demand
+from apps.core.models import BookingStatus, DemandCell
+from apps.core.utils import geohash_encode
+from tests.factories import BookingFactory, ParkingLotFactory, UserFactory
+
+HOUR = timezone.make_aware(datetime(2030, 1, 7, 9))
+
+
+def catch_up():
+    return demand.refresh(until=timezone.now() + timedelta(minutes=1))
+
+
+@pytest.mark.django_db
+class TestDemandHeatmap:
+
+    @pytest.fixture
+    def spot(self):
+        return ParkingLotFactory(latitude=Decimal('40.71280000'), longitude=Decimal('-74.00600000'))
+
+    def book(self, spot, start, hours, price, status=BookingStatus.CONFIRMED):
+        return BookingFactory(
+            spot=spot, status=status, start_time=start, end_time=start + timedelta(hours=hours),
+            duration_hours=Decimal(hours), total_price=Decimal(price)
+        )
+
+    def test_geohash_matches_postgis_cells(self):
+        assert geohash_encode(40.7128, -74.0060) == 'dr5reg'
+        assert geohash_encode(57.64911, 10.40744, precision=11) == 'u4pruydqqvj'
+
+    def test_refresh_rolls_up_bookings(self, spot):
+        self.book(spot, HOUR, 2, '20.00')
+        self.book(spot, HOUR + timedelta(minutes=30), 1, '10.00')
+        self.book(spot, HOUR, 1, '10.00', status=BookingStatus.CANCELLED)
+
+        catch_up()
+
+        cells = {cell.hour: cell for cell in DemandCell.objects.filter(cell='dr5reg')}
+        assert (cells[HOUR].bookings, cells[HOUR].revenue, cells[HOUR].occupied_hours) == (2, Decimal('30.00'), Decimal('1.50'))
+        next_hour = cells[HOUR + timedelta(hours=1)]
+        assert (next_hour.bookings, next_hour.occupied_hours) == (0, Decimal('1.50'))
+
+    def test_refresh_only_recomputes_changed_cells(self, spot):
+        booking = self.book(spot, HOUR, 1, '10.00')
+        catch_up()
+        assert catch_up() == (0, 0)
+
+        booking.status = BookingStatus.CANCELLED
+        booking.save()
+        slices, cells = catch_up()
+
+        assert (slices, cells) == (1, 1)
+        assert DemandCell.objects.get(cell='dr5reg', hour=HOUR).bookings == 0
+
+    def test_heatmap_endpoint(self, api_client, spot):
+        self.book(spot, HOUR, 2, '20.00')
+        catch_up()
+        api_client.force_authenticate(UserFactory(is_staff=True))
+
+        response = api_client.get('/api/demand-heatmap/', {
+            'start_time': HOUR.isoformat(),
+            'end_time': (HOUR + timedelta(days=1)).isoformat(),
+            'precision': 5,
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+        cell = response.data['cells'][0]
+        assert (cell['cell'], cell['bookings'], cell['revenue']) == ('dr5re', 1, Decimal('20.00'))
+        assert cell['occupied_hours'] == Decimal('2.00')
+
+    def test_heatmap_is_admin_only(self, authenticated_client):
+        response = authenticated_client.get('/api/demand-heatmap/', {
+            'start_time': HOUR.isoformat(),
+            'end_time': (HOUR + timedelta(days=1)).isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,128 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from datetime import timedelta
+from decimal import Decimal
+
+from apps.core import timeline
+from apps.core.models import Booking, BookingStatus
+from tests.factories import BookingFactory, ParkingLotFactory, UserFactory
+
+PARALLEL_EXTENDS = 8
+
+
+def extend_in_parallel(user, booking, count):
+    """POST ``count`` one-hour extensions of ``booking`` at the same time"""
+    token = str(RefreshToken.for_user(user).access_token)
+
+    def extend(_):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        try:
+            return client.post(f'/api/bookings/{booking.id}/extend_session/', {'hours': 1}).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(extend, range(count)))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExtendSessionConcurrency:
+
+    @pytest.fixture
+    def user(self):
+        return UserFactory()
+
+    @pytest.fixture
+    def session(self, user):
+        now = timezone.now().replace(microsecond=0)
+        return BookingFactory(
+            user=user,
+            spot=ParkingLotFactory(available_spots=1, price_per_hour=Decimal('12.50')),
+            status=BookingStatus.ACTIVE,
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+            duration_hours=Decimal('2.00'),
+            total_price=Decimal('25.00'),
+        )
+
+    def test_parallel_extends_add_up(self, user, session):
+        codes = extend_in_parallel(user, session, PARALLEL_EXTENDS)
+
+        assert codes == [status.HTTP_200_OK] * PARALLEL_EXTENDS
+        booking = Booking.objects.get(pk=session.pk)
+        assert booking.end_time == session.end_time + timedelta(hours=PARALLEL_EXTENDS)
+        assert booking.duration_hours == Decimal('2.00') + PARALLEL_EXTENDS
+        assert booking.total_price == Decimal('25.00') + PARALLEL_EXTENDS * Decimal('12.50')
+
+    def test_parallel_extends_stop_at_capacity(self, user, session):
+        # The only space is booked again three hours after the session ends
+        BookingFactory(
+            spot=session.spot,
+            status=BookingStatus.CONFIRMED,
+            start_time=session.end_time + timedelta(hours=3),
+            end_time=session.end_time + timedelta(hours=5),
+        )
+
+        codes = extend_in_parallel(user, session, PARALLEL_EXTENDS)
+
+        assert codes.count(status.HTTP_200_OK) == 3
+        booking = Booking.objects.get(pk=session.pk)
+        assert booking.end_time == session.end_time + timedelta(hours=3)
+        assert booking.total_price == Decimal('25.00') + 3 * Decimal('12.50')
+
+    def test_extend_unaligned_keeps_timeline(self, user, session):
+        # Ends between two buckets: the bucket holding the old end is taken once
+        Booking.objects.filter(pk=session.pk).update(
+            end_time=timeline.bucket_floor(session.end_time) + timedelta(minutes=7)
+        )
+        timeline.rebuild([session.spot_id])
+
+        assert extend_in_parallel(user, session, 1) == [status.HTTP_200_OK]
+        assert list(timeline.check([session.spot_id])) == []
+
+
+@pytest.mark.django_db
+class TestExtendSessionHours:
+
+    @pytest.fixture
+    def session(self, authenticated_client):
+        now = timezone.now().replace(microsecond=0)
+        return BookingFactory(
+            user=authenticated_client.user,
+            spot=ParkingLotFactory(available_spots=1, price_per_hour=Decimal('12.50')),
+            status=BookingStatus.ACTIVE,
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+            duration_hours=Decimal('2.00'),
+            total_price=Decimal('25.00'),
+        )
+
+    @pytest.mark.parametrize('hours', ['NaN', 'sNaN', 'Infinity', '-Infinity', '1e9', '0', '-1', '0.001', 'soon'])
+    def test_invalid_hours_rejected(self, authenticated_client, session, hours):
+        response = authenticated_client.post(f'/api/bookings/{session.id}/extend_session/', {'hours': hours})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'hours' in response.data
+        assert Booking.objects.get(pk=session.pk).end_time == session.end_time
+
+    def test_session_cannot_outgrow_duration(self, authenticated_client, session):
+        response = authenticated_client.post(f'/api/bookings/{session.id}/extend_session/', {'hours': '98.00'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        booking = Booking.objects.get(pk=session.pk)
+        assert booking.duration_hours == Decimal('2.00')
+        assert booking.end_time == session.end_time
+
+    def test_fractional_hours(self, authenticated_client, session):
+        response = authenticated_client.post(f'/api/bookings/{session.id}/extend_session/', {'hours': '1.50'})
+
+        assert response.status_code == status.HTTP_200_OK
+        booking = Booking.objects.get(pk=session.pk)
+        assert booking.end_time == session.end_time + timedelta(minutes=90)
+        assert booking.duration_hours == Decimal('3.50')
@@ -0,0 +1,61 @@
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.user import last_login
+from apps.user.tokens import UserRefreshToken
+from tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+class TestLastLogin:
+
+    def login(self, api_client, **extra):
+        UserFactory(email='rush@example.com', password='testpass123')
+        return api_client.post(reverse('user-login'), {
+            'email': 'rush@example.com', 'password': 'testpass123', **extra
+        })
+
+    def test_jwt_login_records_without_session(self, api_client, django_user_model):
+        response = self.login(api_client)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'sessionid' not in response.cookies
+        assert django_user_model.objects.get(email='rush@example.com').last_login is not None
+
+    def test_session_login_on_request(self, api_client):
+        response = self.login(api_client, session=True)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'sessionid' in response.cookies
+
+    def test_refresh_records_last_login(self, api_client):
+        user = UserFactory()
+
+        response = api_client.post(reverse('token_refresh'), {'refresh': str(UserRefreshToken.for_user(user))})
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.last_login is not None
+
+    def test_logins_coalesced_into_one_update(self, settings, monkeypatch, django_assert_num_queries):
+        settings.LAST_LOGIN_FLUSH_SECONDS = 5
+        monkeypatch.setattr(last_login, '_start_writer', lambda: None)
+        first, second = UserFactory(), UserFactory()
+        now = timezone.now()
+
+        last_login.record(first.pk, now - timedelta(minutes=1))
+        last_login.record(first.pk, now)
+        last_login.record(first.pk, now - timedelta(minutes=2))
+        last_login.record(second.pk, now)
+
+        with django_assert_num_queries(1):
+            assert last_login.flush() == 2
+        first.refresh_from_db()
+        assert first.last_login == now
+
+        # Never moves backwards
+        last_login.record(first.pk, now - timedelta(hours=1))
+        assert last_login.flush() == 0
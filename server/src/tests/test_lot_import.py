@@ -0,0 +1,102 @@
+import io
+import json
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+
+from apps.core.importers import import_parking_lots, read_geojson
+from apps.core.models import ParkingLot
+from tests.factories import UserFactory
+
+
+def lot(title, **overrides):
+    return {
+        'title': title,
+        'address': f'{title} Street',
+        'latitude': '40.712800',
+        'longitude': '-74.006000',
+        'price_per_hour': '5.00',
+        'available_spots': 40,
+        'availability': '24_7',
+        **overrides,
+    }
+
+
+class TestGeoJSONReader:
+
+    def test_features_are_streamed_with_line_numbers(self, monkeypatch):
+        monkeypatch.setattr('apps.core.importers.READ_SIZE', 16)
+        collection = json.dumps({
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'properties': {'title': 'A'},
+                 'geometry': {'type': 'Point', 'coordinates': [-74.0, 40.7]}},
+                {'type': 'Feature', 'properties': {'title': 'B'}, 'geometry': None},
+            ]
+        }, indent=1)
+
+        rows = list(read_geojson(io.StringIO(collection)))
+
+        assert rows[0] == (4, {'title': 'A', 'longitude': -74.0, 'latitude': 40.7})
+        assert rows[1][0] > rows[0][0]
+        assert isinstance(rows[1][1], ValueError)
+
+    def test_reading_resumes_after_a_malformed_feature(self, monkeypatch):
+        monkeypatch.setattr('apps.core.importers.READ_SIZE', 16)
+        point = '{"type": "Point", "coordinates": [-74.0, 40.7]}'
+        collection = (
+            '{"type": "FeatureCollection", "features": [\n'
+            f'{{"properties": {{"title": "A"}}, "geometry": {point}}},\n'
+            '{"properties": {"title": "Bad", "note": "a } in text"} "geometry": [1, 2]},\n'
+            f'{{"properties": {{"title": "C"}}, "geometry": {point}}},\n'
+            f'{{"properties": {{"title": "D"}}, "geometry": {point}}}\n'
+            ']}'
+        )
+
+        rows = list(read_geojson(io.StringIO(collection)))
+
+        assert [line for line, _ in rows] == [2, 3, 4, 5]
+        assert isinstance(rows[1][1], ValueError)
+        assert [row['title'] for _, row in rows if isinstance(row, dict)] == ['A', 'C', 'D']
+
+    def test_unclosed_feature_ends_reading(self, monkeypatch):
+        monkeypatch.setattr('apps.core.importers.READ_SIZE', 16)
+        monkeypatch.setattr('apps.core.importers.MAX_FEATURE_SIZE', 64)
+        # The first feature is missing its closing braces
+        collection = '{"features": [{"properties": {"title": "A"' + ', {"title": "B"}' * 100 + ']}'
+        stream = io.StringIO(collection)
+
+        rows = list(read_geojson(stream))
+
+        assert len(rows) == 1 and 'not closed' in str(rows[0][1])
+        assert stream.tell() < len(collection)
+
+
+@pytest.mark.django_db
+class TestParkingLotImport:
+
+    @pytest.mark.parametrize('method', ['copy', 'bulk_create'])
+    def test_ndjson_rows_are_imported_in_batches(self, method):
+        owner = UserFactory()
+        lines = [json.dumps(lot(f'Garage {i}')) for i in range(7)]
+        lines.insert(3, json.dumps(lot('Broken', price_per_hour='-1')))
+
+        result = import_parking_lots(io.StringIO('\n'.join(lines)), 'ndjson', owner, method=method, batch_size=3)
+
+        assert result.imported == 7
+        assert [error['line'] for error in result.errors] == [4]
+        assert ParkingLot.objects.filter(owner=owner).count() == 7
+        assert ParkingLot.objects.get(owner=owner, title='Garage 0').location.y == pytest.approx(40.7128)
+
+    def test_upload_endpoint_reports_failed_lines(self, authenticated_client):
+        content = 'title,address,latitude,longitude,price_per_hour,availability\n' \
+                  'North,1 North St,40.7,-74.0,4.00,24_7\n' \
+                  'South,1 South St,,-74.0,4.00,24_7\n'
+        upload = SimpleUploadedFile('lots.csv', content.encode(), content_type='text/csv')
+
+        response = authenticated_client.post('/api/my-spots/import/', {'file': upload}, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['imported'] == 1
+        assert response.data['errors'][0]['line'] == 3
+        assert 'latitude' in response.data['errors'][0]['errors']
@@ -0,0 +1,50 @@
+import pytest
+from decimal import Decimal
+from django.contrib.gis.geos import Point
+
+from apps.core.models import ParkingLot
+from tests.factories import ParkingLotFactory, UserFactory
+
+
+@pytest.mark.django_db
+class TestLotLocationSync:
+
+    def lot(self, owner, latitude, longitude, **kwargs):
+        return ParkingLot(
+            owner=owner, title='Lot', address='Somewhere', price_per_hour=Decimal('5.00'),
+            availability='24_7', latitude=latitude, longitude=longitude, **kwargs
+        )
+
+    def test_bulk_create_fills_location(self):
+        owner = UserFactory()
+        ParkingLot.objects.bulk_create([
+            self.lot(owner, Decimal('40.71280000'), Decimal('-74.00600000')),
+            self.lot(owner, None, None, location=Point(-73.9855, 40.758, srid=4326)),
+        ])
+
+        first, second = ParkingLot.objects.filter(owner=owner).order_by('latitude')
+        assert (first.location.x, first.location.y) == pytest.approx((-74.006, 40.7128))
+        assert (second.latitude, second.longitude) == (Decimal('40.75800000'), Decimal('-73.98550000'))
+
+    def test_bulk_update_and_update_move_location(self):
+        lot = ParkingLotFactory()
+        lot.latitude, lot.longitude = Decimal('51.50740000'), Decimal('-0.12780000')
+        ParkingLot.objects.bulk_update([lot], ['latitude', 'longitude'])
+        lot.refresh_from_db()
+        assert (lot.location.x, lot.location.y) == pytest.approx((-0.1278, 51.5074))
+
+        ParkingLot.objects.filter(pk=lot.pk).update(latitude=Decimal('48.85660000'))
+        lot.refresh_from_db()
+        assert lot.location.y == pytest.approx(48.8566)
+
+    def test_save_keeps_location_when_coordinates_unchanged(self):
+        lot = ParkingLot.objects.get(pk=ParkingLotFactory().pk)
+        location = lot.location
+
+        lot.price_per_hour = Decimal('9.00')
+        lot.save()
+        assert lot.location is location
+
+        lot.latitude = Decimal('10.00000000')
+        lot.save()
+        assert lot.location.y == pytest.approx(10)
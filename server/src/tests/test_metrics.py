@@ -0,0 +1,58 @@
+import json
+import os
+import pytest
+from rest_framework import status
+
+from apps.common import metrics
+
+
+@pytest.fixture
+def fresh_metrics():
+    for store in (metrics._counters, metrics._histograms, metrics._gauges):
+        store.clear()
+    yield metrics
+
+
+class TestMetrics:
+
+    def test_render_counters_and_histogram(self, settings, fresh_metrics):
+        settings.METRICS_DIR = ''
+        metrics.inc('bookings_created_total', source='api')
+        metrics.inc('bookings_created_total', 2, source='bulk')
+        metrics.observe('http_request_duration_seconds', 0.03, route='nearby', method='GET')
+        metrics.observe('http_request_duration_seconds', 7, route='nearby', method='GET')
+
+        text = metrics.render()
+
+        assert '# TYPE bookings_created_total counter' in text
+        assert 'bookings_created_total{source="bulk"} 2' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="nearby",le="0.05"} 1' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="nearby",le="+Inf"} 2' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="nearby"} 2' in text
+
+    def test_sums_every_process(self, settings, tmp_path, fresh_metrics):
+        settings.METRICS_DIR = str(tmp_path)
+        metrics.inc('booking_conflicts_total', source='api')
+        metrics.set_gauge('db_connections_open', 1, alias='default')
+        # A worker that has exited: its counters stay, its gauges go
+        (tmp_path / '999999999.json').write_text(json.dumps({
+            'pid': 999999999,
+            'counters': [['booking_conflicts_total', {'source': 'api'}, 4]],
+            'histograms': [],
+            'gauges': [['db_connections_open', {'alias': 'default'}, 5]],
+        }))
+
+        text = metrics.render()
+
+        assert 'booking_conflicts_total{source="api"} 5' in text
+        assert 'db_connections_open{alias="default"} 1' in text
+        assert os.path.exists(tmp_path / f'{os.getpid()}.json')
+
+    def test_endpoint_requires_token(self, client, settings, fresh_metrics):
+        settings.METRICS_DIR = ''
+        settings.METRICS_TOKEN = 'secret'
+
+        assert client.get('/metrics').status_code == status.HTTP_403_FORBIDDEN
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == status.HTTP_200_OK
+        assert b'# TYPE http_requests_total counter' in response.content
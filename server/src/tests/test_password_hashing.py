@@ -0,0 +1,91 @@
+import threading
+import pytest
+from django.contrib.auth.hashers import check_password, make_password
+from django.urls import reverse
+from rest_framework import status
+
+from apps.user import hashing
+from apps.user.hashing import PasswordHashingBusy
+from tests.factories import UserFactory
+
+
+class TestTunedHashers:
+
+    def test_scrypt_above_default_cost(self, settings):
+        settings.PASSWORD_SCRYPT_WORK_FACTOR = 2 ** 15
+        settings.PASSWORD_SCRYPT_BLOCK_SIZE = 8
+
+        encoded = make_password('testpass123', hasher='scrypt')
+
+        assert encoded.startswith(f'scrypt${2 ** 15}$')
+        # Still verified once the cost is lowered again
+        settings.PASSWORD_SCRYPT_WORK_FACTOR = 2 ** 10
+        assert check_password('testpass123', encoded)
+
+    def test_argon2_costs_from_settings(self, settings):
+        settings.PASSWORD_ARGON2_TIME_COST = 1
+        settings.PASSWORD_ARGON2_MEMORY_COST = 1024
+        settings.PASSWORD_ARGON2_PARALLELISM = 1
+
+        encoded = make_password('testpass123', hasher='argon2')
+
+        assert encoded.startswith('argon2$argon2id$') and '$m=1024,t=1,p=1$' in encoded
+        assert check_password('testpass123', encoded)
+
+
+@pytest.mark.django_db
+class TestPasswordHashing:
+
+    def test_login_upgrades_old_hash(self, api_client):
+        user = UserFactory(email='old@example.com')
+        user.password = make_password('testpass123', hasher='pbkdf2_sha256')
+        user.save(update_fields=['password'])
+
+        response = api_client.post(reverse('user-login'), {'email': 'old@example.com', 'password': 'testpass123'})
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.password.startswith('scrypt$')
+
+    def test_cost_change_rehashes(self, settings):
+        settings.PASSWORD_SCRYPT_WORK_FACTOR = 2 ** 10
+        user = UserFactory()
+        settings.PASSWORD_SCRYPT_WORK_FACTOR = 2 ** 11
+
+        assert hashing.check_password(user, 'testpass123')
+        user.refresh_from_db()
+        assert f'${2 ** 11}$' in user.password
+        assert not hashing.check_password(user, 'wrong')
+
+    def test_registration_hashes_in_pool(self, api_client):
+        response = api_client.post(reverse('user-list'), {
+            'email': 'New@Example.com', 'username': 'newcomer', 'first_name': 'New', 'last_name': 'Comer',
+            'password': 'testpassword123', 'password_confirm': 'testpassword123',
+        })
+
+        assert response.status_code == status.HTTP_201_CREATED
+        response = api_client.post(reverse('user-login'), {'email': 'New@example.com', 'password': 'testpassword123'})
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestHashingPool:
+
+    def test_full_pool_rejects(self, settings):
+        settings.PASSWORD_HASH_WORKERS = 1
+        settings.PASSWORD_HASH_QUEUE = 0
+        started, release = threading.Event(), threading.Event()
+
+        def hold():
+            started.set()
+            release.wait()
+
+        blocker = threading.Thread(target=hashing._pool.run, args=(hold,))
+        blocker.start()
+        started.wait()
+        try:
+            with pytest.raises(PasswordHashingBusy):
+                hashing.make_password('testpass123')
+        finally:
+            release.set()
+            blocker.join()
+        assert hashing.make_password('testpass123').startswith('scrypt$')
@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import status
+
+from apps.core import pricing
+from apps.core.models import Booking, RateRule
+from apps.core.services import update_lots
+from tests.factories import ParkingLotFactory
+
+# A Monday
+MONDAY = timezone.make_aware(datetime(2030, 1, 7))
+
+
+@pytest.mark.django_db
+class TestPricing:
+
+    @pytest.fixture
+    def spot(self):
+        spot = ParkingLotFactory(price_per_hour=Decimal('10.00'))
+        RateRule.objects.create(spot=spot, start_hour=8, end_hour=10, multiplier=Decimal('1.50'))
+        RateRule.objects.create(spot=spot, weekday=5, start_hour=0, end_hour=24, multiplier=Decimal('0.50'), priority=1)
+        return spot
+
+    def test_quote_applies_rules(self, spot):
+        # 07:00-09:30 on Monday: one base hour, one and a half peak hours
+        assert pricing.quote(spot, MONDAY + timedelta(hours=7), MONDAY + timedelta(hours=9, minutes=30)) == Decimal('32.50')
+        # The Saturday rule outranks the morning peak
+        saturday = MONDAY + timedelta(days=5)
+        assert pricing.quote(spot, saturday + timedelta(hours=8), saturday + timedelta(hours=10)) == Decimal('10.00')
+        # A whole week is the sum of the grid
+        assert pricing.quote(spot, MONDAY, MONDAY + timedelta(weeks=2)) == 2 * Decimal(pricing.price_grid(spot).week_total) / 100
+
+    def test_grid_is_recompiled_after_changes(self, spot, django_capture_on_commit_callbacks):
+        window = (MONDAY + timedelta(hours=12), MONDAY + timedelta(hours=13))
+        assert pricing.quote(spot, *window) == Decimal('10.00')
+
+        RateRule.objects.create(spot=spot, start_hour=12, end_hour=14, multiplier=Decimal('2.00'))
+        assert pricing.quote(spot, *window) == Decimal('20.00')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            update_lots(spot.owner, {spot.pk: {'price_per_hour': Decimal('4.00')}})
+        spot.refresh_from_db()
+        assert pricing.quote(spot, *window) == Decimal('8.00')
+
+    def test_quote_endpoint(self, authenticated_client, spot):
+        response = authenticated_client.get(f'/api/parking-spots/{spot.id}/quote/', {
+            'start_time': (MONDAY + timedelta(hours=9)).isoformat(),
+            'end_time': (MONDAY + timedelta(hours=11)).isoformat(),
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total_price'] == Decimal('25.00')
+        assert response.data['duration_hours'] == Decimal('2.00')
+
+    def test_booking_is_priced_from_the_grid(self, authenticated_client, spot):
+        response = authenticated_client.post('/api/bookings/', {
+            'spot': str(spot.id),
+            'start_time': (MONDAY + timedelta(hours=8)).isoformat(),
+            'end_time': (MONDAY + timedelta(hours=10)).isoformat(),
+            'duration_hours': 2,
+        })
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Booking.objects.get(spot=spot).total_price == Decimal('30.00')
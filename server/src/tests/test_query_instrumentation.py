@@ -0,0 +1,53 @@
+import logging
+import pytest
+from decimal import Decimal
+from rest_framework import status
+
+from apps.common.middleware import QueryBudgetExceeded, fingerprint
+from tests.factories import ParkingLotFactory
+
+NEARBY = {'latitude': 40.7128, 'longitude': -74.0060, 'radius': 5, 'limit': 20}
+
+
+@pytest.mark.django_db
+class TestQueryInstrumentation:
+
+    @pytest.fixture
+    def lots(self):
+        return ParkingLotFactory.create_batch(
+            10, latitude=Decimal('40.71280000'), longitude=Decimal('-74.00600000'), available_spots=5
+        )
+
+    def test_fingerprint_collapses_in_lists(self):
+        assert fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)') == fingerprint('SELECT 1\n FROM t WHERE id IN (%s)')
+
+    def test_server_timing_header(self, api_client, lots):
+        response = api_client.get('/api/nearby/', NEARBY)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Server-Timing'].startswith('db;desc="2 queries";dur=')
+        assert len(response.data['spots']) == 10
+
+    def test_budget_fails_in_strict_mode(self, api_client, lots, settings):
+        settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS, 'nearby-parking-spots': 1}
+
+        with pytest.raises(QueryBudgetExceeded):
+            api_client.get('/api/nearby/', NEARBY)
+
+    def test_budget_warns_otherwise(self, api_client, lots, settings, caplog):
+        settings.QUERY_BUDGET_STRICT = False
+        settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS, 'nearby-parking-spots': 1}
+
+        with caplog.at_level(logging.WARNING, logger='apps.common.middleware'):
+            response = api_client.get('/api/nearby/', NEARBY)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'over its budget of 1' in caplog.text
+
+    def test_owned_lots_list_does_not_query_per_lot(self, authenticated_client):
+        ParkingLotFactory.create_batch(15, owner=authenticated_client.user)
+
+        response = authenticated_client.get('/api/my-spots/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Server-Timing'].startswith('db;desc="4 queries"')
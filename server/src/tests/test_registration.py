@@ -0,0 +1,54 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from apps.user.serializers import UserRegistrationSerializer
+from tests.factories import UserFactory
+
+SIGNUP = {
+    'email': 'Rush@Example.com',
+    'username': 'rush',
+    'first_name': 'Rush',
+    'last_name': 'Hour',
+    'password': 'testpassword123',
+    'password_confirm': 'testpassword123',
+}
+
+
+@pytest.mark.django_db
+class TestRegistration:
+
+    def test_validation_runs_no_queries(self, django_assert_num_queries):
+        serializer = UserRegistrationSerializer(data=SIGNUP)
+
+        with django_assert_num_queries(0):
+            assert serializer.is_valid()
+
+    def test_email_taken_in_another_case(self, api_client):
+        UserFactory(email='rush@example.com')
+
+        response = api_client.post(reverse('user-list'), SIGNUP)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['email'] == ["A user with this email already exists."]
+
+    def test_username_taken(self, api_client):
+        UserFactory(username='rush')
+
+        response = api_client.post(reverse('user-list'), SIGNUP)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['username'] == ["A user with this username already exists."]
+
+    def test_invalid_username_still_rejected(self, api_client):
+        response = api_client.post(reverse('user-list'), {**SIGNUP, 'username': 'rush hour!'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'username' in response.data
+
+    def test_login_ignores_email_case(self, api_client):
+        api_client.post(reverse('user-list'), SIGNUP)
+
+        response = api_client.post(reverse('user-login'), {'email': 'rush@EXAMPLE.com', 'password': 'testpassword123'})
+
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,88 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from apps.common.renderers import ORJSONParser, ORJSONRenderer
+from apps.core.management.commands.bench_json_rendering import payloads
+
+DATA = {
+    'id': uuid.UUID('5b6f1c3e-2a4d-4f8e-9c1b-7d2e3f4a5b6c'),
+    'price': Decimal('12.50'),
+    'created_at': datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+    'ends_at': datetime(2024, 5, 1, 10, 0, tzinfo=timezone(timedelta(hours=2))),
+    'naive': datetime(2024, 5, 1, 10, 0),
+    'day': date(2024, 2, 29),
+    'opens': time(7, 30),
+    'duration': timedelta(hours=1, minutes=30),
+    'label': gettext_lazy('Parking'),
+    'text': 'Straße – 駐車場 \u2028\u2029 "quoted" \\ \n\t\x00',
+    'errors': ReturnDict({'email': [ErrorDetail('Invalid', code='invalid')]}, serializer=None),
+    'numbers': [0, -1, 2 ** 63 - 1, 1.5, 0.1, 1e300, True, False, None],
+    'nested': ({'empty': {}}, []),
+}
+
+
+def render(renderer, data, accepted_media_type=None):
+    return renderer().render(data, accepted_media_type, {})
+
+
+class TestORJSONRenderer:
+
+    def test_same_bytes_as_drf(self):
+        assert render(ORJSONRenderer, DATA) == render(JSONRenderer, DATA)
+
+    def test_escapes_line_separators(self):
+        assert render(ORJSONRenderer, '\u2028\u2029') == b'"\\u2028\\u2029"'
+
+    @pytest.mark.parametrize('data', [{'big': 2 ** 64}, {1: 'non-str key'}])
+    def test_falls_back_to_drf(self, data):
+        assert render(ORJSONRenderer, data) == render(JSONRenderer, data)
+
+    def test_indent_rendered_by_drf(self):
+        accepted = 'application/json; indent=2'
+
+        assert render(ORJSONRenderer, DATA, accepted) == render(JSONRenderer, DATA, accepted)
+
+    def test_none_is_empty(self):
+        assert render(ORJSONRenderer, None) == b''
+
+    def test_lot_payloads(self):
+        for data in payloads(50, seed=1).values():
+            assert render(ORJSONRenderer, data) == render(JSONRenderer, data)
+
+
+def parse(parser, body, **context):
+    return parser().parse(io.BytesIO(body), 'application/json', context)
+
+
+class TestORJSONParser:
+
+    def test_same_data_as_drf(self):
+        body = render(JSONRenderer, DATA)
+
+        assert parse(ORJSONParser, body) == parse(JSONParser, body)
+
+    @pytest.mark.parametrize('body', [b'{"a": ', b'NaN', b'\xff', '"\ud800"'.encode('utf-8', 'surrogatepass')])
+    def test_invalid_bodies_as_drf(self, body):
+        with pytest.raises(ParseError) as expected:
+            parse(JSONParser, body)
+
+        with pytest.raises(ParseError) as parsed:
+            parse(ORJSONParser, body)
+
+        assert str(parsed.value.detail) == str(expected.value.detail)
+
+    def test_escaped_lone_surrogate_as_drf(self):
+        assert parse(ORJSONParser, b'"\\ud800"') == parse(JSONParser, b'"\\ud800"')
+
+    def test_other_encodings(self):
+        body = '{"title": "Straße"}'.encode('latin-1')
+
+        assert parse(ORJSONParser, body, encoding='latin-1') == {'title': 'Straße'}
@@ -0,0 +1,110 @@
+import time
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils.functional import SimpleLazyObject
+
+from apps.common import routing
+from apps.common.middleware import ReplicaRoutingMiddleware
+
+User = get_user_model()
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    routing.reset()
+    cache.clear()
+    routing._health['replica_1'] = (time.monotonic(), True)
+    yield settings
+    routing.reset()
+
+
+def request_for(path, method='get', user=AnonymousUser(), **extra):
+    request = getattr(RequestFactory(), method)(path, **extra)
+    request.resolver_match = resolve(path)
+    request.user = user
+    return request
+
+
+def read_alias(request):
+    token = routing.routing(request)
+    try:
+        return routing.ReplicaRouter().db_for_read(User)
+    finally:
+        routing.finish(token)
+
+
+class TestReplicaRouter:
+
+    def test_read_views_go_to_a_replica(self, replicas):
+        assert read_alias(request_for('/api/nearby/')) == 'replica_1'
+        assert read_alias(request_for('/api/bookings/')) is None
+
+    def test_no_request_no_replica(self, replicas):
+        assert routing.ReplicaRouter().db_for_read(User) is None
+
+    def test_lagging_replica_falls_back_to_primary(self, replicas):
+        routing._health['replica_1'] = (time.monotonic(), False)
+
+        assert read_alias(request_for('/api/nearby/')) is None
+
+    def test_replica_of_unknown_lag_unhealthy(self, replicas, monkeypatch):
+        # Never replayed anything since it lost the primary
+        monkeypatch.setattr(routing, 'replica_lag', lambda alias: float('inf'))
+        routing.reset()
+
+        assert not routing.healthy('replica_1')
+        assert read_alias(request_for('/api/nearby/')) is None
+
+    def test_sticky_cookie(self, replicas):
+        request = request_for('/api/nearby/')
+        request.COOKIES[replicas.REPLICA_STICKY_COOKIE] = str(time.time() + 5)
+
+        assert read_alias(request) is None
+
+    def test_sticky_user(self, replicas):
+        cache.set(routing.STICKY_KEY.format(7), 1)
+
+        assert read_alias(request_for('/api/search/', user=User(pk=7))) is None
+        assert read_alias(request_for('/api/search/', user=User(pk=8))) == 'replica_1'
+
+    def test_decided_only_once_the_user_is_known(self, replicas):
+        request = request_for('/api/search/', user=SimpleLazyObject(AnonymousUser))
+        cache.set(routing.STICKY_KEY.format(7), 1)
+        state = routing.RequestRouting(request)
+
+        assert state.read_alias() == 'replica_1'
+        request.user = User(pk=7)
+        assert state.read_alias() is None
+        assert state.alias is None
+
+    def test_writes_and_migrations_stay_on_the_primary(self, replicas):
+        router = routing.ReplicaRouter()
+
+        assert router.db_for_write(User) == 'default'
+        assert router.allow_migrate('replica_1', 'core') is False
+        assert router.allow_migrate('default', 'core') is None
+
+
+class TestReplicaRoutingMiddleware:
+
+    def test_successful_write_makes_the_user_sticky(self, replicas):
+        request = request_for('/api/bookings/', method='post', user=User(pk=9))
+
+        response = ReplicaRoutingMiddleware(lambda request: HttpResponse(status=201))(request)
+
+        assert cache.get(routing.STICKY_KEY.format(9)) == 1
+        assert float(response.cookies[replicas.REPLICA_STICKY_COOKIE].value) > time.time()
+
+    def test_failed_write_does_not(self, replicas):
+        request = request_for('/api/bookings/', method='post', user=User(pk=9))
+
+        response = ReplicaRoutingMiddleware(lambda request: HttpResponse(status=400))(request)
+
+        assert cache.get(routing.STICKY_KEY.format(9)) is None
+        assert replicas.REPLICA_STICKY_COOKIE not in response.cookies
@@ -0,0 +1,132 @@
+import runpy
+import pytest
+from asgiref.sync import async_to_sync
+from datetime import timedelta
+from decimal import Decimal
+from django.test import AsyncClient
+from django.utils import timezone
+
+from apps.common import metrics
+from apps.core import serving
+from apps.core.models import BookingStatus
+from apps.user.tokens import UserRefreshToken
+from tests.factories import BookingFactory, ParkingLotFactory, UserFactory
+
+
+def async_get(path, user=None, **params):
+    """GET ``path`` through the ASGI handler, as ``user`` if given"""
+    headers = {}
+    if user is not None:
+        headers['Authorization'] = f'Bearer {UserRefreshToken.for_user(user).access_token}'
+    return async_to_sync(AsyncClient(headers=headers).get)(path, params)
+
+
+class TestServing:
+
+    def test_middleware_runs_under_asgi(self, settings):
+        settings.METRICS_DIR = ''
+        settings.METRICS_TOKEN = ''
+
+        response = async_to_sync(AsyncClient().get)('/metrics')
+
+        assert response.status_code == 200
+        assert response['Server-Timing'].startswith('db;desc="0 queries"')
+        assert metrics._counters[metrics._key('http_requests_total', {
+            'route': 'metrics', 'method': 'GET', 'status': 200
+        })] >= 1
+
+    @pytest.mark.parametrize('mode, app, worker', [
+        ('asgi', 'config.asgi:application', 'uvicorn_worker.UvicornWorker'),
+        ('wsgi', 'config.wsgi:application', 'gthread'),
+    ])
+    def test_gunicorn_config(self, monkeypatch, mode, app, worker):
+        monkeypatch.setenv('SERVER_MODE', mode)
+
+        config = runpy.run_path(str(serving.GUNICORN_CONFIG))
+
+        assert (config['wsgi_app'], config['worker_class']) == (app, worker)
+        assert not config['preload_app']
+
+    def test_parse_mix(self):
+        assert serving.parse_mix('nearby=3, booking_create') == {'nearby': 3.0, 'booking_create': 1.0}
+        with pytest.raises(ValueError):
+            serving.parse_mix('nearby=1,teleport=2')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+
+    @pytest.fixture
+    def user(self):
+        return UserFactory()
+
+    @pytest.fixture
+    def window(self):
+        start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        return start, start + timedelta(hours=2)
+
+    def lot(self, **kwargs):
+        return ParkingLotFactory(latitude=Decimal('40.7128'), longitude=Decimal('-74.0060'), **kwargs)
+
+    def test_nearby_counts_current_bookings(self):
+        now = timezone.now()
+        garage = self.lot(available_spots=3)
+        BookingFactory(spot=garage, status=BookingStatus.ACTIVE,
+                       start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1))
+        ParkingLotFactory(latitude=Decimal('41.8781'), longitude=Decimal('-87.6298'))
+
+        response = async_get('/api/nearby/', latitude='40.7130', longitude='-74.0062', radius=1)
+
+        assert response.status_code == 200
+        spots = response.json()['spots']
+        assert [spot['id'] for spot in spots] == [str(garage.id)]
+        assert (spots[0]['available_spots'], spots[0]['total_spots']) == (2, 3)
+
+    def test_nearby_requires_location(self):
+        assert async_get('/api/nearby/', latitude='40.7130').status_code == 400
+
+    def test_search_excludes_full_lots(self, user, window):
+        start, end = window
+        full = self.lot(available_spots=1)
+        free = self.lot(available_spots=1)
+        BookingFactory(spot=full, status=BookingStatus.CONFIRMED,
+                       start_time=start + timedelta(hours=1), end_time=end + timedelta(hours=1))
+        BookingFactory(spot=free, status=BookingStatus.CONFIRMED,
+                       start_time=end, end_time=end + timedelta(hours=1))
+
+        response = async_get('/api/search/', user, lat='40.7130', lng='-74.0062', radius=1,
+                             start_time=start.isoformat(), end_time=end.isoformat())
+
+        assert response.status_code == 200
+        assert [result['id'] for result in response.json()['results']] == [str(free.id)]
+
+    def test_search_requires_authentication(self, window):
+        start, end = window
+
+        response = async_get('/api/search/', lat='40.7130', lng='-74.0062',
+                             start_time=start.isoformat(), end_time=end.isoformat())
+
+        assert response.status_code == 401
+
+    def test_bookings_list_paginated_and_filtered(self, user):
+        BookingFactory.create_batch(21, user=user, status=BookingStatus.CONFIRMED)
+        cancelled = BookingFactory(user=user, status=BookingStatus.CANCELLED)
+        BookingFactory(status=BookingStatus.CANCELLED)
+
+        first = async_get('/api/bookings/', user).json()
+        second = async_get('/api/bookings/', user, page=2).json()
+        filtered = async_get('/api/bookings/', user, status=BookingStatus.CANCELLED).json()
+
+        assert (first['count'], len(first['results']), len(second['results'])) == (22, 20, 2)
+        assert first['next'] and second['next'] is None
+        assert [booking['id'] for booking in filtered['results']] == [str(cancelled.id)]
+
+    def test_bookings_retrieve_own_only(self, user):
+        booking = BookingFactory(user=user)
+        other = BookingFactory()
+
+        response = async_get(f'/api/bookings/{booking.id}/', user)
+
+        assert response.status_code == 200
+        assert response.json()['id'] == str(booking.id)
+        assert async_get(f'/api/bookings/{other.id}/', user).status_code == 404
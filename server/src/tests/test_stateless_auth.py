@@ -0,0 +1,114 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.user import authentication
+from apps.user.authentication import user_from_claims
+from apps.user.tokens import UserRefreshToken
+from tests.factories import UserFactory
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    authentication.invalidate()
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+
+    def test_user_built_from_claims(self, django_assert_num_queries):
+        user = UserFactory(is_staff=True)
+        token = UserRefreshToken.for_user(user).access_token
+
+        with django_assert_num_queries(0):
+            claimed = user_from_claims(AccessToken(str(token)))
+            assert (claimed.pk, claimed.email, claimed.is_staff) == (user.pk, user.email, True)
+
+        # Every other field arrives with the first one touched
+        with django_assert_num_queries(1):
+            assert claimed.username == user.username
+            assert claimed.last_name == user.last_name
+            assert claimed.check_password('testpass123')
+
+        # And from the cache for the next request
+        with django_assert_num_queries(0):
+            assert user_from_claims(AccessToken(str(token))).first_name == user.first_name
+
+    def test_cache_dropped_when_user_saved(self):
+        user = UserFactory()
+        token = AccessToken(str(UserRefreshToken.for_user(user).access_token))
+        assert user_from_claims(token).first_name == user.first_name
+
+        user.first_name = 'Renamed'
+        user.save()
+
+        assert user_from_claims(token).first_name == 'Renamed'
+
+    def test_request_without_user_query(self, authenticated_client):
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get('/api/bookings/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any(User._meta.db_table in query['sql'] for query in queries)
+
+    def test_inactive_claim_rejected(self, api_client):
+        user = UserFactory()
+        refresh = UserRefreshToken.for_user(user)
+        refresh['is_active'] = False
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+        assert api_client.get('/api/bookings/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_token_without_claims_falls_back_to_user_query(self, api_client):
+        user = UserFactory()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = api_client.get(reverse('user-profile'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user']['email'] == user.email
+
+    def test_refresh_reads_claims_again(self, api_client):
+        user = UserFactory()
+        refresh = UserRefreshToken.for_user(user)
+        user.is_staff = True
+        user.save()
+
+        response = api_client.post(reverse('token_refresh'), {'refresh': str(refresh)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert AccessToken(response.data['access'])['is_staff'] is True
+
+    def test_claims_user_saved_with_update_fields_only(self):
+        user = UserFactory()
+        claimed = user_from_claims(AccessToken(str(UserRefreshToken.for_user(user).access_token)))
+
+        with pytest.raises(ValueError):
+            claimed.save()
+
+    def test_change_password_keeps_deactivation(self, api_client):
+        user = UserFactory(is_staff=True)
+        user.set_password('oldpass123')
+        user.save()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(user).access_token}')
+        # Deactivated and stripped of staff while the token still says otherwise
+        user.is_active = False
+        user.is_staff = False
+        user.save()
+
+        response = api_client.post(reverse('user-change-password'), {
+            'old_password': 'oldpass123',
+            'new_password': 'newpass456',
+            'new_password_confirm': 'newpass456',
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.check_password('newpass456')
+        assert (user.is_active, user.is_staff) == (False, False)
@@ -0,0 +1,107 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from apps.user.throttling import CacheBuckets, LocalBuckets, parse_rate, take_token
+from tests.factories import UserFactory
+
+
+class TestTokenBucket:
+
+    def test_parse_rate(self):
+        assert parse_rate('5/min') == (5, 5 / 60)
+        assert parse_rate('10/hour') == (10, 10 / 3600)
+        assert parse_rate('') is None
+
+    def test_burst_then_refill(self):
+        state = None
+        for _ in range(3):
+            allowed, state, _ = take_token(state, 100.0, 3, 1.0)
+            assert allowed
+
+        allowed, state, wait = take_token(state, 100.0, 3, 1.0)
+        assert not allowed
+        assert wait == pytest.approx(1.0)
+
+        allowed, state, _ = take_token(state, 101.0, 3, 1.0)
+        assert allowed
+
+    def test_refill_stops_at_burst(self):
+        allowed, state, _ = take_token((0, 0.0), 1000.0, 3, 1.0)
+
+        assert allowed
+        assert state == (2, 1000.0)
+
+    def test_local_buckets_drop_least_recently_used(self, settings):
+        settings.LOGIN_THROTTLE_MAX_KEYS = 2
+        buckets = LocalBuckets()
+
+        buckets.take('a', 1, 0.001)
+        buckets.take('b', 1, 0.001)
+        buckets.take('a', 1, 0.001)
+        buckets.take('c', 1, 0.001)
+
+        assert list(buckets.buckets) == ['a', 'c']
+
+    def test_cache_buckets(self):
+        buckets = CacheBuckets('default')
+
+        assert buckets.take('throttle:test:cache', 1, 0.001) == (True, 0.0)
+        allowed, wait = buckets.take('throttle:test:cache', 1, 0.001)
+        assert not allowed
+        assert wait > 0
+
+
+@pytest.mark.django_db
+class TestLoginThrottle:
+
+    def login(self, api_client, email, **extra):
+        return api_client.post(reverse('user-login'), {'email': email, 'password': 'wrong-password'}, **extra)
+
+    def test_email_bucket_spans_clients_and_case(self, api_client, settings):
+        settings.LOGIN_THROTTLE_RATES = {'login_ip': '', 'login_email': '2/min'}
+        UserFactory(email='victim@example.com')
+
+        assert self.login(api_client, 'victim@example.com', REMOTE_ADDR='10.0.0.1').status_code == 400
+        assert self.login(api_client, ' Victim@Example.com', REMOTE_ADDR='10.0.0.2').status_code == 400
+        response = self.login(api_client, 'victim@example.com', REMOTE_ADDR='10.0.0.3')
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) > 0
+        assert self.login(api_client, 'other@example.com', REMOTE_ADDR='10.0.0.3').status_code == 400
+
+    def test_ip_bucket(self, api_client, settings):
+        settings.LOGIN_THROTTLE_RATES = {'login_ip': '2/min', 'login_email': ''}
+
+        for email in ('a@example.com', 'b@example.com'):
+            assert self.login(api_client, email).status_code == 400
+
+        assert self.login(api_client, 'c@example.com').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert self.login(api_client, 'c@example.com', REMOTE_ADDR='10.0.0.9').status_code == 400
+
+    def test_registration_throttled_by_ip(self, api_client, settings):
+        settings.LOGIN_THROTTLE_RATES = {'register_ip': '1/hour'}
+        data = {'email': 'new@example.com', 'username': 'new', 'first_name': 'New', 'last_name': 'User',
+                'password': 'testpassword123', 'password_confirm': 'testpassword123'}
+
+        assert api_client.post(reverse('user-list'), data).status_code == status.HTTP_201_CREATED
+        response = api_client.post(reverse('user-list'), {**data, 'email': 'new2@example.com', 'username': 'new2'})
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_ip_bucket_ignores_spoofed_forwarded_for(self, api_client, settings):
+        settings.LOGIN_THROTTLE_RATES = {'login_ip': '2/min', 'login_email': ''}
+
+        for n in range(2):
+            assert self.login(api_client, 'a@example.com', HTTP_X_FORWARDED_FOR=f'203.0.113.{n}').status_code == 400
+
+        response = self.login(api_client, 'a@example.com', HTTP_X_FORWARDED_FOR='203.0.113.99')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_ip_bucket_behind_trusted_proxy(self, api_client, settings):
+        settings.LOGIN_THROTTLE_RATES = {'login_ip': '1/min', 'login_email': ''}
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+
+        assert self.login(api_client, 'a@example.com', HTTP_X_FORWARDED_FOR='spoofed, 198.51.100.1').status_code == 400
+        assert self.login(api_client, 'a@example.com', HTTP_X_FORWARDED_FOR='other, 198.51.100.1').status_code == 429
+        assert self.login(api_client, 'a@example.com', HTTP_X_FORWARDED_FOR='198.51.100.2').status_code == 400
@@ -0,0 +1,123 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.user import blacklist
+from apps.user.blacklist import BloomFilter
+from apps.user.management.commands.prune_tokens import prune
+from apps.user.tokens import UserRefreshToken
+from tests.factories import UserFactory
+
+
+class TestBloomFilter:
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        members = [f'member-{n}' for n in range(1000)]
+        for member in members:
+            bloom.add(member)
+
+        assert all(member in bloom for member in members)
+        assert sum(f'other-{n}' in bloom for n in range(10000)) < 300
+
+
+@pytest.mark.django_db
+class TestTokenBlacklist:
+
+    @pytest.fixture(autouse=True)
+    def fresh_filter(self, settings, tmp_path):
+        # Shared by every process, as a filter needs
+        settings.CACHES = {**settings.CACHES, 'blacklist': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path),
+        }}
+        settings.TOKEN_BLACKLIST_CACHE = 'blacklist'
+        blacklist.reset()
+
+    def test_rotated_refresh_token_rejected(self, api_client):
+        refresh = str(UserRefreshToken.for_user(UserFactory()))
+
+        assert api_client.post(reverse('token_refresh'), {'refresh': refresh}).status_code == status.HTTP_200_OK
+        assert api_client.post(reverse('token_refresh'), {'refresh': refresh}).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_logout_blacklists(self, authenticated_client):
+        refresh = str(UserRefreshToken.for_user(authenticated_client.user))
+
+        response = authenticated_client.post(reverse('user-logout'), {'refresh': refresh})
+
+        assert response.status_code == status.HTTP_205_RESET_CONTENT
+        assert BlacklistedToken.objects.filter(token__jti=UserRefreshToken(refresh, verify=False)['jti']).exists()
+
+    def test_check_skips_database_for_unknown_tokens(self, django_assert_num_queries):
+        user = UserFactory()
+        revoked = UserRefreshToken.for_user(user)
+        revoked.blacklist()
+        tokens = [str(UserRefreshToken.for_user(user)) for _ in range(3)]
+        UserRefreshToken(tokens[0])
+
+        with django_assert_num_queries(0):
+            for token in tokens:
+                UserRefreshToken(token)
+
+    def test_rotations_between_checks_skip_database(self, django_assert_num_queries,
+                                                    django_capture_on_commit_callbacks):
+        user = UserFactory()
+        UserRefreshToken(str(UserRefreshToken.for_user(user)))
+
+        for _ in range(3):
+            with django_capture_on_commit_callbacks(execute=True):
+                UserRefreshToken.for_user(user).blacklist()
+            token = str(UserRefreshToken.for_user(user))
+            with django_assert_num_queries(0):
+                UserRefreshToken(token)
+
+    def test_published_by_another_worker(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        user = UserFactory()
+        revoked = UserRefreshToken.for_user(user)
+        UserRefreshToken(str(revoked))
+        other_worker = blacklist._Blacklist()
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=revoked['jti']))
+        with django_capture_on_commit_callbacks(execute=True):
+            other_worker.added(revoked['jti'])
+        token = str(UserRefreshToken.for_user(user))
+
+        with django_assert_num_queries(0):
+            UserRefreshToken(token)
+        with pytest.raises(TokenError):
+            UserRefreshToken(str(revoked))
+
+    def test_lost_publication_reads_rows(self):
+        revoked = UserRefreshToken.for_user(UserFactory())
+        UserRefreshToken(str(revoked))
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=revoked['jti']))
+        # Counted but never written, or evicted since
+        caches['blacklist'].set(blacklist.GENERATION_KEY, 1, timeout=None)
+
+        with pytest.raises(TokenError):
+            UserRefreshToken(str(revoked))
+
+    def test_process_cache_checks_database(self, settings):
+        settings.TOKEN_BLACKLIST_CACHE = 'default'
+        refresh = UserRefreshToken.for_user(UserFactory())
+        UserRefreshToken(str(refresh))
+        # Blacklisted by another worker, which could not tell this one
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+
+        with pytest.raises(TokenError):
+            UserRefreshToken(str(refresh))
+
+    def test_prune_expired_tokens(self):
+        user = UserFactory()
+        now = timezone.now()
+        for jti, expires_at in [('old-1', now - timedelta(days=1)), ('old-2', now - timedelta(hours=1)),
+                                ('live', now + timedelta(days=1))]:
+            token = OutstandingToken.objects.create(user=user, jti=jti, token='', expires_at=expires_at)
+            BlacklistedToken.objects.create(token=token)
+
+        assert prune(batch_size=1) == 2
+        assert list(OutstandingToken.objects.filter(user=user).values_list('jti', flat=True)) == ['live']
+        assert BlacklistedToken.objects.filter(token__user=user).count() == 1